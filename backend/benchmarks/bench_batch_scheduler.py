@@ -0,0 +1,153 @@
+"""Replay a day of orders through the kitchen, order by order vs. batched.
+
+Every item has one cook who makes one batch at a time; a batch of ``n``
+units takes ``setup + n * unit`` minutes. Order by order, the cook always
+takes the oldest waiting line alone; batched, the cook takes
+``BatchScheduler.next_batch``. Waits are measured from order placement until
+the last item of the order is finished. Run from ``backend/``:
+
+    python -m benchmarks.bench_batch_scheduler --load --orders 1500 --hours 10
+    python -m benchmarks.bench_batch_scheduler --schema public --date 2026-10-18
+"""
+import argparse
+import asyncio
+import heapq
+from datetime import date, timedelta
+
+from benchmarks.synthetic import BENCH_SCHEMA, MENU, bench_pool, generate_orders, reset_schema
+from services.batch_scheduler import BatchScheduler
+from services.kitchen_queue import KitchenQueue
+
+
+async def load_day(pool, day: date = None):
+    """Orders placed on one Eastern day (default: the latest day with orders), oldest first"""
+    async with pool.acquire() as conn:
+        if day is None:
+            day = await conn.fetchval("SELECT MAX((order_time AT TIME ZONE 'US/Eastern')::date) FROM orders")
+        rows = await conn.fetch("""
+            SELECT id, order_number, order_time, items
+            FROM orders
+            WHERE (order_time AT TIME ZONE 'US/Eastern')::date = $1
+            ORDER BY order_time
+        """, day)
+    orders = []
+    for row in rows:
+        lines = {}
+        for item in row['items']:
+            lines[item['name']] = lines.get(item['name'], 0) + item['quantity']
+        orders.append({
+            'id': row['id'],
+            'number': row['order_number'],
+            'time': row['order_time'],
+            'lines': list(lines.items())
+        })
+    return day, orders
+
+
+def simulate(orders, batched: bool, setup: float, unit: float) -> dict:
+    queue = KitchenQueue()
+    scheduler = BatchScheduler()
+    queue.clear()
+    scheduler.clear()
+
+    events = [(order['time'], i, 'arrive', order) for i, order in enumerate(orders)]
+    heapq.heapify(events)
+    sequence = len(events)
+    busy = set()
+    remaining = {}
+    placed = {}
+    waits = []
+    trips = 0
+    last_done = None
+
+    def start(item_name, now):
+        nonlocal sequence, trips
+        if item_name in busy:
+            return
+        if batched:
+            batch = scheduler.next_batch(item_name)
+            order_ids = batch['order_ids'] if batch else []
+        else:
+            first = next(iter(queue.waiting_lines(item_name)), None)
+            order_ids = [first.order_id] if first else []
+        if not order_ids:
+            return
+
+        units = sum(queue.orders[order_id].lines[item_name].quantity for order_id in order_ids)
+        for order_id in order_ids:
+            queue.update_item_status(order_id, item_name, 'cooking', now)
+        busy.add(item_name)
+        trips += 1
+        sequence += 1
+        heapq.heappush(events, (now + timedelta(minutes=setup + unit * units), sequence, 'done', (item_name, order_ids)))
+
+    while events:
+        now, _, kind, payload = heapq.heappop(events)
+        if kind == 'arrive':
+            queue.enqueue(payload['id'], payload['lines'], now, order_number=payload['number'])
+            remaining[payload['id']] = len(payload['lines'])
+            placed[payload['id']] = now
+            for item_name, _ in payload['lines']:
+                start(item_name, now)
+            continue
+
+        item_name, order_ids = payload
+        busy.discard(item_name)
+        for order_id in order_ids:
+            queue.update_item_status(order_id, item_name, 'finished', now)
+            remaining[order_id] -= 1
+            if remaining[order_id] == 0:
+                waits.append((now - placed[order_id]).total_seconds() / 60)
+                queue.remove(order_id, now)
+                last_done = now
+        start(item_name, now)
+
+    waits.sort()
+    hours = (last_done - orders[0]['time']).total_seconds() / 3600 if waits else 0
+    return {
+        'orders': len(waits),
+        'trips': trips,
+        'average_wait': sum(waits) / len(waits) if waits else 0,
+        'p90_wait': waits[int(0.9 * (len(waits) - 1))] if waits else 0,
+        'max_wait': waits[-1] if waits else 0,
+        'orders_per_hour': len(waits) / hours if hours else 0
+    }
+
+
+async def main(args):
+    async with bench_pool(args.schema) as pool:
+        if args.load:
+            print(f"Loading {args.orders:,} synthetic orders over {args.hours} hours...")
+            await reset_schema(pool, args.schema)
+            await generate_orders(pool, args.orders, days=args.hours / 24)
+        day, orders = await load_day(pool, args.date)
+
+    if not orders:
+        print("No orders to replay")
+        return
+
+    scheduler = BatchScheduler()
+    if args.capacity:
+        scheduler.capacities = {name.lower(): args.capacity for name, _ in MENU}
+    print(f"Replaying {len(orders):,} orders from {day} (setup {args.setup} min, {args.unit} min/unit)")
+    for label, batched in (("order by order", False), ("batched", True)):
+        result = simulate(orders, batched, args.setup, args.unit)
+        print(
+            f"{label:<15} trips {result['trips']:6d}   avg wait {result['average_wait']:7.1f} min   "
+            f"p90 {result['p90_wait']:7.1f} min   max {result['max_wait']:7.1f} min   "
+            f"{result['orders_per_hour']:6.1f} orders/hour"
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--schema", default=BENCH_SCHEMA, help="Schema to read orders from")
+    parser.add_argument("--date", type=date.fromisoformat, help="Eastern date to replay (default: latest)")
+    parser.add_argument("--load", action="store_true", help="Reset the schema and generate a synthetic day first")
+    parser.add_argument("--orders", type=int, default=1500)
+    parser.add_argument("--hours", type=float, default=10)
+    parser.add_argument("--setup", type=float, default=4, help="Minutes per batch regardless of size")
+    parser.add_argument("--unit", type=float, default=1, help="Minutes per unit in a batch")
+    parser.add_argument("--capacity", type=int, help="Batch capacity for every item (default: KITCHEN_BATCH_CAPACITY)")
+    args = parser.parse_args()
+    asyncio.run(main(args))
@@ -0,0 +1,65 @@
+"""Generation time and file size of the order-level export per file format.
+
+Each format streams every order from ``OrderService.iter_order_rows`` the
+way ``/reports/orders/export?format=...`` does, discarding chunks as a
+download would. The item report is also rendered in each format from one
+cached ``get_item_reports`` result. Run from ``backend/``:
+
+    python -m benchmarks.bench_export_formats --orders 10000 100000 1000000
+"""
+import argparse
+import asyncio
+import time
+
+from benchmarks.synthetic import bench_pool, generate_orders, reset_schema
+from services.excel_service import ExcelService
+from services.export_formats import EXPORT_FORMATS, render_report, stream_order_rows
+from services.order_service import OrderService
+
+
+async def export_orders(service: OrderService, export_format: str) -> int:
+    rows = service.iter_order_rows()
+    if export_format == 'xlsx':
+        chunks = ExcelService().stream_order_excel(rows)
+    else:
+        chunks = stream_order_rows(rows, export_format)
+    size = 0
+    async for chunk in chunks:
+        size += len(chunk)
+    return size
+
+
+def export_items(reports, export_format: str) -> int:
+    if export_format == 'xlsx':
+        return len(ExcelService().create_item_report_excel(reports).getvalue())
+    return len(render_report("items", reports, export_format))
+
+
+async def main(args):
+    async with bench_pool() as pool:
+        service = OrderService(pool)
+        for count in args.orders:
+            await reset_schema(pool)
+            await generate_orders(pool, count)
+            reports = await service.get_item_reports()
+            print(f"\n{count:,} orders")
+            for export_format in EXPORT_FORMATS:
+                started = time.perf_counter()
+                size = await export_orders(service, export_format)
+                elapsed = time.perf_counter() - started
+
+                started = time.perf_counter()
+                for _ in range(args.repeat):
+                    item_size = export_items(reports, export_format)
+                item_ms = (time.perf_counter() - started) / args.repeat * 1000
+                print(
+                    f"  {export_format:<8} orders {elapsed:7.2f} s {size / 2**20:8.1f} MiB   "
+                    f"item report {item_ms:7.1f} ms {item_size / 1024:7.1f} KiB"
+                )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--orders", type=int, nargs="+", default=[10000, 100000])
+    parser.add_argument("--repeat", type=int, default=5, help="Renders of the item report to average")
+    asyncio.run(main(parser.parse_args()))
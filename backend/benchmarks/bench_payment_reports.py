@@ -0,0 +1,70 @@
+"""Benchmark payment method reports on synthetic orders.
+
+Compares the single ``GROUP BY`` in ``OrderService.get_payment_reports``
+against pulling every order into Python and aggregating there, which is what
+the old report did. Run from ``backend/``:
+
+    python -m benchmarks.bench_payment_reports --orders 1000000
+"""
+import argparse
+import asyncio
+from collections import defaultdict
+from datetime import timedelta
+
+from benchmarks.synthetic import Timer, bench_pool, generate_orders, reset_schema
+from services.order_service import OrderService
+
+
+async def python_payment_reports(pool):
+    """Row-by-row aggregation, kept only as the benchmark baseline"""
+    stats = defaultdict(lambda: {'orders': 0, 'items': 0, 'pending': 0, 'completed': 0, 'minutes': []})
+    async with pool.acquire() as conn:
+        rows = await conn.fetch("SELECT * FROM orders")
+    for row in rows:
+        order = dict(row)
+        entry = stats[order['payment_method']]
+        entry['orders'] += 1
+        entry['items'] += order['total_items']
+        if order['status'] == 'completed':
+            entry['completed'] += 1
+            if order['completed_time']:
+                entry['minutes'].append((order['completed_time'] - order['order_time']).total_seconds() / 60)
+        else:
+            entry['pending'] += 1
+    return stats
+
+
+async def main(orders: int, runs: int, skip_load: bool):
+    async with bench_pool() as pool:
+        if not skip_load:
+            print(f"Loading {orders:,} synthetic orders...")
+            await reset_schema(pool)
+            await generate_orders(pool, orders)
+
+        service = OrderService(pool)
+        end = service.get_eastern_time()
+
+        cases = [
+            ("SQL GROUP BY, all time", lambda: service.get_payment_reports()),
+            ("SQL GROUP BY, last 7 days", lambda: service.get_payment_reports(end - timedelta(days=7), end)),
+            ("SQL GROUP BY, last day", lambda: service.get_payment_reports(end - timedelta(days=1), end)),
+            ("Python loop, all time", lambda: python_payment_reports(pool)),
+        ]
+        for label, run in cases:
+            timer = Timer()
+            for _ in range(runs):
+                async with timer.measure():
+                    await run()
+            print(f"{label:<28} {timer.summary()}")
+
+        for report in await service.get_payment_reports():
+            print(report)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--orders", type=int, default=1_000_000)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--skip-load", action="store_true", help="Reuse the orders already in the bench schema")
+    args = parser.parse_args()
+    asyncio.run(main(args.orders, args.runs, args.skip_load))
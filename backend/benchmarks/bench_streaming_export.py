@@ -0,0 +1,70 @@
+"""Peak memory of the order-level Excel export, streamed vs. built in memory.
+
+``streamed`` is the ``/reports/orders/export`` path: a server-side cursor
+feeds ``XlsxStreamWriter`` and chunks are discarded as they are produced,
+as a client download would. ``buffered`` fetches every order, builds a
+DataFrame and writes the workbook into a ``BytesIO`` with openpyxl, the way
+the aggregate report exports work; it is skipped above ``--buffered-limit``
+orders because it takes minutes and gigabytes there. Peak memory is the
+Python heap high-water mark from ``tracemalloc``. Run from ``backend/``:
+
+    python -m benchmarks.bench_streaming_export --orders 10000 100000 1000000
+"""
+import argparse
+import asyncio
+import io
+import time
+import tracemalloc
+
+import pandas as pd
+
+from benchmarks.synthetic import bench_pool, generate_orders, reset_schema
+from services.excel_service import ExcelService
+from services.order_service import OrderService
+
+
+async def streamed(service: OrderService) -> int:
+    size = 0
+    async for chunk in ExcelService().stream_order_excel(service.iter_order_rows()):
+        size += len(chunk)
+    return size
+
+
+async def buffered(service: OrderService) -> int:
+    rows = [dict(row) async for row in service.iter_order_rows()]
+    output = io.BytesIO()
+    with pd.ExcelWriter(output, engine='openpyxl') as writer:
+        pd.DataFrame(rows).to_excel(writer, sheet_name='Orders', index=False)
+    return len(output.getvalue())
+
+
+async def measure(export, service: OrderService):
+    tracemalloc.start()
+    started = time.perf_counter()
+    size = await export(service)
+    elapsed = time.perf_counter() - started
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return elapsed, peak, size
+
+
+async def main(args):
+    async with bench_pool() as pool:
+        service = OrderService(pool)
+        for count in args.orders:
+            await reset_schema(pool)
+            await generate_orders(pool, count)
+            print(f"\n{count:,} orders")
+            for label, export in (("streamed", streamed), ("buffered", buffered)):
+                if export is buffered and count > args.buffered_limit:
+                    print(f"  {label:<9} skipped (over --buffered-limit)")
+                    continue
+                elapsed, peak, size = await measure(export, service)
+                print(f"  {label:<9} {elapsed:8.1f} s   peak {peak / 2**20:8.1f} MiB   file {size / 2**20:7.1f} MiB")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--orders", type=int, nargs="+", default=[10000, 100000])
+    parser.add_argument("--buffered-limit", type=int, default=100000, help="Largest order count to run the in-memory export for")
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,128 @@
+"""Benchmark the columnar analytics path against the row-by-row report loops.
+
+For each order count the bench schema is reloaded and the three season
+reports (payment, item, price analysis) are computed three ways:
+
+* ``loop``       - ``SELECT *`` then ``dict(row)`` per order, as the reports used to
+* ``sql``        - the current ``OrderService`` queries
+* ``vectorized`` - ``AnalyticsService``: ``COPY ... CSV`` into pandas and groupbys
+
+Run from ``backend/``:
+
+    python -m benchmarks.bench_vectorized_reports --orders 10000 100000 1000000
+"""
+import argparse
+import asyncio
+import resource
+from collections import Counter, defaultdict
+
+from benchmarks.synthetic import Timer, bench_pool, generate_orders, reset_schema
+from benchmarks.vectorized_reports import AnalyticsService
+from services.order_service import OrderService
+
+
+async def loop_payment_reports(pool):
+    stats = defaultdict(lambda: {'orders': 0, 'items': 0, 'pending': 0, 'completed': 0, 'minutes': []})
+    async with pool.acquire() as conn:
+        rows = await conn.fetch("SELECT * FROM orders")
+    for row in rows:
+        order = dict(row)
+        entry = stats[order['payment_method']]
+        entry['orders'] += 1
+        entry['items'] += order['total_items']
+        if order['status'] == 'completed':
+            entry['completed'] += 1
+            if order['completed_time']:
+                entry['minutes'].append((order['completed_time'] - order['order_time']).total_seconds() / 60)
+        else:
+            entry['pending'] += 1
+    return stats
+
+
+async def loop_item_reports(pool):
+    stats = defaultdict(lambda: {'total_ordered': 0, 'order_count': 0, 'customers': [], 'payment_methods': []})
+    async with pool.acquire() as conn:
+        rows = await conn.fetch("SELECT * FROM orders ORDER BY order_time")
+    for row in rows:
+        order = dict(row)
+        for item in order['items']:
+            entry = stats[item['name']]
+            entry['total_ordered'] += item['quantity']
+            entry['order_count'] += 1
+            entry['customers'].append(order['customer_name'])
+            entry['payment_methods'].append(order['payment_method'])
+    return {
+        name: (entry['total_ordered'], Counter(entry['payment_methods']).most_common(1)[0][0])
+        for name, entry in stats.items()
+    }
+
+
+async def loop_price_analysis(pool):
+    analysis = {}
+    async with pool.acquire() as conn:
+        rows = await conn.fetch("SELECT * FROM orders WHERE status = 'completed' ORDER BY order_time DESC")
+    for row in rows:
+        order = dict(row)
+        for item in order['items']:
+            entry = analysis.setdefault(item['name'], {'quantity': 0, 'revenue': 0.0, 'count': 0})
+            entry['quantity'] += item['quantity']
+            entry['revenue'] += item.get('subtotal', item['price'] * item['quantity'])
+            entry['count'] += 1
+    return analysis
+
+
+def peak_rss_mb() -> float:
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+async def run_size(pool, orders: int, runs: int, skip_load: bool):
+    if not skip_load:
+        print(f"\nLoading {orders:,} synthetic orders...")
+        await reset_schema(pool)
+        await generate_orders(pool, orders)
+
+    order_service = OrderService(pool)
+    analytics_service = AnalyticsService(pool)
+
+    cases = [
+        ("payment    loop", lambda: loop_payment_reports(pool)),
+        ("payment    sql", lambda: order_service.get_payment_reports()),
+        ("payment    vectorized", lambda: analytics_service.get_payment_reports()),
+        ("items      loop", lambda: loop_item_reports(pool)),
+        ("items      sql", lambda: order_service.get_item_reports()),
+        ("items      vectorized", lambda: analytics_service.get_item_reports()),
+        ("price      loop", lambda: loop_price_analysis(pool)),
+        ("price      vectorized", lambda: analytics_service.get_price_analysis()),
+    ]
+    print(f"--- {orders:,} orders ---")
+    for label, run in cases:
+        timer = Timer()
+        for _ in range(runs):
+            async with timer.measure():
+                await run()
+        print(f"{label:<24} {timer.summary()}   peak rss {peak_rss_mb():8.1f} MB")
+
+    # The vectorized reports must agree with the SQL ones
+    sql_payment = await order_service.get_payment_reports()
+    vectorized_payment = await analytics_service.get_payment_reports()
+    assert [(r.paymentMethod, r.orderCount, r.totalItems) for r in sql_payment] == \
+        [(r.paymentMethod, r.orderCount, r.totalItems) for r in vectorized_payment]
+    sql_items = await order_service.get_item_reports()
+    vectorized_items = await analytics_service.get_item_reports()
+    assert [(r.itemName, r.totalOrdered, r.popularPaymentMethod) for r in sql_items] == \
+        [(r.itemName, r.totalOrdered, r.popularPaymentMethod) for r in vectorized_items]
+
+
+async def main(sizes, runs: int, skip_load: bool):
+    async with bench_pool() as pool:
+        for orders in sizes:
+            await run_size(pool, orders, runs, skip_load)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--orders", type=int, nargs="+", default=[10_000, 100_000, 1_000_000])
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--skip-load", action="store_true", help="Reuse the orders already in the bench schema")
+    args = parser.parse_args()
+    asyncio.run(main(args.orders, args.runs, args.skip_load))
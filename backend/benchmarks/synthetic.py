@@ -0,0 +1,177 @@
+"""Synthetic order data for report benchmarks.
+
+Benchmarks run inside a throwaway schema on the database in DATABASE_URL so
+they never touch real orders. The schema gets the same tables and indexes as
+production by replaying ``migrations/`` with the schema on the search path.
+"""
+import os
+import time
+from contextlib import asynccontextmanager
+from datetime import datetime, timedelta
+
+import asyncpg
+from dotenv import load_dotenv
+
+from db import init_connection
+from models.order import EASTERN_TZ
+
+load_dotenv()
+
+BENCH_SCHEMA = "bench"
+MIGRATIONS_DIR = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'migrations')
+
+# (name, price) pairs mirroring the default menu
+MENU = [
+    ("Dosa", 10.99), ("Chicken Biryani", 12.99), ("Goat Biryani", 12.99),
+    ("Goat Curry", 14.99), ("Fish Pulusu", 12.99), ("Chicken 65", 9.99),
+    ("Idly", 9.99), ("Coffee", 3.00), ("Chaat Items", 5.99), ("Bajji", 6.99),
+    ("Punugulu", 5.99), ("Nellore Kaaram", 10.99), ("Paya Soup", 8.99),
+    ("Keema", 15.99), ("Tea", 2.00), ("Aloo Masala", 6.99), ("Fruits Cutting", 5.99),
+]
+
+
+@asynccontextmanager
+async def bench_pool(schema: str = BENCH_SCHEMA, **kwargs):
+    """Pool whose connections resolve unqualified table names in the bench schema"""
+    url = os.getenv("DATABASE_URL")
+    if not url:
+        raise ValueError("DATABASE_URL environment variable is not set")
+
+    conn = await asyncpg.connect(url)
+    try:
+        await conn.execute(f"CREATE SCHEMA IF NOT EXISTS {schema}")
+    finally:
+        await conn.close()
+
+    pool = await asyncpg.create_pool(
+        url,
+        min_size=1,
+        max_size=kwargs.pop('max_size', 4),
+        init=init_connection,
+        server_settings={'search_path': f'{schema},public', 'timezone': 'UTC'},
+        **kwargs
+    )
+    try:
+        yield pool
+    finally:
+        await pool.close()
+
+
+async def reset_schema(pool, schema: str = BENCH_SCHEMA):
+    """Drop and recreate the bench tables by replaying the migrations"""
+    async with pool.acquire() as conn:
+        await conn.execute(f"DROP SCHEMA IF EXISTS {schema} CASCADE")
+        await conn.execute(f"CREATE SCHEMA {schema}")
+        await conn.execute("""
+            CREATE TABLE IF NOT EXISTS menu_items (
+                id TEXT PRIMARY KEY,
+                name TEXT NOT NULL,
+                chef TEXT,
+                sous_chef TEXT,
+                category TEXT NOT NULL,
+                price DECIMAL(10,2) NOT NULL,
+                available BOOLEAN DEFAULT true
+            )
+        """)
+        for file in sorted(os.listdir(MIGRATIONS_DIR)):
+            if file.endswith('.sql'):
+                with open(os.path.join(MIGRATIONS_DIR, file), 'r') as f:
+                    await conn.execute(f.read())
+        await conn.executemany("""
+            INSERT INTO menu_items (id, name, chef, category, price)
+            VALUES ($1, $2, 'Bench', 'Bench', $3)
+            ON CONFLICT (id) DO NOTHING
+        """, [(name.lower().replace(' ', '_'), name, price) for name, price in MENU])
+
+
+async def generate_orders(pool, count: int, days: int = 90, pending_ratio: float = 0.1):
+    """Insert ``count`` orders spread evenly over the last ``days`` days.
+
+    Each order has one to three lines drawn from ``MENU``; completed orders
+    take between 5 and 45 minutes. Generation happens server-side with
+    ``generate_series`` so a million rows load in seconds.
+    """
+    end = datetime.now(EASTERN_TZ)
+    start = end - timedelta(days=days)
+    step = timedelta(days=days) / max(count, 1)
+    names = [name for name, _ in MENU]
+    prices = [price for _, price in MENU]
+
+    async with pool.acquire() as conn:
+        await conn.execute("""
+            INSERT INTO orders (
+                id, status, order_number, customer_name, payment_method,
+                order_time, completed_time, actual_delivery_time,
+                estimated_delivery_time, total_items, total_amount, items
+            )
+            SELECT
+                'bench-' || g,
+                CASE WHEN random() < $6 THEN 'pending' ELSE 'completed' END,
+                g::text,
+                'Customer ' || (g % 5000),
+                (ARRAY['zelle', 'cashapp', 'cash'])[1 + (g / 7) % 3],
+                ts,
+                NULL,
+                NULL,
+                ts + interval '30 minutes',
+                lines.total_items,
+                lines.total_amount,
+                lines.items
+            FROM generate_series(1, $1) AS g
+            CROSS JOIN LATERAL (SELECT $2::timestamptz + (g * $3::interval) AS ts) t
+            CROSS JOIN LATERAL (
+                SELECT
+                    SUM(qty)::int AS total_items,
+                    ROUND(SUM(qty * ($5::numeric[])[idx]), 2) AS total_amount,
+                    jsonb_agg(jsonb_build_object(
+                        'name', ($4::text[])[idx],
+                        'quantity', qty,
+                        'price', ($5::numeric[])[idx],
+                        'subtotal', ROUND(qty * ($5::numeric[])[idx], 2),
+                        'cooking_status', 'not started'
+                    )) AS items
+                FROM (
+                    SELECT DISTINCT ON (idx) idx, qty
+                    FROM (
+                        SELECT
+                            1 + ((g * 7 + n * 13) % array_length($4::text[], 1)) AS idx,
+                            1 + ((g + n) % 3) AS qty
+                        FROM generate_series(1, 1 + g % 3) AS n
+                    ) picked
+                ) line
+            ) lines
+        """, count, start, step, names, prices, pending_ratio)
+
+        # Finish the completed orders after a plausible kitchen delay
+        await conn.execute("""
+            UPDATE orders
+            SET completed_time = order_time + (5 + random() * 40) * interval '1 minute',
+                items = (
+                    SELECT jsonb_agg(jsonb_set(line, '{cooking_status}', '"finished"'))
+                    FROM jsonb_array_elements(items) AS line
+                )
+            WHERE status = 'completed'
+        """)
+        await conn.execute("UPDATE orders SET actual_delivery_time = completed_time WHERE status = 'completed'")
+        await conn.execute("ANALYZE orders")
+
+
+class Timer:
+    """Collects wall-clock timings for repeated runs"""
+
+    def __init__(self):
+        self.samples = []
+
+    @asynccontextmanager
+    async def measure(self):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.samples.append(time.perf_counter() - started)
+
+    def summary(self) -> str:
+        ordered = sorted(self.samples)
+        best = ordered[0] * 1000
+        median = ordered[len(ordered) // 2] * 1000
+        return f"best {best:8.1f} ms   median {median:8.1f} ms   runs {len(ordered)}"
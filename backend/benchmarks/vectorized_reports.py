@@ -0,0 +1,246 @@
+from typing import List, Optional
+from models.order import PaymentReport, ItemReport, EASTERN_TZ
+from datetime import datetime
+from asyncpg import Pool
+import io
+import logging
+import numpy as np
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+# Range filter shared by the bulk fetch queries
+RANGE_FILTER = """
+    ($1::timestamptz IS NULL OR o.order_time >= $1)
+    AND ($2::timestamptz IS NULL OR o.order_time < $2)
+"""
+
+class AnalyticsService:
+    """Season-scale reports computed on columnar frames.
+
+    Orders and order lines are streamed out of Postgres with COPY (CSV) into
+    pandas and aggregated with vectorized groupbys. This produces the same
+    PaymentReport, ItemReport and price analysis structures as OrderService,
+    without building a dict or model per row. The live reports aggregate in
+    SQL, which bench_vectorized_reports.py measures as faster, so this path
+    is kept here as the benchmark's columnar baseline.
+    """
+
+    def __init__(self, pool: Pool):
+        self.pool = pool
+
+    def _localize(self, value: Optional[datetime]) -> Optional[datetime]:
+        """Treat naive datetimes as Eastern time"""
+        if value is not None and value.tzinfo is None:
+            return EASTERN_TZ.localize(value)
+        return value
+
+    async def _copy_frame(self, query: str, *args, dtype: dict) -> pd.DataFrame:
+        """Run COPY (query) TO STDOUT as CSV and parse the result into a DataFrame"""
+        buffer = io.BytesIO()
+        async with self.pool.acquire() as conn:
+            await conn.copy_from_query(query, *args, output=buffer, format='csv', header=True)
+        buffer.seek(0)
+        return pd.read_csv(buffer, dtype=dtype, engine='c')
+
+    async def fetch_orders_frame(self, start_time: Optional[datetime] = None, end_time: Optional[datetime] = None) -> pd.DataFrame:
+        """One row per order with epoch-second timestamps"""
+        return await self._copy_frame(f"""
+            SELECT
+                o.id AS order_id,
+                o.status,
+                o.payment_method,
+                o.total_items,
+                EXTRACT(EPOCH FROM o.order_time) AS order_time,
+                EXTRACT(EPOCH FROM o.completed_time) AS completed_time
+            FROM orders o
+            WHERE {RANGE_FILTER}
+        """, self._localize(start_time), self._localize(end_time), dtype={
+            'order_id': 'string',
+            'status': 'category',
+            'payment_method': 'category',
+            'total_items': 'int64',
+            'order_time': 'float64',
+            'completed_time': 'float64'
+        })
+
+    async def fetch_lines_frame(
+        self,
+        start_time: Optional[datetime] = None,
+        end_time: Optional[datetime] = None,
+        completed_only: bool = False
+    ) -> pd.DataFrame:
+        """One row per order line with the order columns the reports need"""
+        status_filter = "AND o.status = 'completed'" if completed_only else ""
+        return await self._copy_frame(f"""
+            SELECT
+                o.id AS order_id,
+                o.customer_name,
+                o.payment_method,
+                EXTRACT(EPOCH FROM o.order_time) AS order_time,
+                line->>'name' AS item_name,
+                (line->>'quantity')::int AS quantity,
+                (line->>'price')::numeric AS price,
+                COALESCE(
+                    (line->>'subtotal')::numeric,
+                    (line->>'price')::numeric * (line->>'quantity')::int
+                ) AS subtotal
+            FROM orders o
+            CROSS JOIN LATERAL jsonb_array_elements(o.items) AS line
+            WHERE {RANGE_FILTER}
+            {status_filter}
+        """, self._localize(start_time), self._localize(end_time), dtype={
+            'order_id': 'string',
+            'customer_name': 'string',
+            'payment_method': 'category',
+            'order_time': 'float64',
+            'item_name': 'category',
+            'quantity': 'int64',
+            'price': 'float64',
+            'subtotal': 'float64'
+        })
+
+    def compute_payment_reports(self, orders: pd.DataFrame) -> List[PaymentReport]:
+        """Vectorized equivalent of OrderService.get_payment_reports"""
+        if orders.empty:
+            return []
+
+        completed = orders['status'] == 'completed'
+        delivery_minutes = (orders['completed_time'] - orders['order_time']) / 60
+        frame = pd.DataFrame({
+            'payment_method': orders['payment_method'].astype(str),
+            'total_items': orders['total_items'],
+            'pending': (orders['status'] == 'pending').astype('int64'),
+            'completed': completed.astype('int64'),
+            'delivery_minutes': delivery_minutes.where(completed)
+        })
+        grouped = frame.groupby('payment_method', sort=True).agg(
+            order_count=('total_items', 'size'),
+            total_items=('total_items', 'sum'),
+            pending_orders=('pending', 'sum'),
+            completed_orders=('completed', 'sum'),
+            average_delivery_time=('delivery_minutes', 'mean')
+        )
+
+        return [
+            PaymentReport(
+                paymentMethod=payment_method,
+                orderCount=int(row.order_count),
+                totalItems=int(row.total_items),
+                pendingOrders=int(row.pending_orders),
+                completedOrders=int(row.completed_orders),
+                averageDeliveryTime=None if np.isnan(row.average_delivery_time) else float(row.average_delivery_time)
+            )
+            for payment_method, row in grouped.iterrows()
+        ]
+
+    def compute_item_reports(self, lines: pd.DataFrame, recent_limit: int = 5) -> List[ItemReport]:
+        """Vectorized equivalent of OrderService.get_item_reports"""
+        if lines.empty:
+            return []
+
+        lines = lines.assign(item_name=lines['item_name'].astype(str), payment_method=lines['payment_method'].astype(str))
+        totals = lines.groupby('item_name', sort=False).agg(
+            total_ordered=('quantity', 'sum'),
+            order_count=('quantity', 'size')
+        )
+
+        # Mode of payment method; ties go to the alphabetically first method like mode() in Postgres
+        payment_counts = lines.groupby(['item_name', 'payment_method'], sort=False).size().reset_index(name='count')
+        payment_counts = payment_counts.sort_values(['item_name', 'count', 'payment_method'], ascending=[True, False, True])
+        popular = payment_counts.drop_duplicates('item_name').set_index('item_name')['payment_method']
+
+        # Last N distinct customers per item, most recent first
+        last_seen = lines.groupby(['item_name', 'customer_name'], sort=False)['order_time'].max().reset_index()
+        last_seen = last_seen.sort_values(['item_name', 'order_time'], ascending=[True, False])
+        last_seen = last_seen[last_seen.groupby('item_name', sort=False).cumcount() < recent_limit]
+        recent = last_seen.groupby('item_name', sort=False)['customer_name'].agg(list)
+
+        totals = totals.reset_index().sort_values(['total_ordered', 'item_name'], ascending=[False, True])
+        return [
+            ItemReport(
+                itemName=row.item_name,
+                totalOrdered=int(row.total_ordered),
+                orderCount=int(row.order_count),
+                averageQuantityPerOrder=row.total_ordered / row.order_count,
+                popularPaymentMethod=popular.get(row.item_name, 'cash'),
+                recentOrders=recent.get(row.item_name, [])
+            )
+            for row in totals.itertuples(index=False)
+        ]
+
+    def compute_price_analysis(self, completed_lines: pd.DataFrame, categories: dict) -> dict:
+        """Vectorized equivalent of OrderService.get_price_analysis over completed order lines"""
+        if completed_lines.empty:
+            return {
+                'items': [],
+                'total_revenue': 0,
+                'total_items_sold': 0,
+                'total_orders': 0,
+                'average_order_value': 0
+            }
+
+        lines = completed_lines.assign(item_name=completed_lines['item_name'].astype(str))
+        totals = lines.groupby('item_name', sort=False).agg(
+            total_quantity=('quantity', 'sum'),
+            total_revenue=('subtotal', 'sum'),
+            order_count=('quantity', 'size')
+        )
+        # Unit price from the most recent order of each item
+        latest = lines.sort_values('order_time').drop_duplicates('item_name', keep='last').set_index('item_name')['price']
+        totals['unit_price'] = latest
+        totals = totals.sort_values('total_revenue', ascending=False)
+
+        items = [
+            {
+                'item_name': item_name,
+                'category': categories.get(item_name, 'Other'),
+                'unit_price': float(row.unit_price),
+                'total_quantity': int(row.total_quantity),
+                'total_revenue': float(row.total_revenue),
+                'order_count': int(row.order_count)
+            }
+            for item_name, row in totals.iterrows()
+        ]
+        total_revenue = float(totals['total_revenue'].sum())
+        total_orders = int(lines['order_id'].nunique())
+
+        return {
+            'items': items,
+            'total_revenue': round(total_revenue, 2),
+            'total_items_sold': int(totals['total_quantity'].sum()),
+            'total_orders': total_orders,
+            'average_order_value': round(total_revenue / total_orders, 2) if total_orders else 0
+        }
+
+    async def get_menu_categories(self) -> dict:
+        async with self.pool.acquire() as conn:
+            rows = await conn.fetch("SELECT name, category FROM menu_items")
+            return {row['name']: row['category'] for row in rows}
+
+    async def get_payment_reports(self, start_time: Optional[datetime] = None, end_time: Optional[datetime] = None) -> List[PaymentReport]:
+        try:
+            return self.compute_payment_reports(await self.fetch_orders_frame(start_time, end_time))
+        except Exception as e:
+            logger.error(f"Error computing vectorized payment reports: {str(e)}")
+            raise e
+
+    async def get_item_reports(
+        self,
+        start_time: Optional[datetime] = None,
+        end_time: Optional[datetime] = None,
+        recent_limit: int = 5
+    ) -> List[ItemReport]:
+        try:
+            return self.compute_item_reports(await self.fetch_lines_frame(start_time, end_time), recent_limit)
+        except Exception as e:
+            logger.error(f"Error computing vectorized item reports: {str(e)}")
+            raise e
+
+    async def get_price_analysis(self, start_time: Optional[datetime] = None, end_time: Optional[datetime] = None) -> dict:
+        try:
+            lines = await self.fetch_lines_frame(start_time, end_time, completed_only=True)
+            return self.compute_price_analysis(lines, await self.get_menu_categories())
+        except Exception as e:
+            logger.error(f"Error computing vectorized price analysis: {str(e)}")
+            raise e
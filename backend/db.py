@@ -1,4 +1,5 @@
 import os
+import json
 import asyncpg
 from dotenv import load_dotenv
 import logging
@@ -17,6 +18,16 @@ if not DATABASE_URL:
 # Global connection pool
 _pool = None
 
+async def init_connection(conn):
+    """Decode json/jsonb columns (e.g. orders.items) to Python objects and encode them back"""
+    for type_name in ('json', 'jsonb'):
+        await conn.set_type_codec(
+            type_name,
+            encoder=json.dumps,
+            decoder=json.loads,
+            schema='pg_catalog'
+        )
+
 async def get_pg_pool():
     global _pool
     
@@ -33,6 +44,7 @@ async def get_pg_pool():
                 min_size=1,
                 max_size=10,
                 command_timeout=60,
+                init=init_connection,
                 server_settings={'timezone': 'UTC'}
             )
         except Exception as e:
@@ -0,0 +1,39 @@
+"""Maintenance commands for the order backend.
+
+Run from backend/, e.g.:
+
+    python manage.py backfill-rollups
+"""
+import argparse
+import asyncio
+import logging
+
+from db import get_pg_pool, close_pg_pool
+from services.rollup_service import RollupService
+
+logger = logging.getLogger(__name__)
+
+async def backfill_rollups():
+    """Rebuild the reporting rollup tables from the orders table"""
+    pool = await get_pg_pool()
+    try:
+        rollup_service = RollupService(pool)
+        item_rows = await rollup_service.rebuild_daily_stats()
+        print(f"Rebuilt daily_item_stats ({item_rows} rows) and daily_order_stats")
+        item_rows = await rollup_service.rebuild_hourly_stats()
+        print(f"Rebuilt hourly_item_stats ({item_rows} rows) and hourly_order_stats")
+    finally:
+        await close_pg_pool()
+
+COMMANDS = {
+    'backfill-rollups': backfill_rollups,
+}
+
+def main():
+    parser = argparse.ArgumentParser(description="Order backend maintenance commands")
+    parser.add_argument('command', choices=sorted(COMMANDS))
+    args = parser.parse_args()
+    asyncio.run(COMMANDS[args.command]())
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,4 @@
+-- Covering index for payment method reports over an order_time range
+CREATE INDEX IF NOT EXISTS idx_orders_order_time_payment_method
+    ON orders(order_time, payment_method)
+    INCLUDE (status, total_items, completed_time);
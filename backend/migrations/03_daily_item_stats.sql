@@ -0,0 +1,19 @@
+-- Daily rollup of completed orders per item, keyed by Eastern order date
+CREATE TABLE IF NOT EXISTS daily_item_stats (
+    stat_date DATE NOT NULL,
+    item_name TEXT NOT NULL,
+    quantity INTEGER NOT NULL DEFAULT 0,
+    revenue DECIMAL(12,2) NOT NULL DEFAULT 0.0,
+    order_count INTEGER NOT NULL DEFAULT 0,
+    unit_price DECIMAL(10,2),
+    PRIMARY KEY (stat_date, item_name)
+);
+
+-- Daily count of completed orders, keyed by Eastern order date
+CREATE TABLE IF NOT EXISTS daily_order_stats (
+    stat_date DATE PRIMARY KEY,
+    order_count INTEGER NOT NULL DEFAULT 0
+);
+
+COMMENT ON TABLE daily_item_stats IS 'Per-item totals of completed orders by Eastern date, maintained on completion';
+COMMENT ON TABLE daily_order_stats IS 'Completed order counts by Eastern date, maintained on completion';
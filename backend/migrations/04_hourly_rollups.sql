@@ -0,0 +1,24 @@
+-- Hourly rollup of placed orders per payment method
+CREATE TABLE IF NOT EXISTS hourly_order_stats (
+    bucket_start TIMESTAMPTZ NOT NULL,
+    payment_method TEXT NOT NULL,
+    order_count INTEGER NOT NULL DEFAULT 0,
+    item_count INTEGER NOT NULL DEFAULT 0,
+    revenue DECIMAL(12,2) NOT NULL DEFAULT 0.0,
+    PRIMARY KEY (bucket_start, payment_method)
+);
+
+-- Hourly rollup of placed order lines per item and payment method
+CREATE TABLE IF NOT EXISTS hourly_item_stats (
+    bucket_start TIMESTAMPTZ NOT NULL,
+    item_name TEXT NOT NULL,
+    payment_method TEXT NOT NULL,
+    category TEXT NOT NULL DEFAULT 'Other',
+    quantity INTEGER NOT NULL DEFAULT 0,
+    revenue DECIMAL(12,2) NOT NULL DEFAULT 0.0,
+    order_count INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (bucket_start, item_name, payment_method)
+);
+
+COMMENT ON TABLE hourly_order_stats IS 'Orders placed per UTC hour and payment method, maintained on create/delete';
+COMMENT ON TABLE hourly_item_stats IS 'Order lines placed per UTC hour, item and payment method, maintained on create/delete';
@@ -0,0 +1,10 @@
+-- Monotonic data versions used to invalidate cached reports
+CREATE TABLE IF NOT EXISTS data_versions (
+    name TEXT PRIMARY KEY,
+    version BIGINT NOT NULL DEFAULT 0,
+    updated_at TIMESTAMPTZ NOT NULL DEFAULT CURRENT_TIMESTAMP
+);
+
+INSERT INTO data_versions (name) VALUES ('orders') ON CONFLICT (name) DO NOTHING;
+
+COMMENT ON TABLE data_versions IS 'Version counters bumped in the same transaction as the data they describe';
@@ -0,0 +1,16 @@
+-- DDSketch bucket counts of delivery time (minutes from order to completion),
+-- keyed by Eastern order date. dimension is 'all', 'payment_method' or 'item';
+-- bucket is the log-bucket number from services/quantile_sketch.py.
+CREATE TABLE IF NOT EXISTS delivery_time_buckets (
+    stat_date DATE NOT NULL,
+    dimension TEXT NOT NULL,
+    dimension_key TEXT NOT NULL,
+    bucket INTEGER NOT NULL,
+    count INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (stat_date, dimension, dimension_key, bucket)
+);
+
+CREATE INDEX IF NOT EXISTS idx_delivery_time_buckets_dimension
+    ON delivery_time_buckets (dimension, stat_date);
+
+COMMENT ON TABLE delivery_time_buckets IS 'Mergeable delivery time sketches per day, payment method and item, maintained on completion';
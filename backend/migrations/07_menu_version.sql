@@ -0,0 +1,40 @@
+-- Menu data version: every change to menu_items bumps it and announces the new
+-- version on the menu_changed channel, so each worker's menu snapshot reloads.
+CREATE TABLE IF NOT EXISTS menu_items (
+    id TEXT PRIMARY KEY,
+    name TEXT NOT NULL,
+    chef TEXT NOT NULL,
+    sous_chef TEXT,
+    category TEXT NOT NULL,
+    price DECIMAL(10,2) NOT NULL,
+    available BOOLEAN DEFAULT true,
+    created_at TIMESTAMPTZ DEFAULT CURRENT_TIMESTAMP
+);
+
+INSERT INTO data_versions (name) VALUES ('menu') ON CONFLICT (name) DO NOTHING;
+
+-- Bumps once per transaction: an upsert fires both INSERT and UPDATE statement
+-- triggers, and a batch of changes should announce a single new version.
+CREATE OR REPLACE FUNCTION bump_menu_version() RETURNS trigger AS $$
+DECLARE
+    new_version BIGINT;
+BEGIN
+    IF current_setting('menu.bumped_in', true) = txid_current()::text THEN
+        RETURN NULL;
+    END IF;
+    PERFORM set_config('menu.bumped_in', txid_current()::text, true);
+
+    UPDATE data_versions
+    SET version = version + 1, updated_at = CURRENT_TIMESTAMP
+    WHERE name = 'menu'
+    RETURNING version INTO new_version;
+    -- Delivered on commit, only if the change commits
+    PERFORM pg_notify('menu_changed', new_version::text);
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS menu_items_version ON menu_items;
+CREATE TRIGGER menu_items_version
+    AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON menu_items
+    FOR EACH STATEMENT EXECUTE FUNCTION bump_menu_version();
@@ -0,0 +1,61 @@
+-- Optional stock per menu item; NULL means not tracked. Orders decrement it in
+-- the statement that inserts them, and the CHECK rejects an order that would
+-- take it below zero, so concurrent orders can never oversell.
+ALTER TABLE menu_items ADD COLUMN IF NOT EXISTS stock_quantity INTEGER;
+
+DO $$
+BEGIN
+    IF NOT EXISTS (
+        SELECT 1 FROM pg_constraint
+        WHERE conname = 'menu_items_stock_quantity_check' AND conrelid = 'menu_items'::regclass
+    ) THEN
+        ALTER TABLE menu_items ADD CONSTRAINT menu_items_stock_quantity_check CHECK (stock_quantity >= 0);
+    END IF;
+END $$;
+
+-- Bump the menu version and announce it, at most once per transaction
+CREATE OR REPLACE FUNCTION announce_menu_change() RETURNS void AS $$
+DECLARE
+    new_version BIGINT;
+BEGIN
+    IF current_setting('menu.bumped_in', true) = txid_current()::text THEN
+        RETURN;
+    END IF;
+    PERFORM set_config('menu.bumped_in', txid_current()::text, true);
+
+    UPDATE data_versions
+    SET version = version + 1, updated_at = CURRENT_TIMESTAMP
+    WHERE name = 'menu'
+    RETURNING version INTO new_version;
+    PERFORM pg_notify('menu_changed', new_version::text);
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION bump_menu_version() RETURNS trigger AS $$
+BEGIN
+    PERFORM announce_menu_change();
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Stock decrements alone do not change the menu workers serve
+DROP TRIGGER IF EXISTS menu_items_version ON menu_items;
+CREATE TRIGGER menu_items_version
+    AFTER INSERT OR UPDATE OF id, name, chef, sous_chef, category, price, available OR DELETE OR TRUNCATE ON menu_items
+    FOR EACH STATEMENT EXECUTE FUNCTION bump_menu_version();
+
+-- Selling the last one takes the item off the menu
+CREATE OR REPLACE FUNCTION sell_out_menu_item() RETURNS trigger AS $$
+BEGIN
+    IF NEW.stock_quantity = 0 AND NEW.available THEN
+        NEW.available := false;
+        PERFORM announce_menu_change();
+    END IF;
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS menu_items_sell_out ON menu_items;
+CREATE TRIGGER menu_items_sell_out
+    BEFORE INSERT OR UPDATE OF stock_quantity ON menu_items
+    FOR EACH ROW EXECUTE FUNCTION sell_out_menu_item();
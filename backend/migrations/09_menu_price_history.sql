@@ -0,0 +1,47 @@
+-- List price of each menu item over time: one row per price, in effect from
+-- valid_from until valid_to (NULL while current). Triggers on menu_items keep
+-- it, so every price change is recorded however it is made.
+CREATE TABLE IF NOT EXISTS menu_price_history (
+    menu_item_id TEXT NOT NULL,
+    price DECIMAL(10,2) NOT NULL,
+    valid_from TIMESTAMPTZ NOT NULL,
+    valid_to TIMESTAMPTZ,
+    PRIMARY KEY (menu_item_id, valid_from),
+    CHECK (valid_to IS NULL OR valid_to > valid_from)
+);
+
+-- At most one current price per item
+CREATE UNIQUE INDEX IF NOT EXISTS idx_menu_price_history_current
+    ON menu_price_history (menu_item_id) WHERE valid_to IS NULL;
+
+-- Prices set before history was kept are taken to have always applied
+INSERT INTO menu_price_history (menu_item_id, price, valid_from)
+SELECT m.id, m.price, '-infinity'
+FROM menu_items m
+WHERE NOT EXISTS (SELECT 1 FROM menu_price_history h WHERE h.menu_item_id = m.id);
+
+CREATE OR REPLACE FUNCTION record_menu_price() RETURNS trigger AS $$
+BEGIN
+    UPDATE menu_price_history
+    SET valid_to = CURRENT_TIMESTAMP
+    WHERE menu_item_id = NEW.id AND valid_to IS NULL AND valid_from < CURRENT_TIMESTAMP;
+    -- Changes within one transaction share its timestamp; the last one wins
+    INSERT INTO menu_price_history (menu_item_id, price, valid_from)
+    VALUES (NEW.id, NEW.price, CURRENT_TIMESTAMP)
+    ON CONFLICT (menu_item_id, valid_from) DO UPDATE SET
+        price = EXCLUDED.price,
+        valid_to = NULL;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS menu_items_price_created ON menu_items;
+CREATE TRIGGER menu_items_price_created
+    AFTER INSERT ON menu_items
+    FOR EACH ROW EXECUTE FUNCTION record_menu_price();
+
+DROP TRIGGER IF EXISTS menu_items_price_changed ON menu_items;
+CREATE TRIGGER menu_items_price_changed
+    AFTER UPDATE OF price ON menu_items
+    FOR EACH ROW WHEN (OLD.price IS DISTINCT FROM NEW.price)
+    EXECUTE FUNCTION record_menu_price();
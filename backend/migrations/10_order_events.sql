@@ -0,0 +1,21 @@
+-- Announce every change to an order on the hub_events channel as
+-- 'order:<order number>', so customers tracking that order get it pushed by
+-- whichever worker holds their connection.
+CREATE OR REPLACE FUNCTION announce_order_change() RETURNS trigger AS $$
+BEGIN
+    -- Delivered on commit; duplicates within a transaction are folded into one
+    PERFORM pg_notify('hub_events', 'order:' || COALESCE(NEW.order_number, OLD.order_number));
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS orders_announce_insert ON orders;
+CREATE TRIGGER orders_announce_insert
+    AFTER INSERT OR DELETE ON orders
+    FOR EACH ROW EXECUTE FUNCTION announce_order_change();
+
+DROP TRIGGER IF EXISTS orders_announce_update ON orders;
+CREATE TRIGGER orders_announce_update
+    AFTER UPDATE ON orders
+    FOR EACH ROW WHEN (OLD.* IS DISTINCT FROM NEW.*)
+    EXECUTE FUNCTION announce_order_change();
@@ -0,0 +1,14 @@
+-- The orders data version is a sequence advanced right after each order
+-- write commits, instead of a data_versions row that every write would hold
+-- locked until commit. nextval never blocks, so writers do not wait on each
+-- other, and a reader that sees a version also sees every write before it.
+CREATE SEQUENCE IF NOT EXISTS orders_version_seq;
+
+-- Never go back to a version already served
+SELECT setval('orders_version_seq', GREATEST(
+    (SELECT version FROM data_versions WHERE name = 'orders'),
+    (SELECT last_value FROM orders_version_seq),
+    1
+));
+
+COMMENT ON TABLE data_versions IS 'Version counters bumped with the data they describe; orders use orders_version_seq';
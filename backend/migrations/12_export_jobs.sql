@@ -0,0 +1,26 @@
+-- Background export jobs. The worker that accepted a job runs it and keeps
+-- this row current, so any worker can report its status, serve its file from
+-- the shared EXPORT_JOB_DIR, or ask for it to be cancelled.
+CREATE TABLE IF NOT EXISTS export_jobs (
+    id TEXT PRIMARY KEY,
+    owner TEXT NOT NULL,
+    report TEXT NOT NULL,
+    format TEXT NOT NULL,
+    status TEXT NOT NULL DEFAULT 'queued',
+    progress DOUBLE PRECISION NOT NULL DEFAULT 0,
+    rows_written INTEGER NOT NULL DEFAULT 0,
+    total_rows INTEGER,
+    size_bytes BIGINT,
+    error TEXT,
+    filename TEXT,
+    path TEXT,
+    cancel_requested BOOLEAN NOT NULL DEFAULT FALSE,
+    created_at TIMESTAMPTZ NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    started_at TIMESTAMPTZ,
+    finished_at TIMESTAMPTZ,
+    expires_at TIMESTAMPTZ
+);
+
+CREATE INDEX IF NOT EXISTS idx_export_jobs_expires_at ON export_jobs (expires_at);
+
+COMMENT ON TABLE export_jobs IS 'Export job state shared by all API workers; rows and files are removed after expires_at';
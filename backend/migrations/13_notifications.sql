@@ -0,0 +1,21 @@
+-- Ready-for-pickup notifications shown on the display, created when an order
+-- is completed. Same columns as schema.sql, for databases set up from the
+-- migrations alone.
+CREATE TABLE IF NOT EXISTS notifications (
+    id TEXT PRIMARY KEY,
+    customer_name TEXT NOT NULL,
+    message TEXT NOT NULL,
+    order_id TEXT,
+    created_at TIMESTAMPTZ NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    is_read BOOLEAN DEFAULT false,
+    is_active BOOLEAN DEFAULT true
+);
+
+-- A notification stays on the display until it is cleared, even if its order is deleted first
+ALTER TABLE notifications DROP CONSTRAINT IF EXISTS notifications_order_id_fkey;
+
+CREATE INDEX IF NOT EXISTS idx_notifications_order_id ON notifications(order_id);
+CREATE INDEX IF NOT EXISTS idx_notifications_created_at ON notifications(created_at);
+CREATE INDEX IF NOT EXISTS idx_notifications_is_active ON notifications(is_active);
+
+COMMENT ON TABLE notifications IS 'Stores notifications for orders with read status';
@@ -0,0 +1,6 @@
+-- Last time the worker holding a queued or running export job showed it was
+-- alive. Jobs whose worker stopped without finishing them go stale and are
+-- marked failed by the sweep of any other worker.
+ALTER TABLE export_jobs ADD COLUMN IF NOT EXISTS heartbeat_at TIMESTAMPTZ NOT NULL DEFAULT CURRENT_TIMESTAMP;
+
+CREATE INDEX IF NOT EXISTS idx_export_jobs_unfinished ON export_jobs (heartbeat_at) WHERE status IN ('queued', 'running');
@@ -0,0 +1,52 @@
+-- Bump the menu version only for statements that actually change served menu
+-- rows. A plain statement trigger also fires for an upsert whose rows were all
+-- skipped as unchanged, or an UPDATE that matched nothing, so each event gets
+-- its own trigger with a transition table to look at. Transition tables cannot
+-- be combined with several events or an UPDATE OF column list, hence the four
+-- triggers and the column comparison below.
+CREATE OR REPLACE FUNCTION bump_menu_version_on_change() RETURNS trigger AS $$
+BEGIN
+    IF TG_OP = 'UPDATE' THEN
+        -- Stock decrements alone do not change the menu workers serve
+        IF EXISTS (
+            SELECT id, name, chef, sous_chef, category, price, available FROM new_rows
+            EXCEPT
+            SELECT id, name, chef, sous_chef, category, price, available FROM old_rows
+        ) THEN
+            PERFORM announce_menu_change();
+        END IF;
+    ELSIF TG_OP = 'INSERT' THEN
+        IF EXISTS (SELECT 1 FROM new_rows) THEN
+            PERFORM announce_menu_change();
+        END IF;
+    ELSIF EXISTS (SELECT 1 FROM old_rows) THEN
+        PERFORM announce_menu_change();
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS menu_items_version ON menu_items;
+
+DROP TRIGGER IF EXISTS menu_items_version_insert ON menu_items;
+CREATE TRIGGER menu_items_version_insert
+    AFTER INSERT ON menu_items
+    REFERENCING NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION bump_menu_version_on_change();
+
+DROP TRIGGER IF EXISTS menu_items_version_update ON menu_items;
+CREATE TRIGGER menu_items_version_update
+    AFTER UPDATE ON menu_items
+    REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION bump_menu_version_on_change();
+
+DROP TRIGGER IF EXISTS menu_items_version_delete ON menu_items;
+CREATE TRIGGER menu_items_version_delete
+    AFTER DELETE ON menu_items
+    REFERENCING OLD TABLE AS old_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION bump_menu_version_on_change();
+
+DROP TRIGGER IF EXISTS menu_items_version_truncate ON menu_items;
+CREATE TRIGGER menu_items_version_truncate
+    AFTER TRUNCATE ON menu_items
+    FOR EACH STATEMENT EXECUTE FUNCTION bump_menu_version();
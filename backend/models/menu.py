@@ -1,16 +1,57 @@
-from pydantic import BaseModel, Field
+from pydantic import AliasChoices, BaseModel, Field, field_validator
 from typing import List, Optional
+from datetime import datetime
 from decimal import Decimal
 
 class MenuItem(BaseModel):
     id: str = Field(..., min_length=1)
     name: str = Field(..., min_length=1, max_length=100)
     chef: str = Field(..., min_length=1, max_length=50)
-    sousChef: Optional[str] = Field(None, max_length=50)
+    # menu_items rows use the sous_chef column name
+    sousChef: Optional[str] = Field(None, max_length=50, validation_alias=AliasChoices('sousChef', 'sous_chef'))
     category: str = Field(..., min_length=1, max_length=50)
     price: float = Field(..., gt=0, description="Price in USD")
     available: bool = Field(default=True)
 
 class MenuResponse(BaseModel):
     items: List[MenuItem]
-    categories: List[str]
\ No newline at end of file
+    categories: List[str]
+
+
+class MenuItemUpsert(BaseModel):
+    """A new menu item, or changes to an existing one; omitted fields keep their current value"""
+    id: str = Field(..., min_length=1)
+    name: Optional[str] = Field(None, min_length=1, max_length=100)
+    chef: Optional[str] = Field(None, min_length=1, max_length=50)
+    sousChef: Optional[str] = Field(None, max_length=50)  # set to null to remove
+    category: Optional[str] = Field(None, min_length=1, max_length=50)
+    price: Optional[Decimal] = Field(None, gt=0, max_digits=10, decimal_places=2, description="Price in USD")
+    available: Optional[bool] = None
+    # Set to null to stop tracking stock; restocking above zero makes the item available unless available is given
+    stockQuantity: Optional[int] = Field(None, ge=0)
+
+class MenuBulkUpsert(BaseModel):
+    items: List[MenuItemUpsert] = Field(..., min_length=1, max_length=1000)
+
+    @field_validator('items')
+    @classmethod
+    def unique_ids(cls, v):
+        if len({item.id for item in v}) != len(v):
+            raise ValueError('Each menu item id may appear only once per batch')
+        return v
+
+class MenuItemChange(BaseModel):
+    id: str
+    before: dict  # changed fields only
+    after: dict
+
+class MenuUpsertResult(BaseModel):
+    version: int  # menu version after the batch
+    created: List[MenuItem]
+    updated: List[MenuItemChange]
+    unchanged: List[str]  # ids
+
+class MenuPrice(BaseModel):
+    price: float
+    validFrom: Optional[datetime] = None  # None for a price set before history was kept
+    validTo: Optional[datetime] = None  # None while the price is current
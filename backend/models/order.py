@@ -1,6 +1,6 @@
 from pydantic import BaseModel, Field, validator
 from typing import List, Optional
-from datetime import datetime, timedelta
+from datetime import date, datetime, timedelta
 from bson import ObjectId
 import uuid
 import pytz
@@ -91,7 +91,10 @@ class Order(BaseModel):
 
     @validator('estimatedDeliveryTime', always=True)
     def calculate_estimated_delivery(cls, v, values):
-        if 'orderTime' in values and 'deliveryMinutes' in values:
+        # Keep an ETA from the kitchen queue; only fall back to the fixed delivery window
+        if v is not None:
+            return v
+        if 'orderTime' in values:
             order_time = values['orderTime']
             if isinstance(order_time, str):
                 order_time = datetime.fromisoformat(order_time.replace('Z', '+00:00'))
@@ -100,7 +103,7 @@ class Order(BaseModel):
             if order_time.tzinfo is None:
                 order_time = EASTERN_TZ.localize(order_time)
             
-            delivery_minutes = values.get('deliveryMinutes', 30)
+            delivery_minutes = values.get('deliveryMinutes') or 30
             return order_time + timedelta(minutes=delivery_minutes)
         return v
 
@@ -109,6 +112,9 @@ class OrderStats(BaseModel):
     completed: int = 0
     total: int = 0
     averageDeliveryTime: Optional[float] = None  # in minutes
+    p50DeliveryTime: Optional[float] = None
+    p90DeliveryTime: Optional[float] = None
+    p99DeliveryTime: Optional[float] = None
 
 class PaymentReport(BaseModel):
     paymentMethod: str
@@ -117,6 +123,10 @@ class PaymentReport(BaseModel):
     pendingOrders: int
     completedOrders: int
     averageDeliveryTime: Optional[float] = None
+    # Per whole Eastern day; null when the report range cuts through a day
+    p50DeliveryTime: Optional[float] = None
+    p90DeliveryTime: Optional[float] = None
+    p99DeliveryTime: Optional[float] = None
 
 class ItemReport(BaseModel):
     itemName: str
@@ -124,4 +134,51 @@ class ItemReport(BaseModel):
     orderCount: int
     averageQuantityPerOrder: float
     popularPaymentMethod: str
-    recentOrders: List[str]  # Customer names
\ No newline at end of file
+    recentOrders: List[str]  # Customer names
+
+class DeliveryTimeReport(BaseModel):
+    dimension: str  # all, payment_method or item
+    key: str  # payment method or item name; empty for all
+    completedOrders: int
+    p50DeliveryTime: Optional[float] = None  # in minutes
+    p90DeliveryTime: Optional[float] = None
+    p99DeliveryTime: Optional[float] = None
+    sketch: Optional[dict] = None  # serialized DDSketch, mergeable with other days or workers
+
+class TimeSeriesPoint(BaseModel):
+    bucket: datetime
+    group: Optional[str] = None  # payment method, category or item name; None when ungrouped
+    orders: int = 0
+    items: int = 0
+    revenue: float = 0.0
+
+class TimeSeriesReport(BaseModel):
+    bucket: str  # hour or day
+    groupBy: Optional[str] = None
+    start: datetime
+    end: datetime
+    points: List[TimeSeriesPoint]
+
+class ExportJobCreate(BaseModel):
+    report: str = Field(..., pattern='^(payment|items|price_analysis|orders)$')
+    format: str = Field(default='xlsx', pattern='^(xlsx|csv|parquet|arrow)$')
+    startTime: Optional[datetime] = None  # payment, items and orders; Eastern if no offset
+    endTime: Optional[datetime] = None
+    startDate: Optional[date] = None  # price_analysis
+    endDate: Optional[date] = None
+    recentCustomers: int = Field(default=5, ge=1, le=50)  # items
+
+class ExportJob(BaseModel):
+    id: str
+    report: str
+    format: str
+    status: str  # queued, running, completed, failed or cancelled
+    progress: float = 0.0  # 0 to 1
+    rowsWritten: int = 0
+    totalRows: Optional[int] = None
+    sizeBytes: Optional[int] = None
+    error: Optional[str] = None
+    createdAt: datetime
+    startedAt: Optional[datetime] = None
+    finishedAt: Optional[datetime] = None
+    expiresAt: Optional[datetime] = None  # the file is deleted after this
@@ -2,6 +2,7 @@ from fastapi import APIRouter, HTTPException, Depends, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from models.auth import LoginRequest, LoginResponse, TokenData
 from services.auth_service import AuthService
+from db import get_pg_pool
 from datetime import timedelta
 import logging
 
@@ -10,8 +11,8 @@ logger = logging.getLogger(__name__)
 router = APIRouter(prefix="/auth", tags=["authentication"])
 security = HTTPBearer()
 
-def get_auth_service() -> AuthService:
-    return AuthService()
+async def get_auth_service() -> AuthService:
+    return AuthService(await get_pg_pool())
 
 @router.post("/login", response_model=LoginResponse)
 async def login(
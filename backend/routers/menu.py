@@ -1,7 +1,11 @@
-from fastapi import APIRouter, HTTPException, Depends
-from typing import List
-from models.menu import MenuItem, MenuResponse
-from services.menu_service import MenuService
+from fastapi import APIRouter, HTTPException, Depends, Header, Query
+from fastapi.responses import Response
+from typing import Iterable, List, Optional
+from datetime import datetime, timedelta
+from models.menu import MenuItem, MenuPrice, MenuResponse, MenuBulkUpsert, MenuUpsertResult
+from services.menu_service import MenuService, MENU_MAX_AGE_SECONDS
+from services.price_history import SINCE_ALWAYS
+from routers.auth import get_current_user
 import logging
 
 logger = logging.getLogger(__name__)
@@ -11,18 +15,62 @@ router = APIRouter(prefix="/menu", tags=["menu"])
 def get_menu_service() -> MenuService:
     return MenuService()
 
+def choose_coding(accept_encoding: Optional[str], available: Iterable[str]) -> str:
+    """Content coding to send: the client's highest weighted one, preferring br, then gzip, on ties"""
+    if not accept_encoding:
+        return 'identity'
+    weights = {}
+    for part in accept_encoding.split(','):
+        coding, _, params = part.partition(';')
+        weight = 1.0
+        for param in params.split(';'):
+            name, _, value = param.partition('=')
+            if name.strip() == 'q':
+                try:
+                    weight = float(value)
+                except ValueError:
+                    weight = 0.0
+        weights[coding.strip().lower()] = weight
+
+    def weight_of(coding: str) -> float:
+        return weights.get(coding, weights.get('*', 1.0 if coding == 'identity' else 0.0))
+
+    preference = [coding for coding in ('br', 'gzip', 'identity') if coding in available]
+    best = max(preference, key=lambda coding: (weight_of(coding), -preference.index(coding)))
+    return best if weight_of(best) > 0 else 'identity'
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Weak comparison of an If-None-Match header against an ETag"""
+    if not if_none_match:
+        return False
+    tags = [tag.strip() for tag in if_none_match.split(',')]
+    return '*' in tags or etag in [tag[2:] if tag.startswith('W/') else tag for tag in tags]
+
 @router.get("/", response_model=MenuResponse)
 async def get_menu(
+    accept_encoding: Optional[str] = Header(None),
+    if_none_match: Optional[str] = Header(None),
     menu_service: MenuService = Depends(get_menu_service)
 ):
-    """Get the complete menu"""
+    """Get the complete menu, pre-serialized and pre-compressed per menu version"""
     try:
-        menu = await menu_service.get_menu()
-        return menu
+        snapshot = await menu_service.get_snapshot()
     except Exception as e:
         logger.error(f"Error in get_menu endpoint: {str(e)}")
         raise HTTPException(status_code=500, detail="Failed to fetch menu")
 
+    coding = choose_coding(accept_encoding, snapshot.bodies)
+    headers = {
+        "ETag": snapshot.etag_for(coding),
+        "Cache-Control": f"public, max-age={MENU_MAX_AGE_SECONDS}",
+        "Vary": "Accept-Encoding"
+    }
+    if etag_matches(if_none_match, headers["ETag"]):
+        return Response(status_code=304, headers=headers)
+    if coding != 'identity':
+        headers["Content-Encoding"] = coding
+    return Response(content=snapshot.bodies[coding], media_type="application/json", headers=headers)
+
 @router.get("/item/{item_id}", response_model=MenuItem)
 async def get_menu_item(
     item_id: str,
@@ -40,6 +88,31 @@ async def get_menu_item(
         logger.error(f"Error in get_menu_item endpoint: {str(e)}")
         raise HTTPException(status_code=500, detail="Failed to fetch menu item")
 
+@router.get("/item/{item_id}/prices", response_model=List[MenuPrice])
+async def get_price_history(
+    item_id: str,
+    at: Optional[datetime] = Query(None, description="Only the price in effect at this time"),
+    menu_service: MenuService = Depends(get_menu_service)
+):
+    """List prices of a menu item over time, oldest first"""
+    try:
+        # The interval containing at is the one in effect during [at, at + 1µs)
+        end = at + timedelta(microseconds=1) if at else None
+        intervals = await menu_service.get_price_history(item_id, at, end)
+    except Exception as e:
+        logger.error(f"Error in get_price_history endpoint: {str(e)}")
+        raise HTTPException(status_code=500, detail="Failed to fetch price history")
+    if not intervals and at is None:
+        raise HTTPException(status_code=404, detail="Menu item not found")
+    return [
+        MenuPrice(
+            price=interval.price,
+            validFrom=None if interval.valid_from == SINCE_ALWAYS else interval.valid_from,
+            validTo=interval.valid_to
+        )
+        for interval in intervals
+    ]
+
 @router.get("/category/{category}", response_model=List[MenuItem])
 async def get_items_by_category(
     category: str,
@@ -56,12 +129,28 @@ async def get_items_by_category(
 @router.get("/search/{query}", response_model=List[MenuItem])
 async def search_menu_items(
     query: str,
+    limit: int = Query(20, ge=1, le=100, description="Maximum number of items returned, best match first"),
     menu_service: MenuService = Depends(get_menu_service)
 ):
-    """Search menu items"""
+    """Search menu items by name, category or chef; tolerates typos and partly typed words"""
     try:
-        items = await menu_service.search_menu_items(query)
+        items = await menu_service.search_menu_items(query, limit)
         return items
     except Exception as e:
         logger.error(f"Error in search_menu_items endpoint: {str(e)}")
-        raise HTTPException(status_code=500, detail="Failed to search menu items")
\ No newline at end of file
+        raise HTTPException(status_code=500, detail="Failed to search menu items")
+
+@router.put("/items", response_model=MenuUpsertResult)
+async def upsert_menu_items(
+    batch: MenuBulkUpsert,
+    menu_service: MenuService = Depends(get_menu_service),
+    current_user: str = Depends(get_current_user)
+):
+    """Create menu items or change prices, availability and other fields in bulk (requires authentication)"""
+    try:
+        return await menu_service.upsert_menu_items(batch.items)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        logger.error(f"Error in upsert_menu_items endpoint: {str(e)}")
+        raise HTTPException(status_code=500, detail="Failed to update menu items")
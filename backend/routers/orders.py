@@ -1,30 +1,18 @@
-from fastapi import APIRouter, HTTPException, Depends
-from typing import List
+from fastapi import APIRouter, HTTPException, Depends, Query
+from typing import List, Optional
+from datetime import date
+from db import get_pg_pool
 from models.order import Order, OrderCreate, OrderStats, OrderItemCookingUpdate
-from services.order_service import OrderService
+from services.order_service import OrderService, SoldOutError
 from routers.auth import get_current_user
-from motor.motor_asyncio import AsyncIOMotorDatabase
-import os
-from motor.motor_asyncio import AsyncIOMotorClient
 import logging
-from dotenv import load_dotenv
-from pathlib import Path
-
-# Load environment variables
-ROOT_DIR = Path(__file__).parent.parent
-load_dotenv(ROOT_DIR / '.env')
 
 logger = logging.getLogger(__name__)
 
-# MongoDB connection
-mongo_url = os.environ['MONGO_URL']
-client = AsyncIOMotorClient(mongo_url)
-db = client[os.environ['DB_NAME']]
-
 router = APIRouter(prefix="/orders", tags=["orders"])
 
-def get_order_service() -> OrderService:
-    return OrderService(db)
+async def get_order_service() -> OrderService:
+    return OrderService(await get_pg_pool())
 
 @router.post("/", response_model=Order, status_code=201)
 async def create_order(
@@ -36,6 +24,10 @@ async def create_order(
     try:
         order = await order_service.create_order(order_data)
         return order
+    except SoldOutError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         logger.error(f"Error in create_order endpoint: {str(e)}")
         raise HTTPException(status_code=500, detail="Failed to create order")
@@ -139,12 +131,14 @@ async def update_cooking_status(
 
 @router.get("/price-analysis", response_model=dict)
 async def get_price_analysis(
+    start_date: Optional[date] = Query(None, description="First Eastern order date to include"),
+    end_date: Optional[date] = Query(None, description="Last Eastern order date to include"),
     order_service: OrderService = Depends(get_order_service),
     current_user: str = Depends(get_current_user)
 ):
     """Get price analysis for all items (requires authentication)"""
     try:
-        analysis = await order_service.get_price_analysis()
+        analysis = await order_service.get_cached_report("price_analysis", start_date=start_date, end_date=end_date)
         return analysis
     except Exception as e:
         logger.error(f"Error in get_price_analysis endpoint: {str(e)}")
@@ -1,44 +1,54 @@
-from fastapi import APIRouter, HTTPException, Depends
-from fastapi.responses import StreamingResponse
-from typing import List
-from models.order import PaymentReport, ItemReport
+from fastapi import APIRouter, HTTPException, Depends, Header, Query
+from fastapi.responses import FileResponse, Response, StreamingResponse
+from typing import List, Optional
+from datetime import date, datetime, timedelta
+from db import get_pg_pool
+from models.order import PaymentReport, ItemReport, DeliveryTimeReport, TimeSeriesReport, ExportJob, ExportJobCreate
 from services.order_service import OrderService
 from services.excel_service import ExcelService
+from services.export_executor import ExportExecutor, ExportQueueFull
+from services.artifact_cache import ArtifactCache
+from services.export_jobs import ExportJobManager
+from services.export_formats import (
+    EXPORT_FORMATS, EXPORT_FORMAT_PATTERN, ExportFormatUnavailable, check_format, render_report, stream_order_rows,
+    stream_line_item_rows
+)
 from routers.auth import get_current_user
-from motor.motor_asyncio import AsyncIOMotorDatabase
-import os
-from motor.motor_asyncio import AsyncIOMotorClient
 import logging
-from dotenv import load_dotenv
-from pathlib import Path
-
-# Load environment variables
-ROOT_DIR = Path(__file__).parent.parent
-load_dotenv(ROOT_DIR / '.env')
 
 logger = logging.getLogger(__name__)
 
-# MongoDB connection
-mongo_url = os.environ['MONGO_URL']
-client = AsyncIOMotorClient(mongo_url)
-db = client[os.environ['DB_NAME']]
-
 router = APIRouter(prefix="/reports", tags=["reports"])
 
-def get_order_service() -> OrderService:
-    return OrderService(db)
+async def get_order_service() -> OrderService:
+    return OrderService(await get_pg_pool())
 
 def get_excel_service() -> ExcelService:
     return ExcelService()
 
+def get_export_executor() -> ExportExecutor:
+    return ExportExecutor()
+
+def get_artifact_cache() -> ArtifactCache:
+    return ArtifactCache()
+
+def get_export_jobs() -> ExportJobManager:
+    return ExportJobManager()
+
 @router.get("/payment", response_model=List[PaymentReport])
 async def get_payment_reports(
+    start_time: Optional[datetime] = Query(None, description="Only include orders placed at or after this time (Eastern if no offset)"),
+    end_time: Optional[datetime] = Query(None, description="Only include orders placed before this time (Eastern if no offset)"),
     order_service: OrderService = Depends(get_order_service),
     current_user: str = Depends(get_current_user)
 ):
-    """Get payment method reports (requires authentication)"""
+    """Get payment method reports (requires authentication).
+
+    Delivery-time percentiles come from per-day sketches, so they are null
+    unless the range starts and ends at an Eastern midnight.
+    """
     try:
-        reports = await order_service.get_payment_reports()
+        reports = await order_service.get_cached_report("payment", start_time=start_time, end_time=end_time)
         return reports
     except Exception as e:
         logger.error(f"Error in get_payment_reports endpoint: {str(e)}")
@@ -46,88 +56,347 @@ async def get_payment_reports(
 
 @router.get("/items", response_model=List[ItemReport])
 async def get_item_reports(
+    start_time: Optional[datetime] = Query(None, description="Only include orders placed at or after this time (Eastern if no offset)"),
+    end_time: Optional[datetime] = Query(None, description="Only include orders placed before this time (Eastern if no offset)"),
+    recent_customers: int = Query(5, ge=1, le=50, description="Number of most recent distinct customers listed per item"),
     order_service: OrderService = Depends(get_order_service),
     current_user: str = Depends(get_current_user)
 ):
     """Get item-based reports (requires authentication)"""
     try:
-        reports = await order_service.get_item_reports()
+        reports = await order_service.get_cached_report(
+            "items", start_time=start_time, end_time=end_time, recent_limit=recent_customers
+        )
         return reports
     except Exception as e:
         logger.error(f"Error in get_item_reports endpoint: {str(e)}")
         raise HTTPException(status_code=500, detail="Failed to fetch item reports")
 
+@router.get("/delivery-times", response_model=List[DeliveryTimeReport])
+async def get_delivery_time_reports(
+    group_by: str = Query("all", pattern="^(all|payment_method|item)$", description="Report percentiles overall, per payment method or per item"),
+    start_date: Optional[date] = Query(None, description="First Eastern order date to include"),
+    end_date: Optional[date] = Query(None, description="Last Eastern order date to include"),
+    include_sketch: bool = Query(False, description="Include the serialized sketch so clients can merge ranges themselves"),
+    order_service: OrderService = Depends(get_order_service),
+    current_user: str = Depends(get_current_user)
+):
+    """Get p50/p90/p99 delivery times of completed orders (requires authentication)"""
+    try:
+        return await order_service.get_cached_report(
+            "delivery_times",
+            dimension=group_by,
+            start_date=start_date,
+            end_date=end_date,
+            include_sketch=include_sketch
+        )
+    except Exception as e:
+        logger.error(f"Error in get_delivery_time_reports endpoint: {str(e)}")
+        raise HTTPException(status_code=500, detail="Failed to fetch delivery time reports")
+
+@router.get("/timeseries", response_model=TimeSeriesReport)
+async def get_timeseries(
+    start_time: Optional[datetime] = Query(None, alias="from", description="Start of the range (Eastern if no offset); defaults to 24 hours before 'to'"),
+    end_time: Optional[datetime] = Query(None, alias="to", description="End of the range, exclusive (Eastern if no offset); defaults to now"),
+    bucket: str = Query("hour", pattern="^(hour|day)$", description="Bucket size"),
+    group_by: Optional[str] = Query(None, pattern="^(payment_method|category|item)$", description="Split each bucket by this dimension"),
+    order_service: OrderService = Depends(get_order_service),
+    current_user: str = Depends(get_current_user)
+):
+    """Get orders, items and revenue per hour or day from the hourly rollups (requires authentication)"""
+    try:
+        end_time = end_time or order_service.get_eastern_time()
+        start_time = start_time or end_time - timedelta(days=1)
+        return await order_service.get_timeseries(start_time, end_time, bucket, group_by)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        logger.error(f"Error in get_timeseries endpoint: {str(e)}")
+        raise HTTPException(status_code=500, detail="Failed to fetch time series")
+
+@router.get("/cache/metrics")
+async def get_report_cache_metrics(
+    order_service: OrderService = Depends(get_order_service),
+    current_user: str = Depends(get_current_user)
+):
+    """Get report cache hit/miss counters and compute times (requires authentication)"""
+    return order_service.report_cache.metrics()
+
+@router.get("/exports/metrics")
+async def get_export_metrics(
+    export_executor: ExportExecutor = Depends(get_export_executor),
+    artifact_cache: ArtifactCache = Depends(get_artifact_cache),
+    current_user: str = Depends(get_current_user)
+):
+    """Get export worker queue depth, render times and stored file counters (requires authentication)"""
+    return {**export_executor.metrics(), 'artifact_cache': artifact_cache.metrics()}
+
+async def export_report(
+    report_type: str,
+    params: dict,
+    export_format: str,
+    name: str,
+    excel_method: str,
+    if_none_match: Optional[str],
+    order_service: OrderService,
+    excel_service: ExcelService,
+    export_executor: ExportExecutor,
+    artifact_cache: ArtifactCache
+) -> Response:
+    """Serve an aggregate report file, rendering it in the export pool only if it is not stored yet"""
+    check_format(export_format)
+    version = await order_service.get_report_version(report_type)
+    artifact = await artifact_cache.get(artifact_cache.key(report_type, params, export_format, version))
+    if artifact is None:
+        # The cached report may still be from an older version while it refreshes; store the file under that one
+        payload, report_version = await order_service.get_cached_report_with_version(report_type, **params)
+        key = artifact_cache.key(report_type, params, export_format, report_version or version)
+        artifact = await artifact_cache.get_or_render(key, lambda: (
+            export_executor.render(excel_method, payload) if export_format == "xlsx"
+            else export_executor.run(render_report, report_type, payload, export_format)
+        ))
+
+    headers = {"ETag": artifact.etag, "Cache-Control": "private, no-cache"}
+    if if_none_match and artifact.etag in [tag.strip() for tag in if_none_match.split(",")]:
+        return Response(status_code=304, headers=headers)
+
+    media_type, extension = EXPORT_FORMATS[export_format]
+    headers["Content-Disposition"] = f"attachment; filename={excel_service.get_filename(name, extension)}"
+    return Response(content=artifact.content, media_type=media_type, headers=headers)
+
 @router.get("/payment/export")
 async def export_payment_reports(
+    start_time: Optional[datetime] = Query(None, description="Only include orders placed at or after this time (Eastern if no offset)"),
+    end_time: Optional[datetime] = Query(None, description="Only include orders placed before this time (Eastern if no offset)"),
+    export_format: str = Query("xlsx", alias="format", pattern=EXPORT_FORMAT_PATTERN, description="File format: xlsx, csv, parquet or arrow"),
     order_service: OrderService = Depends(get_order_service),
     excel_service: ExcelService = Depends(get_excel_service),
+    export_executor: ExportExecutor = Depends(get_export_executor),
+    artifact_cache: ArtifactCache = Depends(get_artifact_cache),
+    if_none_match: Optional[str] = Header(None),
     current_user: str = Depends(get_current_user)
 ):
-    """Export payment method reports as Excel file (requires authentication)"""
+    """Export payment method reports as an Excel, CSV, Parquet or Arrow file (requires authentication)"""
     try:
-        # Get payment reports data
-        reports = await order_service.get_payment_reports()
-        
-        # Generate Excel file
-        excel_file = excel_service.create_payment_report_excel(reports)
-        filename = excel_service.get_filename("payment_methods")
-        
-        # Return as streaming response
-        return StreamingResponse(
-            excel_file,
-            media_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
-            headers={"Content-Disposition": f"attachment; filename={filename}"}
+        return await export_report(
+            "payment", {"start_time": start_time, "end_time": end_time}, export_format,
+            "payment_methods", "create_payment_report_excel", if_none_match,
+            order_service, excel_service, export_executor, artifact_cache
         )
+    except ExportFormatUnavailable as e:
+        raise HTTPException(status_code=501, detail=str(e))
+    except ExportQueueFull as e:
+        logger.error(f"Export queue full in export_payment_reports endpoint: {str(e)}")
+        raise HTTPException(status_code=503, detail="Too many exports in progress, try again shortly")
     except Exception as e:
         logger.error(f"Error in export_payment_reports endpoint: {str(e)}")
         raise HTTPException(status_code=500, detail="Failed to export payment reports")
 
 @router.get("/items/export")
 async def export_item_reports(
+    start_time: Optional[datetime] = Query(None, description="Only include orders placed at or after this time (Eastern if no offset)"),
+    end_time: Optional[datetime] = Query(None, description="Only include orders placed before this time (Eastern if no offset)"),
+    recent_customers: int = Query(5, ge=1, le=50, description="Number of most recent distinct customers listed per item"),
+    export_format: str = Query("xlsx", alias="format", pattern=EXPORT_FORMAT_PATTERN, description="File format: xlsx, csv, parquet or arrow"),
     order_service: OrderService = Depends(get_order_service),
     excel_service: ExcelService = Depends(get_excel_service),
+    export_executor: ExportExecutor = Depends(get_export_executor),
+    artifact_cache: ArtifactCache = Depends(get_artifact_cache),
+    if_none_match: Optional[str] = Header(None),
     current_user: str = Depends(get_current_user)
 ):
-    """Export item reports as Excel file (requires authentication)"""
+    """Export item reports as an Excel, CSV, Parquet or Arrow file (requires authentication)"""
     try:
-        # Get item reports data
-        reports = await order_service.get_item_reports()
-        
-        # Generate Excel file
-        excel_file = excel_service.create_item_report_excel(reports)
-        filename = excel_service.get_filename("menu_items")
-        
-        # Return as streaming response
-        return StreamingResponse(
-            excel_file,
-            media_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
-            headers={"Content-Disposition": f"attachment; filename={filename}"}
+        return await export_report(
+            "items", {"start_time": start_time, "end_time": end_time, "recent_limit": recent_customers}, export_format,
+            "menu_items", "create_item_report_excel", if_none_match,
+            order_service, excel_service, export_executor, artifact_cache
         )
+    except ExportFormatUnavailable as e:
+        raise HTTPException(status_code=501, detail=str(e))
+    except ExportQueueFull as e:
+        logger.error(f"Export queue full in export_item_reports endpoint: {str(e)}")
+        raise HTTPException(status_code=503, detail="Too many exports in progress, try again shortly")
     except Exception as e:
         logger.error(f"Error in export_item_reports endpoint: {str(e)}")
         raise HTTPException(status_code=500, detail="Failed to export item reports")
 
 @router.get("/price-analysis/export")
 async def export_price_analysis(
+    start_date: Optional[date] = Query(None, description="First Eastern order date to include"),
+    end_date: Optional[date] = Query(None, description="Last Eastern order date to include"),
+    export_format: str = Query("xlsx", alias="format", pattern=EXPORT_FORMAT_PATTERN, description="File format: xlsx, csv, parquet or arrow"),
     order_service: OrderService = Depends(get_order_service),
     excel_service: ExcelService = Depends(get_excel_service),
+    export_executor: ExportExecutor = Depends(get_export_executor),
+    artifact_cache: ArtifactCache = Depends(get_artifact_cache),
+    if_none_match: Optional[str] = Header(None),
     current_user: str = Depends(get_current_user)
 ):
-    """Export price analysis as Excel file (requires authentication)"""
+    """Export price analysis as an Excel, CSV, Parquet or Arrow file (requires authentication)"""
     try:
-        # Get price analysis data
-        price_analysis = await order_service.get_price_analysis()
-        
-        # Generate Excel file
-        excel_file = excel_service.create_price_analysis_excel(price_analysis)
-        filename = excel_service.get_filename("price_analysis")
-        
-        # Return as streaming response
+        return await export_report(
+            "price_analysis", {"start_date": start_date, "end_date": end_date}, export_format,
+            "price_analysis", "create_price_analysis_excel", if_none_match,
+            order_service, excel_service, export_executor, artifact_cache
+        )
+    except ExportFormatUnavailable as e:
+        raise HTTPException(status_code=501, detail=str(e))
+    except ExportQueueFull as e:
+        logger.error(f"Export queue full in export_price_analysis endpoint: {str(e)}")
+        raise HTTPException(status_code=503, detail="Too many exports in progress, try again shortly")
+    except Exception as e:
+        logger.error(f"Error in export_price_analysis endpoint: {str(e)}")
+        raise HTTPException(status_code=500, detail="Failed to export price analysis")
+
+@router.get("/full/export")
+async def export_full_report(
+    start_time: Optional[datetime] = Query(None, description="Only include orders placed at or after this time in the payment and item sheets (Eastern if no offset)"),
+    end_time: Optional[datetime] = Query(None, description="Only include orders placed before this time in the payment and item sheets (Eastern if no offset)"),
+    recent_customers: int = Query(5, ge=1, le=50, description="Number of most recent distinct customers listed per item"),
+    start_date: Optional[date] = Query(None, description="First Eastern order date in the price analysis"),
+    end_date: Optional[date] = Query(None, description="Last Eastern order date in the price analysis"),
+    order_service: OrderService = Depends(get_order_service),
+    excel_service: ExcelService = Depends(get_excel_service),
+    export_executor: ExportExecutor = Depends(get_export_executor),
+    artifact_cache: ArtifactCache = Depends(get_artifact_cache),
+    if_none_match: Optional[str] = Header(None),
+    current_user: str = Depends(get_current_user)
+):
+    """Export payment, item and price reports as one Excel workbook (requires authentication)"""
+    try:
+        return await export_report(
+            "full",
+            {
+                "start_time": start_time, "end_time": end_time, "recent_limit": recent_customers,
+                "start_date": start_date, "end_date": end_date
+            },
+            "xlsx", "full", "create_full_report_excel", if_none_match,
+            order_service, excel_service, export_executor, artifact_cache
+        )
+    except ExportQueueFull as e:
+        logger.error(f"Export queue full in export_full_report endpoint: {str(e)}")
+        raise HTTPException(status_code=503, detail="Too many exports in progress, try again shortly")
+    except Exception as e:
+        logger.error(f"Error in export_full_report endpoint: {str(e)}")
+        raise HTTPException(status_code=500, detail="Failed to export full report")
+
+@router.get("/orders/export")
+async def export_orders(
+    start_time: Optional[datetime] = Query(None, description="Only include orders placed at or after this time (Eastern if no offset)"),
+    end_time: Optional[datetime] = Query(None, description="Only include orders placed before this time (Eastern if no offset)"),
+    export_format: str = Query("xlsx", alias="format", pattern=EXPORT_FORMAT_PATTERN, description="File format: xlsx, csv, parquet or arrow"),
+    order_service: OrderService = Depends(get_order_service),
+    excel_service: ExcelService = Depends(get_excel_service),
+    current_user: str = Depends(get_current_user)
+):
+    """Export one row per order, streamed straight from the database (requires authentication)"""
+    try:
+        rows = order_service.iter_order_rows(start_time, end_time)
+        media_type, extension = EXPORT_FORMATS[export_format]
+        filename = excel_service.get_filename("orders", extension)
+
+        # Stream file chunks while the cursor is read; memory stays flat for any number of orders
+        if export_format == "xlsx":
+            chunks = excel_service.stream_order_excel(rows, start_time, end_time)
+        else:
+            check_format(export_format)
+            chunks = stream_order_rows(rows, export_format)
         return StreamingResponse(
-            excel_file,
-            media_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+            chunks,
+            media_type=media_type,
             headers={"Content-Disposition": f"attachment; filename={filename}"}
         )
+    except ExportFormatUnavailable as e:
+        raise HTTPException(status_code=501, detail=str(e))
     except Exception as e:
-        logger.error(f"Error in export_price_analysis endpoint: {str(e)}")
-        raise HTTPException(status_code=500, detail="Failed to export price analysis")
\ No newline at end of file
+        logger.error(f"Error in export_orders endpoint: {str(e)}")
+        raise HTTPException(status_code=500, detail="Failed to export orders")
+
+@router.get("/order-items/export")
+async def export_order_items(
+    start_time: Optional[datetime] = Query(None, description="Only include orders placed at or after this time (Eastern if no offset)"),
+    end_time: Optional[datetime] = Query(None, description="Only include orders placed before this time (Eastern if no offset)"),
+    export_format: str = Query("xlsx", alias="format", pattern=EXPORT_FORMAT_PATTERN, description="File format: xlsx, csv, parquet or arrow"),
+    order_service: OrderService = Depends(get_order_service),
+    excel_service: ExcelService = Depends(get_excel_service),
+    current_user: str = Depends(get_current_user)
+):
+    """Export one row per ordered item with its cooking status, streamed from a database cursor (requires authentication)"""
+    try:
+        rows = order_service.iter_order_line_rows(start_time, end_time)
+        media_type, extension = EXPORT_FORMATS[export_format]
+        filename = excel_service.get_filename("order_items", extension)
+
+        if export_format == "xlsx":
+            chunks = excel_service.stream_line_item_excel(rows, start_time, end_time)
+        else:
+            check_format(export_format)
+            chunks = stream_line_item_rows(rows, export_format)
+        return StreamingResponse(
+            chunks,
+            media_type=media_type,
+            headers={"Content-Disposition": f"attachment; filename={filename}"}
+        )
+    except ExportFormatUnavailable as e:
+        raise HTTPException(status_code=501, detail=str(e))
+    except Exception as e:
+        logger.error(f"Error in export_order_items endpoint: {str(e)}")
+        raise HTTPException(status_code=500, detail="Failed to export order items")
+
+@router.post("/jobs", response_model=ExportJob, status_code=202)
+async def submit_export_job(
+    request: ExportJobCreate,
+    order_service: OrderService = Depends(get_order_service),
+    export_jobs: ExportJobManager = Depends(get_export_jobs),
+    current_user: str = Depends(get_current_user)
+):
+    """Start a payment, item, price analysis or raw orders export in the background (requires authentication)"""
+    try:
+        return (await export_jobs.submit(request, current_user, order_service)).to_model()
+    except ExportFormatUnavailable as e:
+        raise HTTPException(status_code=501, detail=str(e))
+    except ExportQueueFull as e:
+        logger.error(f"Export job queue full in submit_export_job endpoint: {str(e)}")
+        raise HTTPException(status_code=503, detail="Too many exports in progress, try again shortly")
+    except Exception as e:
+        logger.error(f"Error in submit_export_job endpoint: {str(e)}")
+        raise HTTPException(status_code=500, detail="Failed to submit export job")
+
+@router.get("/jobs/{job_id}", response_model=ExportJob)
+async def get_export_job(
+    job_id: str,
+    export_jobs: ExportJobManager = Depends(get_export_jobs),
+    current_user: str = Depends(get_current_user)
+):
+    """Get an export job's status and progress (requires authentication)"""
+    job = await export_jobs.get(job_id, current_user)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Export job not found")
+    return job.to_model()
+
+@router.get("/jobs/{job_id}/download")
+async def download_export_job(
+    job_id: str,
+    export_jobs: ExportJobManager = Depends(get_export_jobs),
+    current_user: str = Depends(get_current_user)
+):
+    """Download the file of a completed export job (requires authentication)"""
+    job = await export_jobs.get(job_id, current_user)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Export job not found")
+    if job.status != "completed":
+        raise HTTPException(status_code=409, detail=f"Export job is {job.status}")
+    return FileResponse(job.path, media_type=job.media_type, filename=job.filename)
+
+@router.delete("/jobs/{job_id}", response_model=ExportJob)
+async def cancel_export_job(
+    job_id: str,
+    export_jobs: ExportJobManager = Depends(get_export_jobs),
+    current_user: str = Depends(get_current_user)
+):
+    """Cancel a queued or running export job, or delete a finished one and its file (requires authentication)"""
+    job = await export_jobs.cancel(job_id, current_user)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Export job not found")
+    return job.to_model()
@@ -1,10 +1,18 @@
 from fastapi import FastAPI, HTTPException, Depends, Query
+from fastapi.responses import StreamingResponse
 from typing import List, Optional
-from datetime import datetime
+from datetime import date, datetime
 import asyncio
-from db import get_pg_pool
+from db import close_pg_pool, get_pg_pool
 from models.order import Order, OrderCreate, OrderItemCookingUpdate, OrderItem
-from services.order_service import OrderService
+from models.notification import Notification
+from services.order_service import OrderService, SoldOutError
+from services.menu_service import MenuService
+from services.export_executor import ExportExecutor
+from services.export_jobs import ExportJobManager
+from services.event_hub import EventHub, HubFull
+from services.notification_service import NOTIFICATIONS_TOPIC
+from routers import menu, reports
 
 import os
 import logging
@@ -17,6 +25,9 @@ app = FastAPI(
     version="1.0.0"
 )
 
+app.include_router(menu.router)
+app.include_router(reports.router)
+
 pg_pool = None
 order_service = None
 
@@ -50,8 +61,23 @@ async def startup():
         # Run database migrations
         await run_migrations(pg_pool)
         
+        # Serve the menu from a snapshot that reloads when any worker changes it
+        MenuService.set_pool(pg_pool)
+        await MenuService().start_listener()
+
+        # Export jobs run in this worker but are tracked where every worker can see them
+        ExportJobManager.set_pool(pg_pool)
+
         # Initialize order service
         order_service = OrderService(pg_pool)
+        await order_service.warm_trending()
+        await order_service.warm_kitchen_queue()
+
+        # Push order tracking and the pickup display to subscribers on any worker
+        hub = EventHub()
+        hub.loaders['order'] = order_service.get_order_event
+        hub.loaders[NOTIFICATIONS_TOPIC] = order_service.notification_service.get_active_notifications_json
+        await hub.start_listener(pg_pool)
         
         logger.info("Application startup completed successfully")
     except Exception as e:
@@ -60,13 +86,14 @@ async def startup():
 
 @app.on_event("shutdown")
 async def shutdown():
-    from db import close_pg_pool
+    # Record this worker's unfinished export jobs as cancelled while the pool is still open
+    await ExportJobManager().stop()
+    # Listener connections go back to the pool first; closing it waits for them
+    await MenuService().stop_listener()
+    await EventHub().stop_listener()
+    ExportExecutor().shutdown()
     await close_pg_pool()
 
-@app.on_event("shutdown")
-async def shutdown():
-    await pg_pool.close()
-
 def get_order_service():
     if not order_service:
         raise HTTPException(status_code=503, detail="Order service not initialized")
@@ -79,7 +106,12 @@ async def create_order(
     order: OrderCreate,
     service: OrderService = Depends(get_order_service)
 ):
-    return await service.create_order(order)
+    try:
+        return await service.create_order(order)
+    except SoldOutError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
 
 @app.get("/orders/", response_model=List[Order], tags=["orders"],
     summary="Get all orders",
@@ -93,6 +125,64 @@ async def get_orders(
         return [order for order in orders if order.status == status]
     return orders
 
+@app.get("/orders/trending", tags=["reports"],
+    summary="Get trending items",
+    description="Top items by quantity ordered in the last 15 or 60 minutes, with the maximum count error")
+async def get_trending_items(
+    window: int = Query(15, description="Window in minutes (15 or 60)"),
+    k: int = Query(5, ge=1, le=50, description="Number of items to return"),
+    service: OrderService = Depends(get_order_service)
+):
+    try:
+        return service.get_trending(window, k)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@app.get("/orders/batches", tags=["orders"],
+    summary="Get proposed cook batches",
+    description="Next batch per item from the pending orders, oldest waiting first, within each item's batch capacity")
+async def get_batch_proposals(
+    service: OrderService = Depends(get_order_service)
+):
+    return service.get_batch_proposals()
+
+@app.get("/orders/stations", tags=["orders"],
+    summary="Get station workloads",
+    description="Pending units, oldest waiting order and last-hour throughput for every chef station")
+async def get_station_summaries(
+    service: OrderService = Depends(get_order_service)
+):
+    return service.get_station_summaries()
+
+@app.get("/orders/stations/{station}", tags=["orders"],
+    summary="Get one station's work",
+    description="A station's summary with its open order lines and next batch per item")
+async def get_station_view(
+    station: str,
+    service: OrderService = Depends(get_order_service)
+):
+    view = service.get_station_view(station)
+    if view is None:
+        raise HTTPException(status_code=404, detail="Station not found")
+    return view
+
+@app.get("/orders/stations/{station}/stream", tags=["orders"],
+    summary="Stream one station's work",
+    description="Server-sent events with the station view, pushed whenever one of its items changes. "
+        "The view comes from this worker's kitchen queue, so it only follows order changes made through "
+        "the same worker; run the API as a single worker when stations are streamed.")
+async def stream_station_view(
+    station: str,
+    service: OrderService = Depends(get_order_service)
+):
+    if station not in service.station_board.stations:
+        raise HTTPException(status_code=404, detail="Station not found")
+    return StreamingResponse(
+        service.station_board.stream(station),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache"}
+    )
+
 @app.get("/orders/{order_id}", response_model=Order, tags=["orders"],
     summary="Get order by ID",
     description="Retrieve a specific order by its ID")
@@ -133,6 +223,23 @@ async def get_order_by_number(
         raise HTTPException(status_code=404, detail="Order not found")
     return order
 
+@app.get("/orders/by-number/{order_number}/stream", tags=["orders"],
+    summary="Track an order",
+    description="Server-sent events with the order, pushed whenever it changes")
+async def stream_order_by_number(order_number: str):
+    try:
+        subscription = await EventHub().subscribe(f"order:{order_number}")
+    except HubFull as e:
+        logger.error(f"Event hub full in stream_order_by_number endpoint: {str(e)}")
+        raise HTTPException(status_code=503, detail="Too many live connections, try again shortly")
+    if subscription is None:
+        raise HTTPException(status_code=404, detail="Order not found")
+    return StreamingResponse(
+        subscription.events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache"}
+    )
+
 @app.get("/orders/summary/items", tags=["reports"],
     summary="Get orders by item",
     description="Get a summary of orders grouped by menu items")
@@ -145,9 +252,34 @@ async def get_orders_by_item(
     summary="Get price analysis",
     description="Get price-related analytics for all orders")
 async def get_price_analysis(
+    start_date: Optional[date] = Query(None, description="First Eastern order date to include"),
+    end_date: Optional[date] = Query(None, description="Last Eastern order date to include"),
+    service: OrderService = Depends(get_order_service)
+):
+    return await service.get_cached_report("price_analysis", start_date=start_date, end_date=end_date)
+
+@app.get("/notifications/active", response_model=List[Notification], tags=["notifications"],
+    summary="Get active notifications",
+    description="Ready-for-pickup notifications for the display, newest first")
+async def get_active_notifications(
     service: OrderService = Depends(get_order_service)
 ):
-    return await service.get_price_analysis()
+    return await service.notification_service.get_active_notifications()
+
+@app.get("/notifications/active/stream", tags=["notifications"],
+    summary="Stream active notifications",
+    description="Server-sent events with the active notifications, pushed whenever they change")
+async def stream_active_notifications():
+    try:
+        subscription = await EventHub().subscribe(NOTIFICATIONS_TOPIC)
+    except HubFull as e:
+        logger.error(f"Event hub full in stream_active_notifications endpoint: {str(e)}")
+        raise HTTPException(status_code=503, detail="Too many live connections, try again shortly")
+    return StreamingResponse(
+        subscription.events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache"}
+    )
 
 @app.get("/health", tags=["health"],
     summary="Health check",
@@ -0,0 +1,222 @@
+from typing import Awaitable, Callable, Dict, Optional
+from collections import OrderedDict
+from dataclasses import dataclass
+import asyncio
+import hashlib
+import json
+import logging
+import os
+
+logger = logging.getLogger(__name__)
+
+# Directory for export files; empty keeps them in memory
+EXPORT_CACHE_DIR = os.getenv('EXPORT_CACHE_DIR', '')
+
+# Total size of stored export files before the least recently used are evicted. Each worker
+# counts the files it has stored or read, so with a shared EXPORT_CACHE_DIR this is a per-worker
+# limit and the directory can hold up to one limit per worker.
+EXPORT_CACHE_MAX_BYTES = int(os.getenv('EXPORT_CACHE_MAX_BYTES', str(256 * 1024 * 1024)))
+
+@dataclass
+class Artifact:
+    digest: str  # sha256 of the content
+    content: bytes
+
+    @property
+    def etag(self) -> str:
+        return f'"{self.digest}"'
+
+class ArtifactCache:
+    """Size-bounded LRU store of generated export files.
+
+    Files are stored under the sha256 of their content and looked up
+    through a key over report type, parameters, format and data version, so
+    identical files are kept once and the digest doubles as the ETag. With
+    EXPORT_CACHE_DIR set, files and key pointers live on disk and are shared
+    by every worker process using the directory; otherwise they are kept in
+    memory. Concurrent renders of the same key are shared.
+    """
+    _instance = None
+
+    def __new__(cls):
+        if cls._instance is None:
+            cls._instance = super(ArtifactCache, cls).__new__(cls)
+        return cls._instance
+
+    def __init__(self):
+        # Initialize only once
+        if not hasattr(self, 'initialized'):
+            self.initialized = True
+            self.directory = EXPORT_CACHE_DIR or None
+            self.max_bytes = EXPORT_CACHE_MAX_BYTES
+            self._index: Dict[str, str] = {}
+            self._blobs: "OrderedDict[str, int]" = OrderedDict()  # digest -> size, least recently used first
+            self._memory: Dict[str, bytes] = {}
+            self._inflight: Dict[str, asyncio.Task] = {}
+            self.size = 0
+            self.hits = 0
+            self.misses = 0
+            self.evictions = 0
+            if self.directory:
+                self._load_directory()
+
+    def _load_directory(self):
+        """Pick up files left by earlier runs or other workers, oldest first in the LRU"""
+        os.makedirs(os.path.join(self.directory, 'keys'), exist_ok=True)
+        blobs = []
+        for name in os.listdir(self.directory):
+            path = os.path.join(self.directory, name)
+            if len(name) == 64 and os.path.isfile(path):
+                stat = os.stat(path)
+                blobs.append((stat.st_mtime, name, stat.st_size))
+        for _, digest, size in sorted(blobs):
+            self._blobs[digest] = size
+            self.size += size
+        self._evict()
+
+    def key(self, report_type: str, params: dict, export_format: str, version: int) -> str:
+        raw = json.dumps([report_type, params, export_format, version], sort_keys=True, default=str)
+        return hashlib.sha256(raw.encode()).hexdigest()
+
+    def _blob_path(self, digest: str) -> str:
+        return os.path.join(self.directory, digest)
+
+    def _key_path(self, key: str) -> str:
+        return os.path.join(self.directory, 'keys', key)
+
+    def _read(self, key: str) -> Optional[Artifact]:
+        digest = self._index.get(key)
+        if self.directory is None:
+            content = self._memory.get(digest) if digest else None
+            return Artifact(digest, content) if content is not None else None
+        try:
+            if digest is None:
+                with open(self._key_path(key)) as f:
+                    digest = f.read().strip()
+            with open(self._blob_path(digest), 'rb') as f:
+                return Artifact(digest, f.read())
+        except FileNotFoundError:
+            # Never stored, or evicted by this or another worker
+            self._index.pop(key, None)
+            return None
+
+    def _write(self, key: str, artifact: Artifact):
+        if self.directory is None:
+            self._memory[artifact.digest] = artifact.content
+            return
+        # Write then rename so other workers never read a partial file
+        for path, data in ((self._blob_path(artifact.digest), artifact.content), (self._key_path(key), artifact.digest.encode())):
+            tmp = f"{path}.{os.getpid()}.tmp"
+            with open(tmp, 'wb') as f:
+                f.write(data)
+            os.replace(tmp, path)
+
+    def _touch(self, key: str, artifact: Artifact):
+        self._index[key] = artifact.digest
+        if artifact.digest in self._blobs:
+            self._blobs.move_to_end(artifact.digest)
+        else:
+            self._blobs[artifact.digest] = len(artifact.content)
+            self.size += len(artifact.content)
+            self._evict()
+
+    def _evict(self):
+        evicted = set()
+        while self.size > self.max_bytes and len(self._blobs) > 1:
+            digest, size = self._blobs.popitem(last=False)
+            self.size -= size
+            self.evictions += 1
+            evicted.add(digest)
+            self._memory.pop(digest, None)
+            for key in [key for key, value in self._index.items() if value == digest]:
+                del self._index[key]
+            if self.directory:
+                try:
+                    os.remove(self._blob_path(digest))
+                except FileNotFoundError:
+                    pass
+        if evicted and self.directory:
+            self._remove_pointers(evicted)
+
+    def _remove_pointers(self, digests: set):
+        """Delete key pointers to evicted files, including those written by other workers"""
+        keys = os.path.join(self.directory, 'keys')
+        for name in os.listdir(keys):
+            path = os.path.join(keys, name)
+            try:
+                with open(path) as f:
+                    if f.read().strip() not in digests:
+                        continue
+                os.remove(path)
+            except FileNotFoundError:
+                # Removed by another worker meanwhile
+                pass
+
+    async def get(self, key: str) -> Optional[Artifact]:
+        """Stored file for this key, or None"""
+        if self.directory is None:
+            artifact = self._read(key)
+        else:
+            artifact = await asyncio.to_thread(self._read, key)
+        if artifact is None:
+            return None
+        self.hits += 1
+        self._touch(key, artifact)
+        return artifact
+
+    async def get_or_render(self, key: str, render: Callable[[], Awaitable[bytes]]) -> Artifact:
+        """Stored file for this key, rendering and storing it first if needed"""
+        artifact = await self.get(key)
+        if artifact is not None:
+            return artifact
+        task = self._inflight.get(key)
+        if task is None:
+            self.misses += 1
+            task = asyncio.ensure_future(self._render(key, render))
+            self._inflight[key] = task
+            task.add_done_callback(lambda t: self._inflight.pop(key, None))
+        return await asyncio.shield(task)
+
+    async def _render(self, key: str, render: Callable[[], Awaitable[bytes]]) -> Artifact:
+        content = await render()
+        artifact = Artifact(hashlib.sha256(content).hexdigest(), content)
+        try:
+            if self.directory is None:
+                self._write(key, artifact)
+            else:
+                await asyncio.to_thread(self._write, key, artifact)
+        except OSError as e:
+            # A full or read-only disk only costs the cache, not the download
+            logger.error(f"Error storing export artifact: {str(e)}")
+            return artifact
+        self._touch(key, artifact)
+        return artifact
+
+    def metrics(self) -> dict:
+        """Hit/miss counters and stored bytes"""
+        requests = self.hits + self.misses
+        return {
+            'storage': self.directory or 'memory',
+            'files': len(self._blobs),
+            'bytes': self.size,
+            'max_bytes': self.max_bytes,
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': round(self.hits / requests, 4) if requests else None,
+            'evictions': self.evictions
+        }
+
+    def clear(self):
+        if self.directory:
+            for name in os.listdir(os.path.join(self.directory, 'keys')):
+                os.remove(self._key_path(name))
+            for digest in self._blobs:
+                try:
+                    os.remove(self._blob_path(digest))
+                except FileNotFoundError:
+                    pass
+        self._index.clear()
+        self._blobs.clear()
+        self._memory.clear()
+        self.size = 0
+        self.hits = self.misses = self.evictions = 0
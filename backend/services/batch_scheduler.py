@@ -0,0 +1,106 @@
+from typing import Dict, List, Optional, Tuple
+from datetime import datetime
+from models.order import EASTERN_TZ
+from services.kitchen_queue import KitchenQueue
+import logging
+import os
+
+logger = logging.getLogger(__name__)
+
+# Units per batch for items without their own KITCHEN_BATCH_CAPACITY entry
+DEFAULT_BATCH_CAPACITY = int(os.getenv('KITCHEN_DEFAULT_BATCH_CAPACITY', '6'))
+
+def parse_batch_capacity(value: Optional[str]) -> Dict[str, int]:
+    """Parse "Dosa=8, Chicken 65=10" into {'dosa': 8, 'chicken 65': 10}"""
+    capacities = {}
+    for entry in (value or '').split(','):
+        if not entry.strip():
+            continue
+        name, _, units = entry.partition('=')
+        try:
+            capacities[name.strip().lower()] = max(1, int(units))
+        except ValueError:
+            logger.error(f"Ignoring invalid KITCHEN_BATCH_CAPACITY entry: {entry.strip()}")
+    return capacities
+
+class BatchScheduler:
+    """Proposes cook batches from the kitchen queue's not-started lines.
+
+    Each item's next batch takes waiting lines strictly oldest first until the
+    item's capacity is reached, so no order is skipped for a better fit. A
+    single line larger than the capacity is a batch of its own; lines are not
+    split. Batches are listed by the wait of their oldest order. A proposal is
+    cached per item and recomputed only when that item's waiting lines change.
+    """
+    _instance = None
+
+    def __new__(cls):
+        if cls._instance is None:
+            cls._instance = super(BatchScheduler, cls).__new__(cls)
+        return cls._instance
+
+    def __init__(self):
+        # Initialize only once
+        if not hasattr(self, 'initialized'):
+            self.initialized = True
+            self.kitchen_queue = KitchenQueue()
+            self.capacities = parse_batch_capacity(os.getenv('KITCHEN_BATCH_CAPACITY'))
+            self._proposals: Dict[str, Tuple[int, Optional[dict]]] = {}
+
+    def capacity_for(self, item_name: str) -> int:
+        return self.capacities.get(item_name.lower(), DEFAULT_BATCH_CAPACITY)
+
+    def next_batch(self, item_name: str) -> Optional[dict]:
+        """The batch this item's cook should make next, or None if nothing is waiting"""
+        queue = self.kitchen_queue.items.get(item_name)
+        if queue is None:
+            return None
+        cached = self._proposals.get(item_name)
+        if cached is not None and cached[0] == queue.version:
+            return cached[1]
+
+        capacity = self.capacity_for(item_name)
+        lines = []
+        units = 0
+        for line in queue.waiting.values():
+            if lines and units + line.quantity > capacity:
+                break
+            lines.append(line)
+            units += line.quantity
+            if units >= capacity:
+                break
+
+        batch = None
+        if lines:
+            orders = [self.kitchen_queue.orders[line.order_id] for line in lines]
+            numbers = [order.order_number for order in orders if order.order_number]
+            covering = f" covering orders #{numbers[0]}" + (f"-#{numbers[-1]}" if len(numbers) > 1 else "") if numbers else ""
+            batch = {
+                'label': f"Make {units} {item_name} now{covering}",
+                'item_name': item_name,
+                'quantity': units,
+                'capacity': capacity,
+                'order_ids': [line.order_id for line in lines],
+                'order_numbers': [order.order_number for order in orders],
+                'oldest_order_time': min(order.enqueued_at for order in orders),
+                'waiting_units': sum(line.quantity for line in queue.waiting.values())
+            }
+        self._proposals[item_name] = (queue.version, batch)
+        return batch
+
+    def propose(self, now: Optional[datetime] = None) -> List[dict]:
+        """Next batch for every item with waiting lines, longest-waiting first"""
+        now = now or datetime.now(EASTERN_TZ)
+        batches = []
+        for item_name in list(self.kitchen_queue.items):
+            batch = self.next_batch(item_name)
+            if batch is not None:
+                batches.append({
+                    **batch,
+                    'oldest_wait_minutes': round((now - batch['oldest_order_time']).total_seconds() / 60, 1)
+                })
+        batches.sort(key=lambda batch: batch['oldest_order_time'])
+        return batches
+
+    def clear(self):
+        self._proposals.clear()
@@ -0,0 +1,194 @@
+from typing import AsyncIterator, Awaitable, Callable, Dict, Optional, Set
+from asyncpg import Connection, Pool
+import asyncio
+import logging
+import os
+
+logger = logging.getLogger(__name__)
+
+# Channel database triggers and services announce changed topics on
+HUB_CHANNEL = 'hub_events'
+
+# Open subscriptions across all topics before new ones are refused
+EVENT_HUB_MAX_SUBSCRIBERS = int(os.getenv('EVENT_HUB_MAX_SUBSCRIBERS', '10000'))
+
+# Seconds between keep-alive comments on an idle stream
+HUB_HEARTBEAT_SECONDS = 15
+
+class HubFull(Exception):
+    pass
+
+async def announce(conn: Connection, topic: str):
+    """Tell every worker that a topic changed; delivered when the surrounding transaction commits"""
+    await conn.execute("SELECT pg_notify($1, $2)", HUB_CHANNEL, topic)
+
+class Subscription:
+    """One client's place on a topic; holds at most the latest unsent event"""
+    __slots__ = ('hub', 'topic', '_frame', '_ready')
+
+    def __init__(self, hub: "EventHub", topic: str):
+        self.hub = hub
+        self.topic = topic
+        self._frame: Optional[str] = None
+        self._ready = asyncio.Event()
+
+    def offer(self, frame: str):
+        # A newer event replaces one the client has not read yet
+        self._frame = frame
+        self._ready.set()
+
+    async def next(self, timeout: float) -> Optional[str]:
+        """The latest event, waiting up to timeout for one; None on timeout"""
+        if self._frame is None:
+            try:
+                await asyncio.wait_for(self._ready.wait(), timeout)
+            except asyncio.TimeoutError:
+                return None
+        frame, self._frame = self._frame, None
+        self._ready.clear()
+        return frame
+
+    async def events(self, heartbeat: float = HUB_HEARTBEAT_SECONDS) -> AsyncIterator[str]:
+        """Server-sent events for this subscription until the client goes away"""
+        try:
+            while True:
+                frame = await self.next(heartbeat)
+                yield frame if frame is not None else ": keep-alive\n\n"
+        finally:
+            self.close()
+
+    def close(self):
+        self.hub._unsubscribe(self)
+
+class EventHub:
+    """Fan-out of state changes to server-sent event subscribers, per topic.
+
+    A topic is '<kind>:<key>' (e.g. 'order:42') or just '<kind>'; its state
+    comes from the loader registered for the kind. Any worker announces a
+    changed topic on HUB_CHANNEL; each worker reloads a topic at most once
+    at a time, only if it has subscribers, and hands the serialized event to
+    all of them. A subscriber only ever holds the latest event it has not
+    read, so a slow client costs one reference, not a backlog.
+    """
+    _instance = None
+
+    def __new__(cls):
+        if cls._instance is None:
+            cls._instance = super(EventHub, cls).__new__(cls)
+        return cls._instance
+
+    def __init__(self):
+        # Initialize only once
+        if not hasattr(self, 'initialized'):
+            self.initialized = True
+            self.max_subscribers = EVENT_HUB_MAX_SUBSCRIBERS
+            # Kind -> coroutine function returning a topic's state as JSON, or None if there is none
+            self.loaders: Dict[str, Callable[[str], Awaitable[Optional[str]]]] = {}
+            self.topics: Dict[str, Set[Subscription]] = {}
+            self.subscribers = 0
+            self._latest: Dict[str, str] = {}
+            self._refreshing: Dict[str, asyncio.Task] = {}
+            self._dirty: Set[str] = set()
+            self._pool: Optional[Pool] = None
+            self._listen_conn: Optional[Connection] = None
+
+    async def _load(self, topic: str) -> Optional[str]:
+        kind, _, key = topic.partition(':')
+        return await self.loaders[kind](key)
+
+    async def subscribe(self, topic: str) -> Optional[Subscription]:
+        """Subscribe to a topic, starting from its current state; None if it has none.
+
+        Raises HubFull when max_subscribers are already open.
+        """
+        if self.subscribers >= self.max_subscribers:
+            raise HubFull(f"{self.subscribers} subscribers already connected")
+        subscription = Subscription(self, topic)
+        # Subscribe before loading, so a change made meanwhile is not missed
+        self.topics.setdefault(topic, set()).add(subscription)
+        self.subscribers += 1
+        try:
+            data = self._latest.get(topic)
+            if data is None:
+                data = await self._load(topic)
+                if data is None:
+                    subscription.close()
+                    return None
+                self._latest.setdefault(topic, data)
+        except Exception:
+            subscription.close()
+            raise
+        if subscription._frame is None:
+            subscription.offer(self._frame(topic, data))
+        return subscription
+
+    def _unsubscribe(self, subscription: Subscription):
+        subscriptions = self.topics.get(subscription.topic)
+        if subscriptions is None or subscription not in subscriptions:
+            return
+        subscriptions.discard(subscription)
+        self.subscribers -= 1
+        if not subscriptions:
+            del self.topics[subscription.topic]
+            self._latest.pop(subscription.topic, None)
+
+    def _frame(self, topic: str, data: str) -> str:
+        return f"event: {topic.partition(':')[0]}\ndata: {data}\n\n"
+
+    def publish(self, topic: str, data: str):
+        """Send a topic's new state to its subscribers in this worker"""
+        subscriptions = self.topics.get(topic)
+        if not subscriptions or self._latest.get(topic) == data:
+            return
+        self._latest[topic] = data
+        # Serialized once, shared by every subscriber
+        frame = self._frame(topic, data)
+        for subscription in subscriptions:
+            subscription.offer(frame)
+
+    def changed(self, topic: str):
+        """Reload a topic that changed and publish it; changes arriving during a reload coalesce into one more"""
+        if topic not in self.topics:
+            return
+        if topic in self._refreshing:
+            self._dirty.add(topic)
+            return
+        self._refreshing[topic] = asyncio.ensure_future(self._refresh(topic))
+
+    async def _refresh(self, topic: str):
+        try:
+            while True:
+                self._dirty.discard(topic)
+                data = await self._load(topic)
+                if data is not None:
+                    self.publish(topic, data)
+                if topic not in self._dirty or topic not in self.topics:
+                    break
+        except Exception as e:
+            logger.error(f"Error refreshing {topic}: {str(e)}")
+        finally:
+            self._refreshing.pop(topic, None)
+            self._dirty.discard(topic)
+
+    def _on_hub_event(self, conn, pid, channel, payload):
+        self.changed(payload)
+
+    async def start_listener(self, pool: Pool):
+        """Hold a connection listening for changed topics from any worker"""
+        if self._listen_conn is not None:
+            return
+        conn = await pool.acquire()
+        try:
+            await conn.add_listener(HUB_CHANNEL, self._on_hub_event)
+        except Exception:
+            await pool.release(conn)
+            raise
+        self._pool, self._listen_conn = pool, conn
+
+    async def stop_listener(self):
+        conn, self._listen_conn = self._listen_conn, None
+        if conn is not None:
+            try:
+                await conn.remove_listener(HUB_CHANNEL, self._on_hub_event)
+            finally:
+                await self._pool.release(conn)
@@ -1,12 +1,21 @@
 import io
 import pandas as pd
 from datetime import datetime
-from typing import List
+from typing import AsyncIterable, AsyncIterator, List, Optional
 from models.order import PaymentReport, ItemReport, EASTERN_TZ
+from services.xlsx_stream import XlsxStreamWriter, XLSX_CHUNK_SIZE
+from services.report_rows import (
+    ORDER_COLUMNS, LINE_ITEM_COLUMNS, payment_report_rows, item_report_rows, price_analysis_rows, order_row,
+    line_item_row
+)
+import asyncio
 import logging
 
 logger = logging.getLogger(__name__)
 
+# Rows converted and deflated per hand-off to a worker thread while streaming
+XLSX_STREAM_BATCH_ROWS = 2000
+
 class ExcelService:
     def __init__(self):
         pass
@@ -15,19 +24,7 @@ class ExcelService:
         """Create Excel file for payment reports"""
         try:
             # Convert payment reports to DataFrame
-            data = []
-            for report in payment_reports:
-                data.append({
-                    'Payment Method': report.paymentMethod.upper(),
-                    'Total Orders': report.orderCount,
-                    'Total Items Sold': report.totalItems,
-                    'Pending Orders': report.pendingOrders,
-                    'Completed Orders': report.completedOrders,
-                    'Average Delivery Time (minutes)': round(report.averageDeliveryTime, 2) if report.averageDeliveryTime else 'N/A',
-                    'Completion Rate (%)': round((report.completedOrders / report.orderCount) * 100, 1) if report.orderCount > 0 else 0
-                })
-            
-            df = pd.DataFrame(data)
+            df = pd.DataFrame(payment_report_rows(payment_reports)).fillna('N/A')
             
             # Create Excel file in memory
             output = io.BytesIO()
@@ -90,19 +87,7 @@ class ExcelService:
         """Create Excel file for item reports"""
         try:
             # Convert item reports to DataFrame
-            data = []
-            for report in item_reports:
-                data.append({
-                    'Item Name': report.itemName,
-                    'Total Quantity Ordered': report.totalOrdered,
-                    'Number of Orders': report.orderCount,
-                    'Average Quantity per Order': round(report.averageQuantityPerOrder, 2),
-                    'Most Popular Payment Method': report.popularPaymentMethod.upper(),
-                    'Recent Customers': ', '.join(report.recentOrders[:5]),  # First 5 customers
-                    'Total Recent Customers': len(report.recentOrders)
-                })
-            
-            df = pd.DataFrame(data)
+            df = pd.DataFrame(item_report_rows(item_reports))
             
             # Create Excel file in memory
             output = io.BytesIO()
@@ -178,20 +163,7 @@ class ExcelService:
         """Create Excel file for price analysis"""
         try:
             # Convert price analysis items to DataFrame
-            data = []
-            for item in price_analysis.get('items', []):
-                data.append({
-                    'Item Name': item.get('item_name', ''),
-                    'Category': item.get('category', ''),
-                    'Unit Price ($)': round(item.get('unit_price', 0), 2),
-                    'Total Quantity Sold': item.get('total_quantity', 0),
-                    'Total Revenue ($)': round(item.get('total_revenue', 0), 2),
-                    'Number of Orders': item.get('order_count', 0),
-                    'Avg Qty per Order': round(item.get('total_quantity', 0) / item.get('order_count', 1), 2) if item.get('order_count', 0) > 0 else 0,
-                    'Revenue %': round((item.get('total_revenue', 0) / price_analysis.get('total_revenue', 1)) * 100, 2) if price_analysis.get('total_revenue', 0) > 0 else 0
-                })
-            
-            df = pd.DataFrame(data)
+            df = pd.DataFrame(price_analysis_rows(price_analysis))
             
             # Create Excel file in memory
             output = io.BytesIO()
@@ -258,7 +230,7 @@ class ExcelService:
                         current_time.strftime('%Y-%m-%d %H:%M:%S %Z'),
                         'Eastern Time (US/Eastern)',
                         'Price Analysis & Revenue Report',
-                        'All completed orders',
+                        self._analysis_period(price_analysis),
                         'Order Management System'
                     ]
                 }
@@ -272,8 +244,185 @@ class ExcelService:
             logger.error(f"Error creating price analysis Excel: {str(e)}")
             raise e
     
-    def get_filename(self, report_type: str) -> str:
+    def create_full_report_excel(self, full_report: dict) -> io.BytesIO:
+        """Create one Excel file with the payment, item and price reports, written in a single pass"""
+        try:
+            payment_reports = full_report['payment']
+            item_reports = full_report['items']
+            price_analysis = full_report['price_analysis']
+            writer = XlsxStreamWriter()
+            for sheet_name, rows in (
+                ('Payment Methods Report', payment_report_rows(payment_reports)),
+                ('Menu Items Report', item_report_rows(item_reports)),
+                ('Price Analysis Report', price_analysis_rows(price_analysis))
+            ):
+                writer.write_sheet(sheet_name, list(rows[0]) if rows else None, (row.values() for row in rows))
+
+            writer.write_sheet('Summary', ['Metric', 'Value'], [
+                ['Total Orders', sum(r.orderCount for r in payment_reports)],
+                ['Total Items Sold', sum(r.totalItems for r in payment_reports)],
+                ['Completed Orders', sum(r.completedOrders for r in payment_reports)],
+                ['Total Revenue ($)', price_analysis.get('total_revenue', 0)],
+                ['Average Order Value ($)', price_analysis.get('average_order_value', 0)],
+                ['Number of Menu Items', len(item_reports)],
+                ['Most Popular Item', max(item_reports, key=lambda x: x.orderCount).itemName if item_reports else 'N/A']
+            ])
+            current_time = datetime.now(EASTERN_TZ)
+            writer.write_sheet('Report Info', ['Report Information', 'Details'], [
+                ['Report Generated', current_time.strftime('%Y-%m-%d %H:%M:%S %Z')],
+                ['Time Zone', 'Eastern Time (US/Eastern)'],
+                ['Report Type', 'Full Report'],
+                ['Order Period', self._order_period(full_report.get('start_time'), full_report.get('end_time'))],
+                ['Revenue Period', self._analysis_period(price_analysis)],
+                ['Data Source', 'Order Management System']
+            ])
+            return io.BytesIO(writer.close())
+
+        except Exception as e:
+            logger.error(f"Error creating full report Excel: {str(e)}")
+            raise e
+
+    async def stream_order_excel(
+        self,
+        rows: AsyncIterable,
+        start_time: Optional[datetime] = None,
+        end_time: Optional[datetime] = None
+    ) -> AsyncIterator[bytes]:
+        """Stream an order-level Excel file chunk by chunk as rows arrive from the database"""
+        writer = XlsxStreamWriter()
+        total_orders = total_items = completed = 0
+        total_amount = 0.0
+        payment_methods = {}
+        try:
+            writer.add_sheet('Orders', ORDER_COLUMNS)
+            batch = []
+            async for row in rows:
+                batch.append(row)
+                total_orders += 1
+                total_items += row['total_items']
+                total_amount += float(row['total_amount'])
+                completed += row['status'] == 'completed'
+                payment_methods[row['payment_method']] = payment_methods.get(row['payment_method'], 0) + 1
+                if len(batch) >= XLSX_STREAM_BATCH_ROWS:
+                    chunk = await asyncio.to_thread(self._write_batch, writer, batch, order_row)
+                    batch = []
+                    if chunk:
+                        yield chunk
+            chunk = await asyncio.to_thread(self._write_batch, writer, batch, order_row)
+            if chunk:
+                yield chunk
+
+            # Summary and metadata sheets follow the data they describe
+            current_time = datetime.now(EASTERN_TZ)
+            yield await asyncio.to_thread(self._close_stream, writer, [
+                ('Summary', ['Metric', 'Value'], [
+                    ['Total Orders', total_orders],
+                    ['Total Items Sold', total_items],
+                    ['Total Revenue ($)', round(total_amount, 2)],
+                    ['Pending Orders', total_orders - completed],
+                    ['Completed Orders', completed],
+                    ['Average Order Value ($)', round(total_amount / total_orders, 2) if total_orders else 'N/A'],
+                    *[[f'{method.upper()} Orders', count] for method, count in sorted(payment_methods.items())]
+                ]),
+                ('Report Info', ['Report Information', 'Details'], [
+                    ['Report Generated', current_time.strftime('%Y-%m-%d %H:%M:%S %Z')],
+                    ['Time Zone', 'Eastern Time (US/Eastern)'],
+                    ['Report Type', 'Order Export'],
+                    ['Period', self._order_period(start_time, end_time)],
+                    ['Data Source', 'Order Management System']
+                ])
+            ])
+
+        except Exception as e:
+            logger.error(f"Error streaming order Excel: {str(e)}")
+            raise e
+
+    async def stream_line_item_excel(
+        self,
+        rows: AsyncIterable,
+        start_time: Optional[datetime] = None,
+        end_time: Optional[datetime] = None
+    ) -> AsyncIterator[bytes]:
+        """Stream a line-item Excel file chunk by chunk as rows arrive from the database"""
+        writer = XlsxStreamWriter()
+        total_lines = total_orders = total_quantity = 0
+        total_amount = 0.0
+        cooking_statuses = {}
+        last_order = None
+        try:
+            writer.add_sheet('Line Items', LINE_ITEM_COLUMNS)
+            batch = []
+            async for row in rows:
+                batch.append(row)
+                total_lines += 1
+                # Lines of one order arrive together
+                if row['order_number'] != last_order:
+                    total_orders += 1
+                    last_order = row['order_number']
+                total_quantity += row['quantity']
+                total_amount += float(row['subtotal'] or 0)
+                cooking_statuses[row['cooking_status']] = cooking_statuses.get(row['cooking_status'], 0) + 1
+                if len(batch) >= XLSX_STREAM_BATCH_ROWS:
+                    chunk = await asyncio.to_thread(self._write_batch, writer, batch, line_item_row)
+                    batch = []
+                    if chunk:
+                        yield chunk
+            chunk = await asyncio.to_thread(self._write_batch, writer, batch, line_item_row)
+            if chunk:
+                yield chunk
+
+            current_time = datetime.now(EASTERN_TZ)
+            yield await asyncio.to_thread(self._close_stream, writer, [
+                ('Summary', ['Metric', 'Value'], [
+                    ['Total Line Items', total_lines],
+                    ['Total Orders', total_orders],
+                    ['Total Quantity', total_quantity],
+                    ['Total Revenue ($)', round(total_amount, 2)],
+                    *[[f'Items {status.title()}', count] for status, count in sorted(cooking_statuses.items())]
+                ]),
+                ('Report Info', ['Report Information', 'Details'], [
+                    ['Report Generated', current_time.strftime('%Y-%m-%d %H:%M:%S %Z')],
+                    ['Time Zone', 'Eastern Time (US/Eastern)'],
+                    ['Report Type', 'Order Line Item Export'],
+                    ['Period', self._order_period(start_time, end_time)],
+                    ['Data Source', 'Order Management System']
+                ])
+            ])
+
+        except Exception as e:
+            logger.error(f"Error streaming line item Excel: {str(e)}")
+            raise e
+
+    def _write_batch(self, writer: XlsxStreamWriter, rows: List, to_row) -> bytes:
+        """Convert and deflate a batch of rows in a worker thread; returns a chunk once one is ready"""
+        for row in rows:
+            writer.write_row(to_row(row))
+        return writer.take() if writer.buffered >= XLSX_CHUNK_SIZE else b''
+
+    def _close_stream(self, writer: XlsxStreamWriter, sheets: List[tuple]) -> bytes:
+        """Write the closing (name, header, rows) sheets and the workbook parts in a worker thread"""
+        for name, header, rows in sheets:
+            writer.write_sheet(name, header, rows)
+        return writer.close()
+
+    def _order_period(self, start_time: Optional[datetime], end_time: Optional[datetime]) -> str:
+        """Describe the order time range an export covers"""
+        if not start_time and not end_time:
+            return 'All orders'
+        start = start_time.strftime('%Y-%m-%d %H:%M') if start_time else 'the beginning'
+        end = end_time.strftime('%Y-%m-%d %H:%M') if end_time else 'now'
+        return f"Orders placed from {start} to {end}"
+
+    def _analysis_period(self, price_analysis: dict) -> str:
+        """Describe the date range a price analysis covers"""
+        start_date = price_analysis.get('start_date')
+        end_date = price_analysis.get('end_date')
+        if not start_date and not end_date:
+            return 'All completed orders'
+        return f"Completed orders from {start_date or 'the beginning'} to {end_date or 'today'}"
+    
+    def get_filename(self, report_type: str, extension: str = 'xlsx') -> str:
         """Generate filename with timestamp"""
         current_time = datetime.now(EASTERN_TZ)
         timestamp = current_time.strftime('%Y%m%d_%H%M%S')
-        return f"{report_type}_report_{timestamp}.xlsx"
\ No newline at end of file
+        return f"{report_type}_report_{timestamp}.{extension}"
\ No newline at end of file
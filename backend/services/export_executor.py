@@ -0,0 +1,132 @@
+from typing import Callable, Optional
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from services.excel_service import ExcelService
+import asyncio
+import logging
+import os
+import time
+
+logger = logging.getLogger(__name__)
+
+# Worker processes (or threads) rendering export files
+EXPORT_WORKERS = int(os.getenv('EXPORT_WORKERS', '2'))
+
+# 'process' keeps pandas/openpyxl off the server's GIL; 'thread' avoids forking
+EXPORT_EXECUTOR = os.getenv('EXPORT_EXECUTOR', 'process')
+
+# Exports allowed to wait for a worker before new ones are refused
+EXPORT_MAX_QUEUE = int(os.getenv('EXPORT_MAX_QUEUE', '16'))
+
+class ExportQueueFull(Exception):
+    """Raised when too many exports are already waiting for a worker"""
+
+def _render(method: str, payload) -> bytes:
+    """Run an ExcelService method in a worker and return the finished file"""
+    return getattr(ExcelService(), method)(payload).getvalue()
+
+class ExportExecutor:
+    """Runs export file generation in a bounded worker pool instead of on the event loop.
+
+    At most ``workers`` exports render at once; further exports wait their
+    turn without blocking other requests, and once ``max_queue`` are waiting
+    new ones are refused with ExportQueueFull. ``metrics`` reports the queue
+    depth along with wait and render times.
+    """
+    _instance = None
+
+    def __new__(cls):
+        if cls._instance is None:
+            cls._instance = super(ExportExecutor, cls).__new__(cls)
+        return cls._instance
+
+    def __init__(self):
+        # Initialize only once
+        if not hasattr(self, 'initialized'):
+            self.initialized = True
+            self.workers = max(1, EXPORT_WORKERS)
+            self.kind = EXPORT_EXECUTOR
+            self.max_queue = EXPORT_MAX_QUEUE
+            self._executor: Optional[Executor] = None
+            self._slots: Optional[asyncio.Semaphore] = None
+            self._loop = None
+            self.running = 0
+            self.queued = 0
+            self.max_queued = 0
+            self.completed = 0
+            self.failed = 0
+            self.rejected = 0
+            self.wait_seconds = 0.0
+            self.render_seconds = 0.0
+
+    def _get_executor(self) -> Executor:
+        if self._executor is None:
+            if self.kind == 'thread':
+                self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix='export')
+            else:
+                self._executor = ProcessPoolExecutor(max_workers=self.workers)
+        return self._executor
+
+    def _get_slots(self) -> asyncio.Semaphore:
+        # A semaphore belongs to one event loop; tests and reloads start new ones
+        loop = asyncio.get_running_loop()
+        if self._slots is None or self._loop is not loop:
+            self._slots = asyncio.Semaphore(self.workers)
+            self._loop = loop
+        return self._slots
+
+    async def render(self, method: str, payload) -> bytes:
+        """Render ``ExcelService.<method>(payload)`` in the pool and return the file bytes"""
+        return await self.run(_render, method, payload)
+
+    async def run(self, func: Callable, *args):
+        """Run a module-level function in the pool once a slot is free"""
+        if self.queued >= self.max_queue:
+            self.rejected += 1
+            raise ExportQueueFull(f"{self.queued} exports already waiting")
+
+        slots = self._get_slots()
+        queued_at = time.perf_counter()
+        self.queued += 1
+        self.max_queued = max(self.max_queued, self.queued)
+        try:
+            await slots.acquire()
+        finally:
+            self.queued -= 1
+
+        started_at = time.perf_counter()
+        self.wait_seconds += started_at - queued_at
+        self.running += 1
+        try:
+            result = await asyncio.get_running_loop().run_in_executor(self._get_executor(), func, *args)
+            self.completed += 1
+            return result
+        except Exception as e:
+            self.failed += 1
+            logger.error(f"Export {func.__name__} failed: {str(e)}")
+            raise
+        finally:
+            self.running -= 1
+            self.render_seconds += time.perf_counter() - started_at
+            slots.release()
+
+    def metrics(self) -> dict:
+        """Queue depth, in-flight exports and average wait/render times"""
+        finished = self.completed + self.failed
+        return {
+            'executor': self.kind,
+            'workers': self.workers,
+            'running': self.running,
+            'queued': self.queued,
+            'max_queued': self.max_queued,
+            'max_queue': self.max_queue,
+            'completed': self.completed,
+            'failed': self.failed,
+            'rejected': self.rejected,
+            'average_wait_ms': round(self.wait_seconds / finished * 1000, 1) if finished else 0,
+            'average_render_ms': round(self.render_seconds / finished * 1000, 1) if finished else 0
+        }
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
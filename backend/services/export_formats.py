@@ -0,0 +1,182 @@
+from typing import AsyncIterable, AsyncIterator, Callable, List, Mapping, Sequence
+from datetime import datetime
+from services.report_rows import LINE_ITEM_COLUMNS, ORDER_COLUMNS, REPORT_ROWS, line_item_row, order_row
+from services.xlsx_stream import ChunkSink
+import asyncio
+import csv
+import io
+import logging
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # optional: XLSX and CSV exports work without it
+    pa = None
+    pq = None
+
+logger = logging.getLogger(__name__)
+
+# Media type and file extension per export format
+EXPORT_FORMATS = {
+    'xlsx': ('application/vnd.openxmlformats-officedocument.spreadsheetml.sheet', 'xlsx'),
+    'csv': ('text/csv; charset=utf-8', 'csv'),
+    'parquet': ('application/vnd.apache.parquet', 'parquet'),
+    'arrow': ('application/vnd.apache.arrow.stream', 'arrows'),
+}
+
+# Query parameter pattern accepting any of EXPORT_FORMATS
+EXPORT_FORMAT_PATTERN = f"^({'|'.join(EXPORT_FORMATS)})$"
+
+# Formats written with pyarrow
+COLUMNAR_FORMATS = ('parquet', 'arrow')
+
+# Rows encoded as CSV per hand-off to a worker thread, and per chunk of the response
+CSV_BATCH_ROWS = 1000
+
+# Rows per Parquet row group / Arrow record batch when streaming
+EXPORT_BATCH_ROWS = 50000
+
+class ExportFormatUnavailable(Exception):
+    """Raised for a columnar format when pyarrow is not installed"""
+
+def check_format(export_format: str):
+    if export_format in COLUMNAR_FORMATS and pa is None:
+        raise ExportFormatUnavailable(f"{export_format} exports need pyarrow installed")
+
+def _csv_value(value):
+    if isinstance(value, datetime):
+        return value.isoformat(sep=' ', timespec='seconds')
+    return value
+
+def render_rows(rows: List[dict], export_format: str) -> bytes:
+    """Write report rows, keyed by the Excel column names, as one CSV, Parquet or Arrow file"""
+    check_format(export_format)
+    if export_format == 'csv':
+        output = io.StringIO()
+        writer = csv.writer(output)
+        if rows:
+            writer.writerow(rows[0].keys())
+        writer.writerows([_csv_value(value) for value in row.values()] for row in rows)
+        return output.getvalue().encode('utf-8')
+
+    table = pa.Table.from_pylist(rows)
+    sink = pa.BufferOutputStream()
+    if export_format == 'parquet':
+        pq.write_table(table, sink)
+    else:
+        with pa.ipc.new_stream(sink, table.schema) as writer:
+            writer.write_table(table)
+    return sink.getvalue().to_pybytes()
+
+def render_report(report_type: str, payload, export_format: str) -> bytes:
+    """Render an aggregate report (see REPORT_ROWS) in a non-Excel format; runs in the export pool"""
+    return render_rows(REPORT_ROWS[report_type](payload), export_format)
+
+def order_schema():
+    """Arrow schema of the order-level export"""
+    return pa.schema([
+        ('Order Number', pa.string()),
+        ('Order Time', pa.timestamp('us')),
+        ('Customer Name', pa.string()),
+        ('Payment Method', pa.string()),
+        ('Status', pa.string()),
+        ('Items', pa.string()),
+        ('Total Items', pa.int32()),
+        ('Total Amount ($)', pa.decimal128(10, 2)),
+        ('Delivery Minutes', pa.int32()),
+        ('Completed Time', pa.timestamp('us')),
+    ])
+
+def line_item_schema():
+    """Arrow schema of the line-item export"""
+    return pa.schema([
+        ('Order Number', pa.string()),
+        ('Order Time', pa.timestamp('us')),
+        ('Customer Name', pa.string()),
+        ('Payment Method', pa.string()),
+        ('Order Status', pa.string()),
+        ('Item Name', pa.string()),
+        ('Quantity', pa.int32()),
+        ('Unit Price ($)', pa.decimal128(10, 2)),
+        ('Subtotal ($)', pa.decimal128(10, 2)),
+        ('Cooking Status', pa.string()),
+        ('Completed Time', pa.timestamp('us')),
+    ])
+
+def _record_batch(rows: List[tuple], schema) -> "pa.RecordBatch":
+    """Transpose row tuples into a record batch with the given schema"""
+    columns = zip(*rows)
+    return pa.RecordBatch.from_arrays([pa.array(column, type=field.type) for column, field in zip(columns, schema)], schema=schema)
+
+def _csv_chunk(rows: List[Mapping], to_row: Callable[[Mapping], tuple], header: Sequence[str] = ()) -> bytes:
+    """Encode a batch of database rows, optionally after a header, as CSV"""
+    output = io.StringIO()
+    writer = csv.writer(output)
+    if header:
+        writer.writerow(header)
+    # Times are whole seconds, so str() formats them
+    writer.writerows(map(to_row, rows))
+    return output.getvalue().encode('utf-8')
+
+def _write_record_batch(writer, rows: List[Mapping], to_row: Callable[[Mapping], tuple], schema, sink: ChunkSink) -> bytes:
+    """Convert a batch of database rows into one row group or record batch; returns the bytes written"""
+    writer.write_batch(_record_batch([to_row(row) for row in rows], schema))
+    return sink.take()
+
+def stream_order_rows(rows: AsyncIterable, export_format: str) -> AsyncIterator[bytes]:
+    """Stream ``OrderService.iter_order_rows`` as CSV, Parquet or Arrow IPC chunks"""
+    return _stream_rows(rows, export_format, ORDER_COLUMNS, order_row, order_schema, 'order')
+
+def stream_line_item_rows(rows: AsyncIterable, export_format: str) -> AsyncIterator[bytes]:
+    """Stream ``OrderService.iter_order_line_rows`` as CSV, Parquet or Arrow IPC chunks"""
+    return _stream_rows(rows, export_format, LINE_ITEM_COLUMNS, line_item_row, line_item_schema, 'line item')
+
+async def _stream_rows(
+    rows: AsyncIterable,
+    export_format: str,
+    columns: Sequence[str],
+    to_row: Callable[[Mapping], tuple],
+    schema_of: Callable,
+    name: str
+) -> AsyncIterator[bytes]:
+    """Stream database rows, converted with ``to_row``, as CSV, Parquet or Arrow IPC chunks.
+
+    CSV goes out every CSV_BATCH_ROWS rows. Parquet and Arrow are written
+    one row group or record batch of EXPORT_BATCH_ROWS rows at a time, so
+    memory is bounded by one batch. Each batch is encoded in a worker
+    thread, keeping the event loop free for other requests.
+    """
+    check_format(export_format)
+    try:
+        if export_format == 'csv':
+            header, batch = columns, []
+            async for row in rows:
+                batch.append(row)
+                if len(batch) >= CSV_BATCH_ROWS:
+                    yield await asyncio.to_thread(_csv_chunk, batch, to_row, header)
+                    header, batch = (), []
+            if batch or header:
+                yield await asyncio.to_thread(_csv_chunk, batch, to_row, header)
+            return
+
+        schema = schema_of()
+        sink = ChunkSink()
+        if export_format == 'parquet':
+            writer = pq.ParquetWriter(pa.PythonFile(sink, mode='w'), schema)
+        else:
+            writer = pa.ipc.new_stream(pa.PythonFile(sink, mode='w'), schema)
+
+        batch = []
+        async for row in rows:
+            batch.append(row)
+            if len(batch) >= EXPORT_BATCH_ROWS:
+                yield await asyncio.to_thread(_write_record_batch, writer, batch, to_row, schema, sink)
+                batch = []
+        if batch:
+            yield await asyncio.to_thread(_write_record_batch, writer, batch, to_row, schema, sink)
+        await asyncio.to_thread(writer.close)
+        yield sink.take()
+
+    except Exception as e:
+        logger.error(f"Error streaming {export_format} {name} export: {str(e)}")
+        raise e
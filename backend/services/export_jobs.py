@@ -0,0 +1,430 @@
+from typing import AsyncIterator, Dict, List, Optional
+from asyncpg import Pool
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from models.order import ExportJob, ExportJobCreate, EASTERN_TZ
+from services.excel_service import ExcelService
+from services.export_executor import ExportExecutor, ExportQueueFull
+from services.export_formats import EXPORT_FORMATS, check_format, render_report, stream_order_rows
+import asyncio
+import logging
+import os
+import tempfile
+import time
+import uuid
+
+logger = logging.getLogger(__name__)
+
+# Jobs exporting at the same time
+EXPORT_JOB_WORKERS = int(os.getenv('EXPORT_JOB_WORKERS', '2'))
+
+# Jobs allowed to wait for a worker before new ones are refused
+EXPORT_JOB_MAX_QUEUE = int(os.getenv('EXPORT_JOB_MAX_QUEUE', '20'))
+
+# Minutes a finished job and its file are kept
+EXPORT_JOB_TTL_MINUTES = int(os.getenv('EXPORT_JOB_TTL_MINUTES', '60'))
+
+# Where finished export files are written; every API worker must see the same directory
+EXPORT_JOB_DIR = os.getenv('EXPORT_JOB_DIR') or os.path.join(tempfile.gettempdir(), 'export_jobs')
+
+# Seconds between sweeps for expired jobs
+EXPORT_JOB_SWEEP_SECONDS = 60
+
+# Minutes a queued or running job can go without a heartbeat before its worker is taken to have
+# died and the job is marked failed; workers refresh their jobs' heartbeats every sweep
+EXPORT_JOB_STALE_MINUTES = int(os.getenv('EXPORT_JOB_STALE_MINUTES', '10'))
+
+# Seconds between saves of a running job's progress; a cancel from another worker is noticed at the next save
+EXPORT_JOB_SAVE_SECONDS = 1.0
+
+# File name and ExcelService method per aggregate report
+REPORT_EXPORTS = {
+    'payment': ('payment_methods', 'create_payment_report_excel'),
+    'items': ('menu_items', 'create_item_report_excel'),
+    'price_analysis': ('price_analysis', 'create_price_analysis_excel'),
+}
+
+@dataclass
+class ExportJobState:
+    id: str
+    owner: str
+    request: ExportJobCreate
+    order_service: object
+    status: str = 'queued'
+    progress: float = 0.0
+    rows_written: int = 0
+    total_rows: Optional[int] = None
+    size: Optional[int] = None
+    error: Optional[str] = None
+    path: Optional[str] = None
+    filename: Optional[str] = None
+    created_at: datetime = field(default_factory=lambda: datetime.now(EASTERN_TZ))
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+    expires_at: Optional[datetime] = None
+    task: Optional[asyncio.Task] = None
+
+    @classmethod
+    def from_row(cls, row) -> "ExportJobState":
+        def eastern(value: Optional[datetime]) -> Optional[datetime]:
+            return value.astimezone(EASTERN_TZ) if value is not None else None
+
+        return cls(
+            id=row['id'],
+            owner=row['owner'],
+            request=ExportJobCreate(report=row['report'], format=row['format']),
+            order_service=None,
+            status=row['status'],
+            progress=row['progress'],
+            rows_written=row['rows_written'],
+            total_rows=row['total_rows'],
+            size=row['size_bytes'],
+            error=row['error'],
+            path=row['path'],
+            filename=row['filename'],
+            created_at=eastern(row['created_at']),
+            started_at=eastern(row['started_at']),
+            finished_at=eastern(row['finished_at']),
+            expires_at=eastern(row['expires_at'])
+        )
+
+    @property
+    def finished(self) -> bool:
+        return self.status in ('completed', 'failed', 'cancelled')
+
+    @property
+    def media_type(self) -> str:
+        return EXPORT_FORMATS[self.request.format][0]
+
+    def to_model(self) -> ExportJob:
+        return ExportJob(
+            id=self.id,
+            report=self.request.report,
+            format=self.request.format,
+            status=self.status,
+            progress=round(self.progress, 4),
+            rowsWritten=self.rows_written,
+            totalRows=self.total_rows,
+            sizeBytes=self.size,
+            error=self.error,
+            createdAt=self.created_at,
+            startedAt=self.started_at,
+            finishedAt=self.finished_at,
+            expiresAt=self.expires_at
+        )
+
+class ExportJobManager:
+    """Runs exports in the background so downloads never wait on a proxy timeout.
+
+    Submitted jobs wait in a bounded queue for one of ``workers`` worker
+    tasks; a full queue refuses new jobs with ExportQueueFull. Aggregate
+    reports are rendered with the ExcelService builders in the export pool;
+    raw orders are streamed from a cursor into the file with progress
+    counted against the number of matching orders. Finished jobs and their
+    files are removed once they expire.
+
+    A job runs in the worker that accepted it, but its state lives in the
+    export_jobs table and its file in the shared EXPORT_JOB_DIR, so status,
+    download and cancel work from any worker. Jobs left queued or running
+    by a worker that died are marked failed once their heartbeat goes stale.
+    """
+    _instance = None
+    _pool = None
+
+    def __new__(cls):
+        if cls._instance is None:
+            cls._instance = super(ExportJobManager, cls).__new__(cls)
+        return cls._instance
+
+    def __init__(self):
+        # Initialize only once
+        if not hasattr(self, 'initialized'):
+            self.initialized = True
+            self.workers = max(1, EXPORT_JOB_WORKERS)
+            self.max_queue = EXPORT_JOB_MAX_QUEUE
+            self.ttl = timedelta(minutes=EXPORT_JOB_TTL_MINUTES)
+            self.stale_after = timedelta(minutes=EXPORT_JOB_STALE_MINUTES)
+            self.directory = EXPORT_JOB_DIR
+            self.excel_service = ExcelService()
+            self.export_executor = ExportExecutor()
+            # Jobs queued or running in this worker
+            self.jobs: Dict[str, ExportJobState] = {}
+            self._queue: Optional[asyncio.Queue] = None
+            self._tasks: List[asyncio.Task] = []
+            self._loop = None
+
+    @classmethod
+    def set_pool(cls, pool: Pool):
+        """Set the database pool job state is kept in"""
+        cls._pool = pool
+
+    @property
+    def pool(self) -> Pool:
+        if self._pool is None:
+            raise RuntimeError("Database pool not set. Call ExportJobManager.set_pool() first.")
+        return self._pool
+
+    def _ensure_started(self):
+        # Worker tasks belong to one event loop; tests and reloads start new ones
+        loop = asyncio.get_running_loop()
+        if self._loop is loop:
+            return
+        os.makedirs(self.directory, exist_ok=True)
+        self._loop = loop
+        self._queue = asyncio.Queue(maxsize=self.max_queue)
+        self._tasks = [asyncio.ensure_future(self._worker()) for _ in range(self.workers)]
+        self._tasks.append(asyncio.ensure_future(self._sweep()))
+
+    async def submit(self, request: ExportJobCreate, owner: str, order_service) -> ExportJobState:
+        """Queue an export; raises ExportQueueFull when too many are waiting"""
+        check_format(request.format)
+        self._ensure_started()
+        if self._queue.full():
+            raise ExportQueueFull(f"{self._queue.qsize()} export jobs already waiting")
+        job = ExportJobState(id=str(uuid.uuid4()), owner=owner, request=request, order_service=order_service)
+        async with self.pool.acquire() as conn:
+            await conn.execute("""
+                INSERT INTO export_jobs (id, owner, report, format, created_at)
+                VALUES ($1, $2, $3, $4, $5)
+            """, job.id, owner, request.report, request.format, job.created_at)
+        try:
+            self._queue.put_nowait(job)
+        except asyncio.QueueFull:
+            # Filled up while the job was being recorded
+            await self._remove(job)
+            raise ExportQueueFull(f"{self._queue.qsize()} export jobs already waiting")
+        self.jobs[job.id] = job
+        return job
+
+    async def get(self, job_id: str, owner: str) -> Optional[ExportJobState]:
+        """A job of this owner, or None"""
+        job = self.jobs.get(job_id)
+        if job is None or job.status != 'running':
+            # Progress of a job running here is newer in memory; anything else is read back
+            async with self.pool.acquire() as conn:
+                row = await conn.fetchrow("SELECT * FROM export_jobs WHERE id = $1", job_id)
+            job = ExportJobState.from_row(row) if row is not None else None
+        return job if job is not None and job.owner == owner else None
+
+    async def cancel(self, job_id: str, owner: str) -> Optional[ExportJobState]:
+        """Cancel a queued or running job, or delete a finished one and its file.
+
+        A job running in another worker is only flagged here; it stops at its
+        next progress save, within EXPORT_JOB_SAVE_SECONDS.
+        """
+        job = await self.get(job_id, owner)
+        if job is None:
+            return None
+        local = self.jobs.get(job_id)
+        if local is not None and local.task is not None and not local.task.done():
+            local.task.cancel()
+            await asyncio.wait([local.task])
+            if not local.finished:
+                # Cancelled before _run got to start, so nothing recorded it
+                await self._finish(local, 'cancelled')
+            return local
+        if job.finished:
+            await self._remove(job)
+            return job
+
+        now = datetime.now(EASTERN_TZ)
+        async with self.pool.acquire() as conn:
+            # A queued job is cancelled outright; the worker holding it skips it when it comes up
+            row = await conn.fetchrow("""
+                UPDATE export_jobs SET
+                    cancel_requested = TRUE,
+                    status = CASE WHEN status = 'queued' THEN 'cancelled' ELSE status END,
+                    finished_at = CASE WHEN status = 'queued' THEN $2 ELSE finished_at END,
+                    expires_at = CASE WHEN status = 'queued' THEN $3 ELSE expires_at END
+                WHERE id = $1
+                RETURNING *
+            """, job_id, now, now + self.ttl)
+        return ExportJobState.from_row(row) if row is not None else None
+
+    async def _claim(self, job: ExportJobState) -> bool:
+        """Mark a queued job running; False if it was cancelled meanwhile"""
+        job.started_at = datetime.now(EASTERN_TZ)
+        async with self.pool.acquire() as conn:
+            claimed = await conn.fetchval("""
+                UPDATE export_jobs SET status = 'running', started_at = $2, heartbeat_at = $2
+                WHERE id = $1 AND status = 'queued'
+                RETURNING id
+            """, job.id, job.started_at)
+        return claimed is not None
+
+    async def _worker(self):
+        while True:
+            job = await self._queue.get()
+            try:
+                claimed = await self._claim(job)
+            except Exception as e:
+                logger.error(f"Error starting export job {job.id}: {str(e)}")
+                claimed = False
+            if not claimed:
+                self.jobs.pop(job.id, None)
+                continue
+            job.status = 'running'
+            job.task = asyncio.ensure_future(self._run(job))
+            try:
+                # wait() does not raise when only the job is cancelled
+                await asyncio.wait([job.task])
+            except asyncio.CancelledError:
+                job.task.cancel()
+                raise
+
+    async def _run(self, job: ExportJobState):
+        name, _ = REPORT_EXPORTS.get(job.request.report, ('orders', None))
+        extension = EXPORT_FORMATS[job.request.format][1]
+        job.filename = self.excel_service.get_filename(name, extension)
+        job.path = os.path.join(self.directory, f"{job.id}.{extension}")
+        try:
+            if job.request.report == 'orders':
+                await self._write_orders(job)
+            else:
+                await self._write_report(job)
+            job.size = os.path.getsize(job.path)
+            job.progress = 1.0
+            await self._finish(job, 'completed')
+        except asyncio.CancelledError:
+            self._delete_file(job.path)
+            await self._finish(job, 'cancelled')
+        except Exception as e:
+            logger.error(f"Export job {job.id} ({job.request.report}) failed: {str(e)}")
+            self._delete_file(job.path)
+            job.error = str(e)
+            await self._finish(job, 'failed')
+
+    async def _write_report(self, job: ExportJobState):
+        request = job.request
+        if request.report == 'price_analysis':
+            params = {'start_date': request.startDate, 'end_date': request.endDate}
+        else:
+            params = {'start_time': request.startTime, 'end_time': request.endTime}
+            if request.report == 'items':
+                params['recent_limit'] = request.recentCustomers
+        payload = await job.order_service.get_cached_report(request.report, **params)
+        job.progress = 0.5
+        await self._save_progress(job)
+
+        if request.format == 'xlsx':
+            content = await self.export_executor.render(REPORT_EXPORTS[request.report][1], payload)
+        else:
+            content = await self.export_executor.run(render_report, request.report, payload, request.format)
+        await asyncio.to_thread(self._write_file, job.path, content)
+
+    def _write_file(self, path: str, content: bytes):
+        with open(path, 'wb') as f:
+            f.write(content)
+
+    async def _write_orders(self, job: ExportJobState):
+        request = job.request
+        job.total_rows = await job.order_service.count_orders(request.startTime, request.endTime)
+        rows = self._count_rows(job, job.order_service.iter_order_rows(request.startTime, request.endTime))
+        if request.format == 'xlsx':
+            chunks = self.excel_service.stream_order_excel(rows, request.startTime, request.endTime)
+        else:
+            chunks = stream_order_rows(rows, request.format)
+        with open(job.path, 'wb') as f:
+            async for chunk in chunks:
+                # Chunks are 64 KiB or more, worth a thread hop to keep the loop free
+                await asyncio.to_thread(f.write, chunk)
+
+    async def _count_rows(self, job: ExportJobState, rows) -> AsyncIterator:
+        saved_at = time.monotonic()
+        async for row in rows:
+            job.rows_written += 1
+            if job.total_rows:
+                # Orders placed after the count keep progress just below 1 until the file is done
+                job.progress = min(job.rows_written / job.total_rows, 0.99)
+            if time.monotonic() - saved_at >= EXPORT_JOB_SAVE_SECONDS:
+                await self._save_progress(job)
+                saved_at = time.monotonic()
+            yield row
+
+    async def _save_progress(self, job: ExportJobState):
+        """Record a running job's progress; raises CancelledError if another worker asked to cancel it"""
+        async with self.pool.acquire() as conn:
+            cancel_requested = await conn.fetchval("""
+                UPDATE export_jobs SET progress = $2, rows_written = $3, total_rows = $4, heartbeat_at = CURRENT_TIMESTAMP
+                WHERE id = $1
+                RETURNING cancel_requested
+            """, job.id, job.progress, job.rows_written, job.total_rows)
+        if cancel_requested:
+            raise asyncio.CancelledError()
+
+    async def _finish(self, job: ExportJobState, status: str):
+        job.status = status
+        job.finished_at = datetime.now(EASTERN_TZ)
+        job.expires_at = job.finished_at + self.ttl
+        try:
+            async with self.pool.acquire() as conn:
+                await conn.execute("""
+                    UPDATE export_jobs SET
+                        status = $2, progress = $3, rows_written = $4, total_rows = $5, size_bytes = $6,
+                        error = $7, filename = $8, path = $9, finished_at = $10, expires_at = $11
+                    WHERE id = $1
+                """, job.id, job.status, job.progress, job.rows_written, job.total_rows, job.size,
+                    job.error, job.filename, job.path, job.finished_at, job.expires_at)
+        finally:
+            self.jobs.pop(job.id, None)
+
+    def _delete_file(self, path: Optional[str]):
+        if path:
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+
+    async def _remove(self, job: ExportJobState):
+        async with self.pool.acquire() as conn:
+            await conn.execute("DELETE FROM export_jobs WHERE id = $1", job.id)
+        self._delete_file(job.path)
+        self.jobs.pop(job.id, None)
+
+    async def sweep(self, now: Optional[datetime] = None):
+        """Remove finished jobs past their expiry along with their files, and fail jobs whose worker died"""
+        now = now or datetime.now(EASTERN_TZ)
+        local = list(self.jobs)
+        async with self.pool.acquire() as conn:
+            # Each expired row is deleted, and its file removed, by exactly one worker
+            rows = await conn.fetch("DELETE FROM export_jobs WHERE expires_at <= $1 RETURNING path", now)
+            if local:
+                await conn.execute("UPDATE export_jobs SET heartbeat_at = $2 WHERE id = ANY($1::text[])", local, now)
+            stale = await conn.fetch("""
+                UPDATE export_jobs SET
+                    status = 'failed', error = 'Export worker stopped before the job finished',
+                    finished_at = $1, expires_at = $2
+                WHERE status IN ('queued', 'running') AND heartbeat_at <= $3 AND NOT id = ANY($4::text[])
+                RETURNING id, format
+            """, now, now + self.ttl, now - self.stale_after, local)
+        for row in rows:
+            self._delete_file(row['path'])
+        for row in stale:
+            # Whatever the dead worker had written of the file
+            logger.error(f"Export job {row['id']} failed: its worker stopped before finishing it")
+            self._delete_file(os.path.join(self.directory, f"{row['id']}.{EXPORT_FORMATS[row['format']][1]}"))
+
+    async def _sweep(self):
+        while True:
+            await asyncio.sleep(EXPORT_JOB_SWEEP_SECONDS)
+            try:
+                await self.sweep()
+            except Exception as e:
+                logger.error(f"Error sweeping export jobs: {str(e)}")
+
+    async def stop(self):
+        """Cancel the workers and this worker's jobs; finished files stay until they expire"""
+        for task in self._tasks:
+            task.cancel()
+        self._tasks = []
+        self._loop = None
+        running = [job.task for job in self.jobs.values() if job.task is not None and not job.task.done()]
+        for task in running:
+            task.cancel()
+        if running:
+            await asyncio.wait(running)
+        for job in list(self.jobs.values()):
+            try:
+                await self._finish(job, 'cancelled')
+            except Exception as e:
+                logger.error(f"Error cancelling export job {job.id}: {str(e)}")
@@ -0,0 +1,238 @@
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+from collections import OrderedDict, deque
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from models.order import EASTERN_TZ
+import logging
+import os
+
+logger = logging.getLogger(__name__)
+
+# Prep time per unit assumed for an item until a cooking -> finished transition is observed
+DEFAULT_PREP_MINUTES = float(os.getenv('KITCHEN_DEFAULT_PREP_MINUTES', '5'))
+
+# Weight of the newest observation in the per-item prep time average
+PREP_RATE_ALPHA = 0.3
+
+# Shorter cooking -> finished spans are status clicks made after the fact, not prep times
+MIN_PREP_SAMPLE_MINUTES = 0.25
+
+# Finished units are remembered this long for throughput figures
+THROUGHPUT_WINDOW = timedelta(hours=1)
+
+@dataclass
+class ItemQueue:
+    """FIFO of pending units for one menu item, tracked with cumulative counters"""
+    enqueued: int = 0  # units ever queued
+    drained: int = 0  # units ever finished or removed
+    prep_minutes: float = DEFAULT_PREP_MINUTES  # EWMA of minutes per unit
+    samples: int = 0
+    last_drained_at: Optional[datetime] = None
+    # Lines not started yet and lines being cooked, oldest first, keyed by order id
+    waiting: "OrderedDict[str, QueuedLine]" = field(default_factory=OrderedDict)
+    cooking: "OrderedDict[str, QueuedLine]" = field(default_factory=OrderedDict)
+    version: int = 0  # KitchenQueue change counter at the last change to waiting
+    # (finished at, units) within THROUGHPUT_WINDOW of the latest finish
+    finished: deque = field(default_factory=deque)
+
+    @property
+    def pending(self) -> int:
+        return self.enqueued - self.drained
+
+    def finished_since(self, since: datetime) -> int:
+        """Units finished at or after ``since`` (within THROUGHPUT_WINDOW)"""
+        return sum(units for at, units in self.finished if at >= since)
+
+@dataclass
+class QueuedLine:
+    """One item line of a queued order"""
+    order_id: str
+    quantity: int
+    end: int  # ItemQueue.enqueued right after this line was queued
+    status: str = 'not started'
+    cooking_since: Optional[datetime] = None
+
+@dataclass
+class QueuedOrder:
+    enqueued_at: datetime
+    order_number: Optional[str] = None
+    lines: Dict[str, QueuedLine] = field(default_factory=dict)
+
+class KitchenQueue:
+    """Per-item kitchen queues and prep-rate estimates behind order ETAs.
+
+    Each item keeps cumulative enqueued/drained unit counters. A queued order
+    line remembers the enqueued counter at its own end, so the units still
+    ahead of it (itself included) are ``end - drained``. That gives an item's
+    ready time in O(1) and an order's ETA in O(items), without touching other
+    orders as the queue drains.
+
+    Prep time per unit is an exponentially weighted average of the observed
+    cooking -> finished durations, divided by the line quantity. The queue is
+    per process; startup rebuilds it from the pending orders.
+    """
+    _instance = None
+
+    def __new__(cls):
+        if cls._instance is None:
+            cls._instance = super(KitchenQueue, cls).__new__(cls)
+        return cls._instance
+
+    def __init__(self):
+        # Initialize only once
+        if not hasattr(self, 'initialized'):
+            self.initialized = True
+            self.items: Dict[str, ItemQueue] = {}
+            self.orders: Dict[str, QueuedOrder] = {}
+            self.changes = 0
+            # Called with the item name after every change to that item's queue
+            self.listeners: List[Callable[[str], None]] = []
+
+    def _now(self) -> datetime:
+        return datetime.now(EASTERN_TZ)
+
+    def _queue(self, item_name: str) -> ItemQueue:
+        if item_name not in self.items:
+            self.items[item_name] = ItemQueue()
+        return self.items[item_name]
+
+    def enqueue(
+        self,
+        order_id: str,
+        lines: Iterable[Tuple[str, int]],
+        at: Optional[datetime] = None,
+        statuses: Optional[Dict[str, str]] = None,
+        order_number: Optional[str] = None
+    ) -> datetime:
+        """Queue an order's (item name, quantity) lines behind the pending ones; returns its ETA"""
+        at = at or self._now()
+        order = QueuedOrder(enqueued_at=at, order_number=order_number)
+        # Repeated lines for one item are cooked as one line of their total quantity
+        quantities: Dict[str, int] = {}
+        for item_name, quantity in lines:
+            quantities[item_name] = quantities.get(item_name, 0) + quantity
+        for item_name, quantity in quantities.items():
+            line = order.lines[item_name] = QueuedLine(order_id=order_id, quantity=quantity, end=0, status='finished')
+            status = (statuses or {}).get(item_name, 'not started')
+            if status != 'finished':
+                self._push(item_name, line, status, at)
+                # When cooking started is unknown here, so it can't be used as a prep time sample
+                line.cooking_since = None
+        self.orders[order_id] = order
+        return self.eta(order_id)
+
+    def _push(self, item_name: str, line: QueuedLine, status: str, at: datetime):
+        queue = self._queue(item_name)
+        queue.enqueued += line.quantity
+        line.end = queue.enqueued
+        self._set_status(item_name, line, status, at)
+
+    def _drain(self, item_name: str, line: QueuedLine, at: datetime):
+        queue = self.items[item_name]
+        queue.drained += line.quantity
+        queue.last_drained_at = at
+        queue.finished.append((at, line.quantity))
+        while queue.finished and queue.finished[0][0] < at - THROUGHPUT_WINDOW:
+            queue.finished.popleft()
+        self._set_status(item_name, line, 'finished', at)
+
+    def _set_status(self, item_name: str, line: QueuedLine, status: str, at: datetime):
+        queue = self.items[item_name]
+        line.status = status
+        line.cooking_since = at if status == 'cooking' else None
+        queue.cooking.pop(line.order_id, None)
+        if status == 'cooking':
+            queue.cooking[line.order_id] = line
+
+        if status == 'not started':
+            queue.waiting[line.order_id] = line
+            waiting_changed = True
+        else:
+            waiting_changed = queue.waiting.pop(line.order_id, None) is not None
+        if waiting_changed:
+            self.changes += 1
+            queue.version = self.changes
+
+        for listener in self.listeners:
+            try:
+                listener(item_name)
+            except Exception as e:
+                logger.error(f"Kitchen queue listener failed for {item_name}: {str(e)}")
+
+    def eta(self, order_id: str) -> Optional[datetime]:
+        """Current ETA of a queued order, or None if it is not queued"""
+        order = self.orders.get(order_id)
+        if order is None:
+            return None
+
+        ready = order.enqueued_at
+        for item_name, line in order.lines.items():
+            if line.status == 'finished':
+                continue
+            queue = self.items[item_name]
+            # Units ahead of (and including) this line, counted from the last unit that came off the queue
+            units = max(line.end - queue.drained, line.quantity)
+            started = max(order.enqueued_at, queue.last_drained_at or order.enqueued_at)
+            ready = max(ready, started + timedelta(minutes=units * queue.prep_minutes))
+        # An overdue order is expected any moment, not in the past
+        return max(ready, self._now())
+
+    def update_item_status(self, order_id: str, item_name: str, status: str, at: Optional[datetime] = None):
+        """Apply a cooking status change; finishing a line drains it and updates the item's prep rate"""
+        order = self.orders.get(order_id)
+        line = order.lines.get(item_name) if order else None
+        if line is None or line.status == status:
+            return
+
+        at = at or self._now()
+        if line.status == 'finished':
+            # A finished line was reopened; it goes to the back of the queue
+            self._push(item_name, line, status, at)
+        elif status == 'finished':
+            if line.cooking_since is not None:
+                minutes = (at - line.cooking_since).total_seconds() / 60
+                if minutes >= MIN_PREP_SAMPLE_MINUTES:
+                    self._observe(item_name, minutes / line.quantity)
+            self._drain(item_name, line, at)
+        else:
+            self._set_status(item_name, line, status, at)
+
+    def _observe(self, item_name: str, minutes_per_unit: float):
+        """Fold one observed prep time into the item's average"""
+        queue = self.items[item_name]
+        if queue.samples == 0:
+            queue.prep_minutes = minutes_per_unit
+        else:
+            queue.prep_minutes = PREP_RATE_ALPHA * minutes_per_unit + (1 - PREP_RATE_ALPHA) * queue.prep_minutes
+        queue.samples += 1
+
+    def remove(self, order_id: str, at: Optional[datetime] = None):
+        """Drop a completed, deleted or failed order and drain its unfinished lines"""
+        order = self.orders.pop(order_id, None)
+        if order is None:
+            return
+        at = at or self._now()
+        for item_name, line in order.lines.items():
+            if line.status != 'finished':
+                self._drain(item_name, line, at)
+
+    def waiting_lines(self, item_name: str) -> Iterable[QueuedLine]:
+        """Lines of an item that are not started yet, oldest first"""
+        queue = self.items.get(item_name)
+        return queue.waiting.values() if queue else ()
+
+    def snapshot(self) -> List[dict]:
+        """Pending units and prep estimates per item"""
+        return [
+            {
+                'item_name': item_name,
+                'pending_units': queue.pending,
+                'prep_minutes_per_unit': round(queue.prep_minutes, 2),
+                'samples': queue.samples
+            }
+            for item_name, queue in sorted(self.items.items())
+        ]
+
+    def clear(self):
+        self.items.clear()
+        self.orders.clear()
@@ -0,0 +1,136 @@
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+from collections import OrderedDict
+from bisect import bisect_left
+from models.menu import MenuItem
+import re
+
+# Where a word was found, best first when ranking
+FIELD_NAME = 0
+FIELD_CATEGORY = 1
+FIELD_CHEF = 2
+
+# Distinct queries whose results are kept per index
+SEARCH_CACHE_SIZE = 1024
+
+def words_of(text: Optional[str]) -> List[str]:
+    return re.findall(r'[a-z0-9]+', (text or '').lower())
+
+def trigrams(word: str) -> Set[str]:
+    """Trigrams of a word padded at the front only, so a partly typed word shares them"""
+    padded = '  ' + word
+    return {padded[i:i + 3] for i in range(len(word))}
+
+def max_typos(length: int) -> int:
+    """Edits tolerated in a query word of this length"""
+    return 0 if length <= 2 else 1 if length <= 5 else 2
+
+def prefix_distance(term: str, word: str, limit: int) -> Optional[Tuple[int, bool]]:
+    """Edit distance from term to the closest prefix of word, and whether that prefix is all of word.
+
+    Returns None once the distance must exceed limit.
+    """
+    if word.startswith(term):
+        return 0, len(word) == len(term)
+    previous = list(range(len(word) + 1))
+    for i, char in enumerate(term, start=1):
+        current = [i]
+        for j, other in enumerate(word, start=1):
+            current.append(min(
+                previous[j] + 1,
+                current[j - 1] + 1,
+                previous[j - 1] + (char != other)
+            ))
+        if min(current) > limit:
+            return None
+        previous = current
+    distance = min(previous)
+    return (distance, previous[-1] == distance) if distance <= limit else None
+
+class MenuSearchIndex:
+    """Typo-tolerant search-as-you-type over item names, categories and chefs.
+
+    Every query word must match a word of the item, either as a prefix or
+    within max_typos edits of one. Candidate words come from a trigram
+    index (or a sorted word list for one- and two-letter words), so only a
+    handful of edit distances are computed per query. Results rank by
+    fewest typos, then name over category over chef matches, then whole
+    words over prefixes.
+    """
+
+    def __init__(self, items: Iterable[MenuItem]):
+        self.items: Tuple[MenuItem, ...] = tuple(items)
+        self.postings: Dict[str, List[Tuple[int, int]]] = {}
+        for position, item in enumerate(self.items):
+            for field, text in (
+                (FIELD_NAME, item.name),
+                (FIELD_CATEGORY, item.category),
+                (FIELD_CHEF, item.chef),
+                (FIELD_CHEF, item.sousChef)
+            ):
+                for word in words_of(text):
+                    self.postings.setdefault(word, []).append((position, field))
+        self.words = sorted(self.postings)
+        self.trigrams: Dict[str, List[str]] = {}
+        for word in self.words:
+            for trigram in trigrams(word):
+                self.trigrams.setdefault(trigram, []).append(word)
+        self._cache: "OrderedDict[Tuple[str, int], List[MenuItem]]" = OrderedDict()
+
+    def _candidates(self, term: str) -> Iterable[str]:
+        if len(term) < 3:
+            start = bisect_left(self.words, term)
+            end = bisect_left(self.words, term[:-1] + chr(ord(term[-1]) + 1))
+            return self.words[start:end]
+        candidates = set()
+        for trigram in trigrams(term):
+            candidates.update(self.trigrams.get(trigram, ()))
+        return candidates
+
+    def _matches(self, term: str) -> Dict[int, Tuple[int, int, int]]:
+        """Best (typos, field, partial word) per item position for one query word"""
+        limit = max_typos(len(term))
+        best: Dict[int, Tuple[int, int, int]] = {}
+        for word in self._candidates(term):
+            found = prefix_distance(term, word, limit)
+            if found is None:
+                continue
+            distance, whole = found
+            for position, field in self.postings[word]:
+                match = (distance, field, int(not whole))
+                if match < best.get(position, (limit + 1,)):
+                    best[position] = match
+        return best
+
+    def search(self, query: str, limit: int = 20) -> List[MenuItem]:
+        """Items matching every word of the query, best first"""
+        terms = words_of(query)
+        if not terms:
+            return []
+        key = (' '.join(terms), limit)
+        cached = self._cache.get(key)
+        if cached is not None:
+            self._cache.move_to_end(key)
+            return list(cached)
+
+        scores: Optional[Dict[int, List[int]]] = None
+        for term in terms:
+            matches = self._matches(term)
+            if scores is None:
+                scores = {position: list(match) for position, match in matches.items()}
+            else:
+                scores = {
+                    position: [total + part for total, part in zip(score, matches[position])]
+                    for position, score in scores.items() if position in matches
+                }
+            if not scores:
+                break
+
+        ranked = sorted(
+            scores,
+            key=lambda position: (*scores[position], len(self.items[position].name), self.items[position].name)
+        )
+        results = [self.items[position] for position in ranked[:limit]]
+        self._cache[key] = results
+        if len(self._cache) > SEARCH_CACHE_SIZE:
+            self._cache.popitem(last=False)
+        return list(results)
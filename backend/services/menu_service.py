@@ -1,11 +1,107 @@
-from typing import List
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+from dataclasses import dataclass, field
+from types import MappingProxyType
+from models.menu import MenuItem, MenuItemChange, MenuItemUpsert, MenuResponse, MenuUpsertResult
+from models.order import EASTERN_TZ
+from services.menu_search import MenuSearchIndex
+from services.price_history import PriceHistoryIndex, PriceInterval
+from asyncpg import Connection, Pool
+from datetime import datetime
+from asyncpg.exceptions import NotNullViolationError
+from decimal import Decimal
+import asyncio
+import gzip
+import hashlib
 import logging
-from models.menu import MenuItem, MenuResponse
-from asyncpg import Pool
+import os
+import time
+
+try:
+    import brotli
+except ImportError:  # optional: the menu is then offered gzip-compressed or plain
+    brotli = None
 
 logger = logging.getLogger(__name__)
 
+# Seconds a menu snapshot is served before it is reloaded even without a change notification
+MENU_CACHE_TTL_SECONDS = float(os.getenv('MENU_CACHE_TTL_SECONDS', '300'))
+
+# Seconds clients and shared caches may reuse a menu response before revalidating it
+MENU_MAX_AGE_SECONDS = int(os.getenv('MENU_MAX_AGE_SECONDS', '60'))
+
+# Channel the menu_items trigger announces new menu versions on
+MENU_CHANNEL = 'menu_changed'
+
+# menu_items columns a change can touch, with their MenuItem field names
+MENU_COLUMNS = {
+    'name': 'name',
+    'chef': 'chef',
+    'sous_chef': 'sousChef',
+    'category': 'category',
+    'price': 'price',
+    'available': 'available',
+    'stock_quantity': 'stockQuantity',
+}
+
+def encode_menu(body: bytes) -> Dict[str, bytes]:
+    """The serialized menu per content coding; compressed once per menu version, at the highest level"""
+    bodies = {'identity': body, 'gzip': gzip.compress(body, compresslevel=9, mtime=0)}
+    if brotli is not None:
+        bodies['br'] = brotli.compress(body, quality=11)
+    return bodies
+
+def _plain(value):
+    # Prices come back as Decimal; report them as numbers like MenuItem does
+    return float(value) if isinstance(value, Decimal) else value
+
+@dataclass(frozen=True)
+class MenuSnapshot:
+    """Available menu items at one menu version, indexed for lookups; shared, never modified"""
+    version: int
+    items: Tuple[MenuItem, ...]
+    categories: Tuple[str, ...]
+    by_id: MappingProxyType
+    by_name: MappingProxyType  # lower-cased name
+    by_category: MappingProxyType
+    bodies: MappingProxyType  # content coding -> serialized MenuResponse
+    etag: str  # strong ETag of the JSON body; encoded bodies append the coding
+    search_index: MenuSearchIndex
+    price_history: PriceHistoryIndex  # every item's list prices over time, unavailable items included
+    loaded_at: float = field(default_factory=time.monotonic)
+
+    @classmethod
+    def build(cls, version: int, items: List[MenuItem], price_rows: Iterable = ()) -> "MenuSnapshot":
+        """Index items that arrive ordered by category, then name, and price rows ordered by item, then valid_from"""
+        by_category: Dict[str, List[MenuItem]] = {}
+        for item in items:
+            by_category.setdefault(item.category, []).append(item)
+        body = MenuResponse(items=items, categories=list(by_category)).model_dump_json().encode()
+        return cls(
+            version=version,
+            items=tuple(items),
+            categories=tuple(by_category),
+            by_id=MappingProxyType({item.id: item for item in items}),
+            by_name=MappingProxyType({item.name.lower(): item for item in items}),
+            by_category=MappingProxyType({category: tuple(group) for category, group in by_category.items()}),
+            bodies=MappingProxyType(encode_menu(body)),
+            etag=f'"{hashlib.sha256(body).hexdigest()[:32]}"',
+            search_index=MenuSearchIndex(items),
+            price_history=PriceHistoryIndex(price_rows)
+        )
+
+    def etag_for(self, coding: str) -> str:
+        """Strong ETag of the body in one content coding"""
+        return self.etag if coding == 'identity' else f'{self.etag[:-1]}-{coding}"'
+
+
 class MenuService:
+    """Menu reads served from a process-wide snapshot of the available items.
+
+    The snapshot is reloaded after MENU_CACHE_TTL_SECONDS, or as soon as a
+    newer menu version is announced on MENU_CHANNEL by the menu_items
+    trigger, which reaches every worker. Concurrent reloads are shared.
+    Callables in ``listeners`` get each newly loaded snapshot.
+    """
     _instance = None
     _pool = None
 
@@ -18,6 +114,12 @@ class MenuService:
         # Initialize only once
         if not hasattr(self, 'initialized'):
             self.initialized = True
+            self.ttl = MENU_CACHE_TTL_SECONDS
+            self.listeners: List[Callable[[MenuSnapshot], None]] = []
+            self._snapshot: Optional[MenuSnapshot] = None
+            self._announced_version = 0
+            self._loading: Optional[asyncio.Task] = None
+            self._listen_conn: Optional[Connection] = None
     
     @classmethod
     def set_pool(cls, pool: Pool):
@@ -69,53 +171,222 @@ class MenuService:
                     MenuItem(id="fruits_cutting", name="Fruits Cutting", chef="Kitchen Staff", category="Dessert", price=5.99)
                 ]
                 
-                # Insert items if they don't exist
-                for item in default_items:
-                    await conn.execute("""
-                        INSERT INTO menu_items (id, name, chef, sous_chef, category, price, available)
-                        VALUES ($1, $2, $3, $4, $5, $6, $7)
-                        ON CONFLICT (id) DO NOTHING
-                    """, 
-                    item.id,
-                    item.name,
-                    item.chef,
-                    item.sousChef,
-                    item.category,
-                    item.price,
-                    True
-                    )
+                # Insert the missing items in one statement
+                await conn.execute("""
+                    INSERT INTO menu_items (id, name, chef, sous_chef, category, price, available)
+                    SELECT id, name, chef, sous_chef, category, price, true
+                    FROM unnest($1::text[], $2::text[], $3::text[], $4::text[], $5::text[], $6::numeric[])
+                        AS t(id, name, chef, sous_chef, category, price)
+                    ON CONFLICT (id) DO NOTHING
+                """,
+                [item.id for item in default_items],
+                [item.name for item in default_items],
+                [item.chef for item in default_items],
+                [item.sousChef for item in default_items],
+                [item.category for item in default_items],
+                [Decimal(str(item.price)) for item in default_items]
+                )
                 
                 logger.info("Menu items initialized successfully")
         except Exception as e:
             logger.error(f"Error initializing menu items: {str(e)}")
             raise e
     
-    async def get_menu(self) -> MenuResponse:
-        """Get the complete menu with categories"""
+    async def upsert_menu_items(self, changes: List[MenuItemUpsert]) -> MenuUpsertResult:
+        """Create or change many menu items in one statement; the menu version is bumped once, if anything changed"""
         try:
             async with self.pool.acquire() as conn:
-                # Get all menu items
+                async with conn.transaction():
+                    rows = await conn.fetch("""
+                        WITH input AS (
+                            SELECT *
+                            FROM unnest(
+                                $1::text[], $2::text[], $3::text[], $4::text[], $5::boolean[],
+                                $6::text[], $7::numeric[], $8::boolean[], $9::int[], $10::boolean[]
+                            ) AS t(
+                                id, name, chef, sous_chef, sous_chef_set, category, price, available,
+                                stock_quantity, stock_set
+                            )
+                        ),
+                        old AS (
+                            SELECT m.*
+                            FROM menu_items m
+                            JOIN input USING (id)
+                            FOR UPDATE OF m
+                        ),
+                        written AS (
+                            INSERT INTO menu_items AS m (id, name, chef, sous_chef, category, price, available, stock_quantity)
+                            SELECT
+                                i.id,
+                                COALESCE(i.name, o.name),
+                                COALESCE(i.chef, o.chef),
+                                CASE WHEN i.sous_chef_set THEN i.sous_chef ELSE o.sous_chef END,
+                                COALESCE(i.category, o.category),
+                                COALESCE(i.price, o.price),
+                                COALESCE(i.available, CASE WHEN i.stock_quantity > 0 THEN true END, o.available, true),
+                                CASE WHEN i.stock_set THEN i.stock_quantity ELSE o.stock_quantity END
+                            FROM input i
+                            LEFT JOIN old o USING (id)
+                            ON CONFLICT (id) DO UPDATE SET
+                                name = EXCLUDED.name,
+                                chef = EXCLUDED.chef,
+                                sous_chef = EXCLUDED.sous_chef,
+                                category = EXCLUDED.category,
+                                price = EXCLUDED.price,
+                                available = EXCLUDED.available,
+                                stock_quantity = EXCLUDED.stock_quantity
+                            -- Rows that would not change are left alone and reported as unchanged
+                            WHERE (m.name, m.chef, m.sous_chef, m.category, m.price, m.available, m.stock_quantity)
+                                IS DISTINCT FROM (EXCLUDED.name, EXCLUDED.chef, EXCLUDED.sous_chef, EXCLUDED.category,
+                                                  EXCLUDED.price, EXCLUDED.available, EXCLUDED.stock_quantity)
+                            RETURNING m.id, m.name, m.chef, m.sous_chef, m.category, m.price, m.available, m.stock_quantity
+                        )
+                        SELECT
+                            w.*,
+                            o.id IS NULL AS created,
+                            o.name AS old_name,
+                            o.chef AS old_chef,
+                            o.sous_chef AS old_sous_chef,
+                            o.category AS old_category,
+                            o.price AS old_price,
+                            o.available AS old_available,
+                            o.stock_quantity AS old_stock_quantity
+                        FROM written w
+                        LEFT JOIN old o USING (id)
+                    """,
+                    [item.id for item in changes],
+                    [item.name for item in changes],
+                    [item.chef for item in changes],
+                    [item.sousChef for item in changes],
+                    ['sousChef' in item.model_fields_set for item in changes],
+                    [item.category for item in changes],
+                    [item.price for item in changes],
+                    [item.available for item in changes],
+                    [item.stockQuantity for item in changes],
+                    ['stockQuantity' in item.model_fields_set for item in changes]
+                    )
+                    version = await conn.fetchval("SELECT version FROM data_versions WHERE name = 'menu'")
+        except NotNullViolationError as e:
+            raise ValueError("New menu items need a name, chef, category and price") from e
+        except Exception as e:
+            logger.error(f"Error upserting menu items: {str(e)}")
+            raise e
+
+        created, updated = [], []
+        for row in rows:
+            if row['created']:
+                created.append(MenuItem(id=row['id'], **{field_name: row[column] for column, field_name in MENU_COLUMNS.items()}))
+                continue
+            before, after = {}, {}
+            for column, field_name in MENU_COLUMNS.items():
+                if row[column] != row[f'old_{column}']:
+                    before[field_name] = _plain(row[f'old_{column}'])
+                    after[field_name] = _plain(row[column])
+            updated.append(MenuItemChange(id=row['id'], before=before, after=after))
+        written = {row['id'] for row in rows}
+
+        # This worker sees its own change right away; the others hear of it on MENU_CHANNEL
+        self.invalidate(version)
+        return MenuUpsertResult(
+            version=version or 0,
+            created=created,
+            updated=updated,
+            unchanged=[item.id for item in changes if item.id not in written]
+        )
+
+    async def get_snapshot(self) -> MenuSnapshot:
+        """Current menu snapshot, reloading it when expired or outdated"""
+        snapshot = self._snapshot
+        if snapshot is not None and not self._is_stale(snapshot):
+            return snapshot
+        try:
+            return await asyncio.shield(self._reload())
+        except Exception as e:
+            if snapshot is None:
+                raise
+            # Keep serving the last menu while the database is unavailable
+            logger.error(f"Error reloading menu, serving version {snapshot.version}: {str(e)}")
+            return snapshot
+
+    def _is_stale(self, snapshot: MenuSnapshot) -> bool:
+        return (
+            snapshot.version < self._announced_version
+            or time.monotonic() - snapshot.loaded_at >= self.ttl
+        )
+
+    def _reload(self) -> asyncio.Task:
+        task = self._loading
+        if task is None or task.done() or task.get_loop() is not asyncio.get_running_loop():
+            task = self._loading = asyncio.ensure_future(self._load_snapshot())
+        return task
+
+    async def _load_snapshot(self) -> MenuSnapshot:
+        async with self.pool.acquire() as conn:
+            # Version and items from the same snapshot of the database
+            async with conn.transaction(isolation='repeatable_read', readonly=True):
+                version = await conn.fetchval("SELECT version FROM data_versions WHERE name = 'menu'")
                 rows = await conn.fetch("""
-                    SELECT * FROM menu_items 
-                    WHERE available = true 
+                    SELECT * FROM menu_items
+                    WHERE available = true
                     ORDER BY category, name
                 """)
-                
-                # Get unique categories
-                categories = await conn.fetch("""
-                    SELECT DISTINCT category 
-                    FROM menu_items 
-                    WHERE available = true 
-                    ORDER BY category
+                price_rows = await conn.fetch("""
+                    SELECT h.menu_item_id, m.name, h.price, h.valid_from, h.valid_to
+                    FROM menu_price_history h
+                    LEFT JOIN menu_items m ON m.id = h.menu_item_id
+                    ORDER BY h.menu_item_id, h.valid_from
                 """)
-                
-                menu_items = [MenuItem(**dict(row)) for row in rows]
-                category_list = [row['category'] for row in categories]
-                
-                return MenuResponse(
-                    items=menu_items,
-                    categories=category_list
-                )
+        snapshot = MenuSnapshot.build(version or 0, [MenuItem(**dict(row)) for row in rows], price_rows)
+        self._snapshot = snapshot
+        logger.info(f"Loaded menu version {snapshot.version} with {len(snapshot.items)} items")
+        for listener in self.listeners:
+            try:
+                listener(snapshot)
+            except Exception as e:
+                logger.error(f"Error in menu listener: {str(e)}")
+        return snapshot
+
+    def invalidate(self, version: Optional[int] = None):
+        """Reload the menu on next use; with a version, only if the snapshot is older"""
+        if version is None:
+            self._snapshot = None
+        else:
+            self._announced_version = max(self._announced_version, version)
+
+    def _on_menu_changed(self, conn, pid, channel, payload):
+        try:
+            self.invalidate(int(payload))
+        except ValueError:
+            self.invalidate()
+
+    async def start_listener(self):
+        """Hold a connection listening for menu version announcements from any worker"""
+        if self._listen_conn is not None:
+            return
+        conn = await self.pool.acquire()
+        try:
+            await conn.add_listener(MENU_CHANNEL, self._on_menu_changed)
+        except Exception:
+            await self.pool.release(conn)
+            raise
+        self._listen_conn = conn
+
+    async def stop_listener(self):
+        conn, self._listen_conn = self._listen_conn, None
+        if conn is not None:
+            try:
+                await conn.remove_listener(MENU_CHANNEL, self._on_menu_changed)
+            finally:
+                await self.pool.release(conn)
+
+    async def get_menu(self) -> MenuResponse:
+        """Get the complete menu with categories"""
+        try:
+            snapshot = await self.get_snapshot()
+            return MenuResponse(
+                items=list(snapshot.items),
+                categories=list(snapshot.categories)
+            )
         except Exception as e:
             logger.error(f"Error getting menu: {str(e)}")
             return MenuResponse(items=[], categories=[])
@@ -123,46 +394,53 @@ class MenuService:
     async def get_menu_item(self, item_id: str) -> MenuItem:
         """Get a specific menu item by ID"""
         try:
-            async with self.pool.acquire() as conn:
-                row = await conn.fetchrow("""
-                    SELECT * FROM menu_items 
-                    WHERE id = $1 AND available = true
-                """, item_id)
-                
-                if row:
-                    return MenuItem(**dict(row))
-                return None
+            snapshot = await self.get_snapshot()
+            return snapshot.by_id.get(item_id)
         except Exception as e:
             logger.error(f"Error getting menu item: {str(e)}")
             return None
+
+    async def get_price_history(
+        self,
+        item_id: str,
+        start: Optional[datetime] = None,
+        end: Optional[datetime] = None
+    ) -> List[PriceInterval]:
+        """List prices of an item in effect at any time in [start, end), oldest first; naive times are Eastern"""
+        try:
+            start, end = (
+                EASTERN_TZ.localize(value) if value is not None and value.tzinfo is None else value
+                for value in (start, end)
+            )
+            snapshot = await self.get_snapshot()
+            return snapshot.price_history.between(item_id, start, end)
+        except Exception as e:
+            logger.error(f"Error getting price history: {str(e)}")
+            raise e
+
+    async def get_menu_item_by_name(self, name: str) -> Optional[MenuItem]:
+        """Get a menu item by its name, ignoring case"""
+        try:
+            snapshot = await self.get_snapshot()
+            return snapshot.by_name.get(name.lower())
+        except Exception as e:
+            logger.error(f"Error getting menu item by name: {str(e)}")
+            return None
     
     async def get_items_by_category(self, category: str) -> List[MenuItem]:
         """Get menu items by category"""
         try:
-            async with self.pool.acquire() as conn:
-                rows = await conn.fetch("""
-                    SELECT * FROM menu_items 
-                    WHERE category = $1 AND available = true 
-                    ORDER BY name
-                """, category)
-                
-                return [MenuItem(**dict(row)) for row in rows]
+            snapshot = await self.get_snapshot()
+            return list(snapshot.by_category.get(category, ()))
         except Exception as e:
             logger.error(f"Error getting items by category: {str(e)}")
             return []
     
-    async def search_menu_items(self, query: str) -> List[MenuItem]:
-        """Search menu items by name"""
+    async def search_menu_items(self, query: str, limit: int = 20) -> List[MenuItem]:
+        """Search menu items by name, category or chef, tolerating typos and partly typed words"""
         try:
-            query_lower = query.lower()
-            async with self.pool.acquire() as conn:
-                rows = await conn.fetch("""
-                    SELECT * FROM menu_items 
-                    WHERE lower(name) LIKE $1 AND available = true 
-                    ORDER BY category, name
-                """, f"%{query_lower}%")
-                
-                return [MenuItem(**dict(row)) for row in rows]
+            snapshot = await self.get_snapshot()
+            return snapshot.search_index.search(query, limit)
         except Exception as e:
             logger.error(f"Error searching menu items: {str(e)}")
-            return []
\ No newline at end of file
+            return []
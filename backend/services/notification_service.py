@@ -2,11 +2,20 @@ from typing import List, Optional
 from asyncpg import Pool
 from models.notification import Notification, NotificationCreate, NotificationUpdate, EASTERN_TZ
 from models.order import Order, OrderItem
+from services.event_hub import announce
 from datetime import datetime, timedelta
+import json
 import logging
+import uuid
 
 logger = logging.getLogger(__name__)
 
+# Event hub topic of the active notifications shown on the pickup display
+NOTIFICATIONS_TOPIC = 'notifications'
+
+# Notification fields that can be updated and their columns
+UPDATE_COLUMNS = {'isRead': 'is_read', 'isActive': 'is_active'}
+
 class NotificationService:
     def __init__(self, pool: Pool):
         self.pool = pool
@@ -14,6 +23,17 @@ class NotificationService:
     def get_eastern_time(self):
         """Get current Eastern time"""
         return datetime.now(EASTERN_TZ)
+
+    def _row_to_notification(self, row) -> Notification:
+        return Notification(
+            id=row['id'],
+            customerName=row['customer_name'],
+            message=row['message'],
+            orderId=row['order_id'],
+            createdAt=row['created_at'],
+            isRead=row['is_read'],
+            isActive=row['is_active']
+        )
     
     async def create_notification(self, notification_data: NotificationCreate) -> Notification:
         """Create a new notification"""
@@ -23,23 +43,24 @@ class NotificationService:
             async with self.pool.acquire() as conn:
                 row = await conn.fetchrow("""
                     INSERT INTO notifications (
+                        id,
                         customer_name, 
                         message, 
                         order_id, 
-                        created_at,
-                        status
+                        created_at
                     ) VALUES ($1, $2, $3, $4, $5)
                     RETURNING *
                 """,
+                str(uuid.uuid4()),
                 notification_data.customerName,
                 notification_data.message,
                 notification_data.orderId,
-                current_time,
-                'active'
+                current_time
                 )
                 
                 if row:
-                    return Notification(**dict(row))
+                    await announce(conn, NOTIFICATIONS_TOPIC)
+                    return self._row_to_notification(row)
                 else:
                     raise Exception("Failed to create notification")
                 
@@ -53,14 +74,19 @@ class NotificationService:
             async with self.pool.acquire() as conn:
                 rows = await conn.fetch("""
                     SELECT * FROM notifications 
-                    WHERE status = 'active' 
+                    WHERE is_active
                     ORDER BY created_at DESC
                 """)
-                return [Notification(**dict(row)) for row in rows]
+                return [self._row_to_notification(row) for row in rows]
         except Exception as e:
             logger.error(f"Error fetching active notifications: {str(e)}")
             raise e
     
+    async def get_active_notifications_json(self, key: str = '') -> str:
+        """Active notifications serialized for the event hub"""
+        notifications = await self.get_active_notifications()
+        return json.dumps([notification.model_dump(mode='json') for notification in notifications])
+
     async def get_all_notifications(self, limit: int = 100) -> List[Notification]:
         """Get all notifications with limit"""
         try:
@@ -70,7 +96,7 @@ class NotificationService:
                     ORDER BY created_at DESC 
                     LIMIT $1
                 """, limit)
-                return [Notification(**dict(row)) for row in rows]
+                return [self._row_to_notification(row) for row in rows]
         except Exception as e:
             logger.error(f"Error fetching notifications: {str(e)}")
             raise e
@@ -86,7 +112,7 @@ class NotificationService:
             param_index = 2  # Start from $2 since $1 is notification_id
             
             for key, value in update_dict.items():
-                set_items.append(f"{key} = ${param_index}")
+                set_items.append(f"{UPDATE_COLUMNS[key]} = ${param_index}")
                 params.append(value)
                 param_index += 1
             
@@ -98,7 +124,8 @@ class NotificationService:
                     *params
                 )
                 if row:
-                    return Notification(**dict(row))
+                    await announce(conn, NOTIFICATIONS_TOPIC)
+                    return self._row_to_notification(row)
                 return None
         except Exception as e:
             logger.error(f"Error updating notification {notification_id}: {str(e)}")
@@ -113,7 +140,7 @@ class NotificationService:
                     notification_id
                 )
                 if row:
-                    return Notification(**dict(row))
+                    return self._row_to_notification(row)
                 return None
         except Exception as e:
             logger.error(f"Error fetching notification {notification_id}: {str(e)}")
@@ -127,7 +154,10 @@ class NotificationService:
                     "DELETE FROM notifications WHERE id = $1",
                     notification_id
                 )
-                return result == "DELETE 1"
+                if result == "DELETE 1":
+                    await announce(conn, NOTIFICATIONS_TOPIC)
+                    return True
+                return False
         except Exception as e:
             logger.error(f"Error deleting notification {notification_id}: {str(e)}")
             raise e
@@ -163,6 +193,8 @@ class NotificationService:
                 """, cutoff_time)
                 
                 deleted_count = int(result.split()[1]) if result else 0
+                if deleted_count:
+                    await announce(conn, NOTIFICATIONS_TOPIC)
                 logger.info(f"Cleared {deleted_count} old notifications")
                 return deleted_count
         except Exception as e:
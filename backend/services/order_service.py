@@ -1,26 +1,129 @@
-from typing import List, Optional
-from models.order import Order, OrderCreate, OrderItem, OrderStats, PaymentReport, ItemReport, EASTERN_TZ
+from typing import AsyncIterator, Dict, List, Optional
+from models.order import (
+    Order, OrderCreate, OrderItem, OrderStats, PaymentReport, ItemReport,
+    DeliveryTimeReport, TimeSeriesPoint, TimeSeriesReport, EASTERN_TZ
+)
 from services.notification_service import NotificationService
 from services.menu_service import MenuService
-from datetime import datetime, timedelta
+from services.rollup_service import RollupService
+from services.report_cache import ReportCache
+from services.quantile_sketch import DDSketch, DELIVERY_TIME_ACCURACY
+from services.trending_service import TrendingService, TRENDING_WINDOWS
+from services.kitchen_queue import KitchenQueue
+from services.batch_scheduler import BatchScheduler
+from services.station_board import StationBoard
+from datetime import date, datetime, timedelta
+import asyncio
 import logging
 import json
 import pytz
-from collections import defaultdict, Counter
 from asyncpg import Pool
+from asyncpg.exceptions import CheckViolationError
 
 logger = logging.getLogger(__name__)
 
+# Upper bound on buckets per time series request (a year of hours)
+MAX_TIMESERIES_BUCKETS = 24 * 366
+
+# Rollup source and expressions per time series grouping
+TIMESERIES_SOURCES = {
+    None: ("hourly_order_stats", "NULL::text", "order_count", "item_count"),
+    "payment_method": ("hourly_order_stats", "payment_method", "order_count", "item_count"),
+    "category": ("hourly_item_stats", "category", "order_count", "quantity"),
+    "item": ("hourly_item_stats", "item_name", "order_count", "quantity"),
+}
+
+class SoldOutError(ValueError):
+    """An order asks for more of a menu item than is left in stock"""
+
 class OrderService:
     def __init__(self, pool: Pool):
         self.pool = pool
         self.menu_service = MenuService()
-        self.notification_service = None  # Initialize later if needed
+        self.rollup_service = RollupService(pool)
+        self.report_cache = ReportCache()
+        self.trending_service = TrendingService()
+        self.kitchen_queue = KitchenQueue()
+        self.batch_scheduler = BatchScheduler()
+        self.station_board = StationBoard()
+        self.notification_service = NotificationService(pool)
     
     def get_eastern_time(self):
         """Get current Eastern time"""
         return datetime.now(EASTERN_TZ)
     
+    async def get_data_version(self, name: str = 'orders') -> int:
+        """Current version of the order data, bumped by every change that affects reports"""
+        async with self.pool.acquire() as conn:
+            if name == 'orders':
+                return await self.rollup_service.data_version(conn)
+            version = await conn.fetchval("SELECT version FROM data_versions WHERE name = $1", name)
+            return version or 0
+
+    async def get_report_version(self, report_type: str) -> int:
+        """Version a report is cached and its exported files are stored under"""
+        version = await self.get_data_version()
+        if report_type in ('price_analysis', 'full'):
+            # List prices come from the menu's price history, so a price change moves these too.
+            # Both versions only grow, so the sum never repeats for a different pair.
+            version += await self.get_data_version('menu')
+        return version
+    
+    async def get_cached_report(self, report_type: str, **params):
+        """Serve a report from the process-wide cache, recomputing it at most once per data version"""
+        compute = {
+            'payment': self.get_payment_reports,
+            'items': self.get_item_reports,
+            'price_analysis': self.get_price_analysis,
+            'delivery_times': self.get_delivery_time_reports
+        }[report_type]
+        version = await self.get_report_version(report_type)
+        return await self.report_cache.get_or_compute(
+            report_type,
+            params,
+            version,
+            lambda: compute(**params)
+        )
+    
+    async def get_cached_report_with_version(self, report_type: str, **params) -> tuple:
+        """Cached report plus the data version it was computed for, older than current while a refresh runs"""
+        if report_type == 'full':
+            return await self.get_full_report(**params)
+        report = await self.get_cached_report(report_type, **params)
+        return report, self.report_cache.version_of(report_type, params)
+
+    async def get_full_report(
+        self,
+        start_time: Optional[datetime] = None,
+        end_time: Optional[datetime] = None,
+        recent_limit: int = 5,
+        start_date: Optional[date] = None,
+        end_date: Optional[date] = None
+    ) -> tuple:
+        """Payment, item and price reports fetched concurrently, plus the full report version they were computed for"""
+        # Each report acquires its own pooled connection, so the aggregations run side by side
+        parts = await asyncio.gather(
+            self.get_cached_report_with_version('payment', start_time=start_time, end_time=end_time),
+            self.get_cached_report_with_version(
+                'items', start_time=start_time, end_time=end_time, recent_limit=recent_limit
+            ),
+            self.get_cached_report_with_version('price_analysis', start_date=start_date, end_date=end_date)
+        )
+        (payment, _), (items, _), (price_analysis, _) = parts
+        full_report = {
+            'payment': payment,
+            'items': items,
+            'price_analysis': price_analysis,
+            'start_time': start_time,
+            'end_time': end_time
+        }
+        current = await asyncio.gather(*(
+            self.get_report_version(report_type) for report_type in ('payment', 'items', 'price_analysis', 'full')
+        ))
+        # Behind the current full report version by as much as its most out of date part
+        lag = max(now - (version or 0) for now, (_, version) in zip(current, parts))
+        return full_report, current[-1] - max(lag, 0)
+
     async def get_next_order_number(self) -> str:
         """Get the next sequential order number using PostgreSQL sequence"""
         try:
@@ -55,19 +158,17 @@ class OrderService:
             # Calculate prices for each item
             order_items_with_prices = []
             total_amount = 0.0
+            # Quantity per menu item id, taken from stock by the insert
+            stock_wanted: Dict[str, int] = {}
             
+            # Prices come from the cached menu snapshot, not a query per item
+            menu = await self.menu_service.get_snapshot()
             for item_create in order_data.items:
-                # Find menu item to get price
-                menu_item = await self.menu_service.get_menu_item(item_create.name.lower().replace(' ', '_'))
-                if not menu_item:
-                    # Try to find by name match
-                    menu_items = await self.menu_service.get_menu()
-                    menu_item = None
-                    for mi in menu_items.items:
-                        if mi.name.lower() == item_create.name.lower():
-                            menu_item = mi
-                            break
-                
+                # Find menu item by id, then by name
+                menu_item = (
+                    menu.by_id.get(item_create.name.lower().replace(' ', '_'))
+                    or menu.by_name.get(item_create.name.lower())
+                )
                 if not menu_item:
                     raise ValueError(f"Menu item '{item_create.name}' not found")
                 
@@ -81,6 +182,7 @@ class OrderService:
                 )
                 order_items_with_prices.append(order_item)
                 total_amount += subtotal
+                stock_wanted[menu_item.id] = stock_wanted.get(menu_item.id, 0) + item_create.quantity
             
             order = Order(
                 customerName=order_data.customerName,
@@ -104,46 +206,95 @@ class OrderService:
                 for item in order_items_with_prices
             ]
 
-            estimated_delivery = current_time + timedelta(minutes=30)
+            # Queue the order in the kitchen; its ETA depends on what is already pending
+            estimated_delivery = self.kitchen_queue.enqueue(
+                order.id,
+                [(item.name, item.quantity) for item in order_items_with_prices],
+                current_time,
+                order_number=order_number
+            )
             
-            async with self.pool.acquire() as conn:
-                result = await conn.fetchrow("""
-                    INSERT INTO orders (
-                        status,
+            try:
+                async with self.pool.acquire() as conn:
+                    async with conn.transaction():
+                        # Stock is taken in the same statement as the insert; the CHECK on
+                        # stock_quantity fails the whole statement rather than oversell.
+                        # Rows are locked in id order so concurrent orders cannot deadlock.
+                        result = await conn.fetchrow("""
+                        WITH wanted AS (
+                            SELECT * FROM unnest($10::text[], $11::int[]) AS w(id, quantity)
+                        ),
+                        locked AS (
+                            SELECT m.id FROM menu_items m
+                            JOIN wanted w ON w.id = m.id
+                            WHERE m.stock_quantity IS NOT NULL
+                            ORDER BY m.id
+                            FOR UPDATE OF m
+                        ),
+                        stock AS (
+                            UPDATE menu_items m
+                            SET stock_quantity = m.stock_quantity - w.quantity
+                            FROM wanted w
+                            WHERE m.id = w.id AND m.id IN (SELECT id FROM locked)
+                            RETURNING m.id
+                        )
+                        INSERT INTO orders (
+                            id,
+                            status,
+                            order_number,
+                            customer_name,
+                            payment_method,
+                            order_time,
+                            estimated_delivery_time,
+                            total_items,
+                            total_amount,
+                            items
+                        ) VALUES (
+                            $1,
+                            'pending',
+                            $2,
+                            $3,
+                            $4,
+                            $5,
+                            $6,
+                            $7,
+                            $8,
+                            $9
+                        ) RETURNING *
+                        """,
+                        order.id,
                         order_number,
-                        customer_name,
-                        payment_method,
-                        order_time,
-                        estimated_delivery_time,
-                        total_items,
-                        total_amount,
-                        items
-                    ) VALUES (
-                        'pending',
-                        $1,
-                        $2,
-                        $3,
-                        $4,
-                        $5,
-                        $6,
-                        $7,
-                        $8
-                    ) RETURNING *
-                """,
-                order_number,
-                order_data.customerName,
-                order_data.paymentMethod,
-                current_time,
-                estimated_delivery,
-                sum(item.quantity for item in order_items_with_prices),
-                round(total_amount, 2),
-                items_json
-                )
+                        order_data.customerName,
+                        order_data.paymentMethod,
+                        current_time,
+                        estimated_delivery,
+                        sum(item.quantity for item in order_items_with_prices),
+                        round(total_amount, 2),
+                        items_json,
+                        list(stock_wanted),
+                        list(stock_wanted.values())
+                        )
+                        
+                        # Count the order towards the hourly throughput rollups
+                        if result:
+                            await self.rollup_service.record_order_placed(conn, result['id'])
+                    if result:
+                        await self.rollup_service.bump_data_version(conn)
+            except CheckViolationError as e:
+                self.kitchen_queue.remove(order.id)
+                if e.constraint_name != 'menu_items_stock_quantity_check':
+                    raise
+                raise SoldOutError(await self._describe_shortage(stock_wanted)) from e
+            except Exception:
+                self.kitchen_queue.remove(order.id)
+                raise
             
             if result:
+                self.trending_service.record(
+                    (item.name, item.quantity) for item in order_items_with_prices
+                )
                 # Convert row to dictionary
-                order_dict = dict(result)
-                return Order(**order_dict)
+                return self._row_to_order(dict(result))
             else:
                 raise Exception("Failed to create order")
                 
@@ -151,6 +302,127 @@ class OrderService:
             logger.error(f"Error creating order: {str(e)}")
             raise e
     
+    async def _describe_shortage(self, stock_wanted: Dict[str, int]) -> str:
+        """Which items an order wanted more of than is left, for the sold-out error"""
+        async with self.pool.acquire() as conn:
+            rows = await conn.fetch("""
+                SELECT m.name, m.stock_quantity
+                FROM menu_items m
+                JOIN unnest($1::text[], $2::int[]) AS w(id, quantity) ON w.id = m.id
+                WHERE m.stock_quantity < w.quantity
+                ORDER BY m.name
+            """, list(stock_wanted), list(stock_wanted.values()))
+        if not rows:
+            return "Not enough stock left for this order"
+        return "; ".join(
+            f"'{row['name']}' is sold out" if row['stock_quantity'] == 0
+            else f"Only {row['stock_quantity']} '{row['name']}' left"
+            for row in rows
+        )
+
+    def get_trending(self, window: int = 15, k: int = 5) -> dict:
+        """Most ordered items (by quantity) in the last ``window`` minutes"""
+        return self.trending_service.top(window, k)
+
+    async def warm_trending(self):
+        """Load orders placed within the largest trending window, e.g. after a restart"""
+        try:
+            async with self.pool.acquire() as conn:
+                rows = await conn.fetch("""
+                    SELECT EXTRACT(EPOCH FROM o.order_time) AS placed_at, line->>'name' AS name, (line->>'quantity')::int AS quantity
+                    FROM orders o
+                    CROSS JOIN LATERAL jsonb_array_elements(o.items) AS line
+                    WHERE o.order_time >= CURRENT_TIMESTAMP - make_interval(mins => $1)
+                """, max(TRENDING_WINDOWS))
+            self.trending_service.clear()
+            for row in rows:
+                self.trending_service.record([(row['name'], row['quantity'])], at=float(row['placed_at']))
+            logger.info(f"Loaded {len(rows)} recent order lines into trending items")
+        except Exception as e:
+            logger.error(f"Error warming trending items: {str(e)}")
+            raise e
+
+    def get_batch_proposals(self) -> List[dict]:
+        """Cook batches proposed from the pending, not-started order lines"""
+        return self.batch_scheduler.propose(self.get_eastern_time())
+
+    def get_station_summaries(self) -> List[dict]:
+        """Pending units, oldest waiting order and throughput per chef station"""
+        return self.station_board.summaries(self.get_eastern_time())
+
+    def get_station_view(self, station: str) -> Optional[dict]:
+        """One station's summary with its open order lines, or None for an unknown station"""
+        if station not in self.station_board.stations:
+            return None
+        return self.station_board.station_view(station, self.get_eastern_time())
+
+    async def warm_kitchen_queue(self):
+        """Rebuild the kitchen queue from the pending orders, oldest first"""
+        try:
+            menu = await self.menu_service.get_menu()
+            self.station_board.load_menu(menu.items)
+
+            async with self.pool.acquire() as conn:
+                rows = await conn.fetch("""
+                    SELECT id, order_number, order_time, items
+                    FROM orders
+                    WHERE status = 'pending'
+                    ORDER BY order_time
+                """)
+            self.kitchen_queue.clear()
+            for row in rows:
+                items = row['items']
+                self.kitchen_queue.enqueue(
+                    row['id'],
+                    [(item['name'], item['quantity']) for item in items],
+                    row['order_time'],
+                    statuses={item['name']: item.get('cooking_status', 'not started') for item in items},
+                    order_number=row['order_number']
+                )
+            logger.info(f"Loaded {len(rows)} pending orders into the kitchen queue")
+        except Exception as e:
+            logger.error(f"Error warming kitchen queue: {str(e)}")
+            raise e
+
+    def _row_to_order(self, order_dict: dict) -> Order:
+        """Map an orders row (snake_case columns) to the Order model"""
+        column_map = {
+            'order_number': 'orderNumber',
+            'customer_name': 'customerName',
+            'payment_method': 'paymentMethod',
+            'order_time': 'orderTime',
+            'completed_time': 'completedTime',
+            'estimated_delivery_time': 'estimatedDeliveryTime',
+            'actual_delivery_time': 'actualDeliveryTime',
+            'delivery_minutes': 'deliveryMinutes',
+            'total_items': 'totalItems',
+            'total_amount': 'totalAmount'
+        }
+        for column, field in column_map.items():
+            if column in order_dict:
+                order_dict[field] = order_dict.pop(column)
+        
+        # Ensure items is properly converted from JSON string if needed
+        if isinstance(order_dict.get('items'), str):
+            try:
+                order_dict['items'] = json.loads(order_dict['items'])
+            except json.JSONDecodeError:
+                logger.error(f"Failed to parse items JSON for order {order_dict.get('id')}")
+                order_dict['items'] = []
+        
+        # Convert items to OrderItem objects
+        if 'items' in order_dict and isinstance(order_dict['items'], list):
+            order_dict['items'] = [OrderItem(**item) for item in order_dict['items']]
+        
+        # Pending orders show the kitchen queue's current ETA rather than the one stored at creation
+        if order_dict.get('status') == 'pending':
+            eta = self.kitchen_queue.eta(order_dict.get('id'))
+            if eta is not None:
+                order_dict['estimatedDeliveryTime'] = eta
+        
+        # Timestamps are automatically handled by asyncpg
+        return Order(**order_dict)
+    
     async def get_all_orders(self) -> List[Order]:
         """Get all orders"""
         try:
@@ -160,46 +432,7 @@ class OrderService:
                     ORDER BY order_time DESC
                 """)
                 
-                orders = []
-                for row in rows:
-                    order_dict = dict(row)
-                    # Map column names to model field names
-                    if 'order_number' in order_dict:
-                        order_dict['orderNumber'] = order_dict.pop('order_number')
-                    if 'customer_name' in order_dict:
-                        order_dict['customerName'] = order_dict.pop('customer_name')
-                    if 'payment_method' in order_dict:
-                        order_dict['paymentMethod'] = order_dict.pop('payment_method')
-                    if 'order_time' in order_dict:
-                        order_dict['orderTime'] = order_dict.pop('order_time')
-                    if 'completed_time' in order_dict:
-                        order_dict['completedTime'] = order_dict.pop('completed_time')
-                    if 'estimated_delivery_time' in order_dict:
-                        order_dict['estimatedDeliveryTime'] = order_dict.pop('estimated_delivery_time')
-                    if 'actual_delivery_time' in order_dict:
-                        order_dict['actualDeliveryTime'] = order_dict.pop('actual_delivery_time')
-                    if 'delivery_minutes' in order_dict:
-                        order_dict['deliveryMinutes'] = order_dict.pop('delivery_minutes')
-                    if 'total_items' in order_dict:
-                        order_dict['totalItems'] = order_dict.pop('total_items')
-                    if 'total_amount' in order_dict:
-                        order_dict['totalAmount'] = order_dict.pop('total_amount')
-                    
-                    # Ensure items is properly converted from JSON string if needed
-                    if isinstance(order_dict.get('items'), str):
-                        try:
-                            order_dict['items'] = json.loads(order_dict['items'])
-                        except json.JSONDecodeError:
-                            logger.error(f"Failed to parse items JSON for order {order_dict.get('id')}")
-                            order_dict['items'] = []
-                    
-                    # Convert items to OrderItem objects
-                    if 'items' in order_dict and isinstance(order_dict['items'], list):
-                        order_dict['items'] = [OrderItem(**item) for item in order_dict['items']]
-                    
-                    # Timestamps are automatically handled by asyncpg
-                    orders.append(Order(**order_dict))
-                return orders
+                return [self._row_to_order(dict(row)) for row in rows]
         except Exception as e:
             logger.error(f"Error fetching orders: {str(e)}")
             raise e
@@ -213,38 +446,7 @@ class OrderService:
                     str(order_id)  # Ensure ID is string
                 )
                 if row:
-                    order_dict = dict(row)
-                    # Map column names to model field names
-                    if 'order_number' in order_dict:
-                        order_dict['orderNumber'] = order_dict.pop('order_number')
-                    if 'customer_name' in order_dict:
-                        order_dict['customerName'] = order_dict.pop('customer_name')
-                    if 'payment_method' in order_dict:
-                        order_dict['paymentMethod'] = order_dict.pop('payment_method')
-                    if 'order_time' in order_dict:
-                        order_dict['orderTime'] = order_dict.pop('order_time')
-                    if 'completed_time' in order_dict:
-                        order_dict['completedTime'] = order_dict.pop('completed_time')
-                    if 'estimated_delivery_time' in order_dict:
-                        order_dict['estimatedDeliveryTime'] = order_dict.pop('estimated_delivery_time')
-                    if 'actual_delivery_time' in order_dict:
-                        order_dict['actualDeliveryTime'] = order_dict.pop('actual_delivery_time')
-                    if 'delivery_minutes' in order_dict:
-                        order_dict['deliveryMinutes'] = order_dict.pop('delivery_minutes')
-                    if 'total_items' in order_dict:
-                        order_dict['totalItems'] = order_dict.pop('total_items')
-                    if 'total_amount' in order_dict:
-                        order_dict['totalAmount'] = order_dict.pop('total_amount')
-                    
-                    # Ensure items is properly converted from JSON string if needed
-                    if isinstance(order_dict.get('items'), str):
-                        order_dict['items'] = json.loads(order_dict['items'])
-                    
-                    # Convert items to OrderItem objects
-                    if 'items' in order_dict and isinstance(order_dict['items'], list):
-                        order_dict['items'] = [OrderItem(**item) for item in order_dict['items']]
-                    
-                    return Order(**order_dict)
+                    return self._row_to_order(dict(row))
                 return None
         except Exception as e:
             logger.error(f"Error fetching order {order_id}: {str(e)}")
@@ -259,12 +461,17 @@ class OrderService:
                     order_number
                 )
                 if row:
-                    return Order(**dict(row))
+                    return self._row_to_order(dict(row))
                 return None
         except Exception as e:
             logger.error(f"Error fetching order by number {order_number}: {str(e)}")
             raise e
 
+    async def get_order_event(self, order_number: str) -> Optional[str]:
+        """An order serialized for the event hub, or None if there is no such order"""
+        order = await self.get_order_by_number(order_number)
+        return order.model_dump_json() if order else None
+
     async def get_orders_by_status(self, status: str) -> List[Order]:
         """Get all orders with specified status"""
         try:
@@ -273,7 +480,7 @@ class OrderService:
                     "SELECT * FROM orders WHERE status = $1",
                     status
                 )
-                return [Order(**dict(row)) for row in rows]
+                return [self._row_to_order(dict(row)) for row in rows]
         except Exception as e:
             logger.error(f"Error getting orders by status {status}: {str(e)}")
             return []
@@ -282,63 +489,73 @@ class OrderService:
         """Update cooking status of a specific item in an order and auto-complete if all items are finished"""
         try:
             async with self.pool.acquire() as conn:
-                # Get the order first
-                row = await conn.fetchrow("SELECT * FROM orders WHERE id = $1", order_id)
-                if not row:
-                    return {"success": False, "message": "Order not found"}
+                async with conn.transaction():
+                    # Get the order first, locked so concurrent updates can't both auto-complete it
+                    row = await conn.fetchrow("SELECT * FROM orders WHERE id = $1 FOR UPDATE", order_id)
+                    if not row:
+                        return {"success": False, "message": "Order not found"}
                 
-                # Convert row to dict and get items
-                order_data = dict(row)
-                items = order_data.get('items', [])
+                    # Convert row to dict and get items
+                    order_data = dict(row)
+                    items = order_data.get('items', [])
                 
-                # Update the specific item's cooking status
-                updated = False
-                for item in items:
-                    if item['name'] == item_name:
-                        item['cooking_status'] = cooking_status
-                        updated = True
-                        break
-                
-                if not updated:
-                    return {"success": False, "message": "Item not found in order"}
+                    # Update the specific item's cooking status
+                    updated = False
+                    for item in items:
+                        if item['name'] == item_name:
+                            item['cooking_status'] = cooking_status
+                            updated = True
+                            break
                 
-                # Check if all items are finished
-                all_items_finished = all(
-                    item.get('cooking_status', 'not started') == 'finished'
-                    for item in items
-                )
+                    if not updated:
+                        return {"success": False, "message": "Item not found in order"}
                 
-                # If all items are finished and order is pending, automatically complete it
-                update_fields = []
-                params = [items, order_id]  # $1 = items, $2 = order_id
-                param_index = 3
+                    # Check if all items are finished
+                    all_items_finished = all(
+                        item.get('cooking_status', 'not started') == 'finished'
+                        for item in items
+                    )
                 
-                if all_items_finished and order_data.get('status') == 'pending':
-                    current_time = self.get_eastern_time()
-                    update_fields.extend([
-                        "status = $" + str(param_index),
-                        "completed_time = $" + str(param_index + 1),
-                        "actual_delivery_time = $" + str(param_index + 2)
-                    ])
-                    params.extend(["completed", current_time, current_time])
+                    # If all items are finished and order is pending, automatically complete it
+                    auto_complete = all_items_finished and order_data.get('status') == 'pending'
+                    update_fields = []
+                    params = [items, order_id]  # $1 = items, $2 = order_id
+                    param_index = 3
                 
-                # Build update query
-                update_sql = "UPDATE orders SET items = $1"
-                if update_fields:
-                    update_sql += ", " + ", ".join(update_fields)
-                update_sql += " WHERE id = $2"
+                    if auto_complete:
+                        current_time = self.get_eastern_time()
+                        update_fields.extend([
+                            "status = $" + str(param_index),
+                            "completed_time = $" + str(param_index + 1),
+                            "actual_delivery_time = $" + str(param_index + 2)
+                        ])
+                        params.extend(["completed", current_time, current_time])
                 
-                # Execute update
-                result = await conn.execute(update_sql, *params)
+                    # Build update query
+                    update_sql = "UPDATE orders SET items = $1"
+                    if update_fields:
+                        update_sql += ", " + ", ".join(update_fields)
+                    update_sql += " WHERE id = $2"
                 
-                if result == "UPDATE 1":
-                    return {
-                        "success": True,
-                        "message": f"Item '{item_name}' status updated to '{cooking_status}'",
-                        "order_auto_completed": all_items_finished and order_data.get('status') == 'pending'
-                    }
+                    # Execute update
+                    result = await conn.execute(update_sql, *params)
                 
-                return {"success": False, "message": "Failed to update item status"}
+                    if result != "UPDATE 1":
+                        return {"success": False, "message": "Failed to update item status"}
+                    if auto_complete:
+                        await self.rollup_service.record_order_completed(conn, order_id)
+                if auto_complete:
+                    await self.rollup_service.bump_data_version(conn)
+
+            # Committed; move the kitchen queue along
+            self.kitchen_queue.update_item_status(order_id, item_name, cooking_status)
+            if auto_complete:
+                self.kitchen_queue.remove(order_id)
+            return {
+                "success": True,
+                "message": f"Item '{item_name}' status updated to '{cooking_status}'",
+                "order_auto_completed": auto_complete
+            }
                 
         except Exception as e:
             logger.error(f"Error updating cooking status for item {item_name} in order {order_id}: {str(e)}")
@@ -411,65 +628,76 @@ class OrderService:
             logger.error(f"Error getting orders by category: {str(e)}")
             raise e
 
-    async def get_price_analysis(self) -> dict:
-        """Get price analysis for all items and generate Excel data"""
+    async def get_price_analysis(
+        self,
+        start_date: Optional[date] = None,
+        end_date: Optional[date] = None
+    ) -> dict:
+        """Get price analysis for completed orders between two Eastern dates (inclusive) from the daily rollups.
+
+        Each item's unit_price is its list price at the end of the range, and
+        price_history lists the prices in effect during it, both looked up in
+        the menu's price history rather than taken from individual orders.
+        """
         try:
+            # Eastern midnight at the start of the range and after its last day
+            range_start, range_end = (
+                EASTERN_TZ.localize(datetime.combine(day, datetime.min.time())) if day else None
+                for day in (start_date, end_date + timedelta(days=1) if end_date else None)
+            )
+            price_history = (await self.menu_service.get_snapshot()).price_history
             async with self.pool.acquire() as conn:
-                # Get all completed orders for analysis
                 rows = await conn.fetch("""
-                    SELECT * FROM orders 
-                    WHERE status = 'completed' 
-                    ORDER BY order_time DESC
-                """)
-                
-                # Get menu items for pricing information
-                menu_items = await self.menu_service.get_menu()
-                menu_item_map = {item.name: item for item in menu_items.items}
-                
-                # Analyze items
-                item_analysis = {}
-                total_revenue = 0.0
-                total_items_sold = 0
-                
+                    WITH totals AS (
+                        SELECT
+                            item_name,
+                            SUM(quantity) AS total_quantity,
+                            SUM(revenue) AS total_revenue,
+                            SUM(order_count) AS order_count,
+                            (array_agg(unit_price ORDER BY stat_date DESC) FILTER (WHERE unit_price IS NOT NULL))[1] AS unit_price
+                        FROM daily_item_stats
+                        WHERE ($1::date IS NULL OR stat_date >= $1)
+                        AND ($2::date IS NULL OR stat_date <= $2)
+                        GROUP BY item_name
+                        HAVING SUM(order_count) > 0
+                    )
+                    SELECT
+                        t.*,
+                        COALESCE((SELECT category FROM menu_items m WHERE m.name = t.item_name LIMIT 1), 'Other') AS category
+                    FROM totals t
+                    ORDER BY t.total_revenue DESC
+                """, start_date, end_date)
+
+                total_orders = await conn.fetchval("""
+                    SELECT COALESCE(SUM(order_count), 0)
+                    FROM daily_order_stats
+                    WHERE ($1::date IS NULL OR stat_date >= $1)
+                    AND ($2::date IS NULL OR stat_date <= $2)
+                """, start_date, end_date)
+
+                items = []
                 for row in rows:
-                    order = dict(row)
-                    for item in order.get('items', []):
-                        item_name = item.get('name')
-                        quantity = item.get('quantity', 0)
-                        price = item.get('price', 0)
-                        subtotal = item.get('subtotal', price * quantity)
-                        
-                        if item_name not in item_analysis:
-                            menu_item = menu_item_map.get(item_name, None)
-                            item_analysis[item_name] = {
-                                'item_name': item_name,
-                                'category': menu_item.category if menu_item else 'Other',
-                                'unit_price': price,
-                                'total_quantity': 0,
-                                'total_revenue': 0.0,
-                                'order_count': 0
-                            }
-                        
-                        item_analysis[item_name]['total_quantity'] += quantity
-                        item_analysis[item_name]['total_revenue'] += subtotal
-                        item_analysis[item_name]['order_count'] += 1
-                        
-                        total_revenue += subtotal
-                        total_items_sold += quantity
-                
-                # Sort by revenue (highest first)
-                sorted_items = sorted(
-                    item_analysis.values(), 
-                    key=lambda x: x['total_revenue'], 
-                    reverse=True
-                )
+                    prices = price_history.between(price_history.item_id(row['item_name']), range_start, range_end)
+                    items.append({
+                        'item_name': row['item_name'],
+                        'category': row['category'],
+                        # Items without recorded prices fall back to the latest price charged
+                        'unit_price': prices[-1].price if prices else float(row['unit_price'] or 0),
+                        'price_history': [interval.as_dict() for interval in prices],
+                        'total_quantity': row['total_quantity'],
+                        'total_revenue': float(row['total_revenue']),
+                        'order_count': row['order_count']
+                    })
+                total_revenue = sum(item['total_revenue'] for item in items)
                 
                 return {
-                    'items': sorted_items,
+                    'items': items,
                     'total_revenue': round(total_revenue, 2),
-                    'total_items_sold': total_items_sold,
-                    'total_orders': len(rows),
-                    'average_order_value': round(total_revenue / len(rows), 2) if rows else 0
+                    'total_items_sold': sum(item['total_quantity'] for item in items),
+                    'total_orders': total_orders,
+                    'average_order_value': round(total_revenue / total_orders, 2) if total_orders else 0,
+                    'start_date': start_date.isoformat() if start_date else None,
+                    'end_date': end_date.isoformat() if end_date else None
                 }
                 
         except Exception as e:
@@ -497,7 +725,9 @@ class OrderService:
                     *params
                 )
                 if row:
-                    return Order(**dict(row))
+                    if row['status'] != 'pending':
+                        self.kitchen_queue.remove(order_id)
+                    return self._row_to_order(dict(row))
                 return None
         except Exception as e:
             logger.error(f"Error updating order {order_id}: {str(e)}")
@@ -514,31 +744,47 @@ class OrderService:
                 return None
             
             async with self.pool.acquire() as conn:
-                # Update order status in database
-                row = await conn.fetchrow("""
-                    UPDATE orders 
-                    SET status = $1, 
-                        completed_time = $2, 
-                        actual_delivery_time = $3 
-                    WHERE id = $4 
-                    RETURNING *
-                """, 
-                'completed', 
-                completion_time,
-                completion_time,
-                order_id
-                )
+                async with conn.transaction():
+                    # Update order status in database, remembering whether it was still pending.
+                    # Completing it again keeps the first completion time the rollups counted.
+                    row = await conn.fetchrow("""
+                        WITH previous AS (
+                            SELECT id, status FROM orders WHERE id = $4 FOR UPDATE
+                        )
+                        UPDATE orders o
+                        SET status = $1, 
+                            completed_time = CASE WHEN previous.status = 'completed' THEN o.completed_time ELSE $2 END, 
+                            actual_delivery_time = CASE WHEN previous.status = 'completed' THEN o.actual_delivery_time ELSE $3 END 
+                        FROM previous
+                        WHERE o.id = previous.id
+                        RETURNING o.*, previous.status AS previous_status
+                    """, 
+                    'completed', 
+                    completion_time,
+                    completion_time,
+                    order_id
+                    )
+                    
+                    # Only the pending -> completed transition counts towards the rollups
+                    if row and row['previous_status'] == 'pending':
+                        await self.rollup_service.record_order_completed(conn, order_id)
                 
-                if row:
-                    # Create notification for customer
+                if row and row['previous_status'] == 'pending':
+                    await self.rollup_service.bump_data_version(conn)
+
+                    # Create notification for customer (once, not again when re-completed)
                     try:
                         notification = await self.notification_service.create_order_ready_notification(order)
                         logger.info(f"Created notification for order {order_id}: {notification.id}")
                     except Exception as notification_error:
                         logger.error(f"Failed to create notification for order {order_id}: {str(notification_error)}")
                         # Don't fail the order completion if notification fails
+                if row:
+                    self.kitchen_queue.remove(order_id)
                     
-                    return Order(**dict(row))
+                    order_dict = dict(row)
+                    order_dict.pop('previous_status')
+                    return self._row_to_order(order_dict)
                 return None
         except Exception as e:
             logger.error(f"Error completing order {order_id}: {str(e)}")
@@ -575,12 +821,18 @@ class OrderService:
                     AND order_time >= $1 AND order_time < $2
                     AND completed_time IS NOT NULL
                 """, today, tomorrow)
+
+                sketch = (await self.get_delivery_sketches('all', today.date(), today.date(), conn)).get('', DDSketch())
+                p50, p90, p99 = sketch.quantiles()
                 
                 return OrderStats(
                     pending=pending_count,
                     completed=completed_count,
                     total=total_count,
-                    averageDeliveryTime=avg_delivery_time
+                    averageDeliveryTime=avg_delivery_time,
+                    p50DeliveryTime=p50,
+                    p90DeliveryTime=p90,
+                    p99DeliveryTime=p99
                 )
         except Exception as e:
             logger.error(f"Error getting order stats: {str(e)}")
@@ -589,112 +841,404 @@ class OrderService:
             logger.error(f"Error getting order stats: {str(e)}")
             raise e
     
-    async def get_payment_reports(self) -> List[PaymentReport]:
-        """Generate payment method reports"""
+    def _localize(self, value: Optional[datetime]) -> Optional[datetime]:
+        """Treat naive datetimes as Eastern time"""
+        if value is not None and value.tzinfo is None:
+            return EASTERN_TZ.localize(value)
+        return value
+
+    def _eastern_dates(self, start_time: Optional[datetime], end_time: Optional[datetime]) -> Optional[tuple]:
+        """Eastern calendar days making up [start_time, end_time), or None if a bound is not an Eastern midnight.
+
+        The delivery sketches are kept per day, so only whole-day ranges have matching percentiles.
+        """
+        bounds = [self._localize(value).astimezone(EASTERN_TZ) if value else None for value in (start_time, end_time)]
+        if any(bound is not None and bound.time() != datetime.min.time() for bound in bounds):
+            return None
+        start, end = bounds
+        return (start.date() if start else None, (end - timedelta(days=1)).date() if end else None)
+
+    async def get_delivery_sketches(
+        self,
+        dimension: str,
+        start_date: Optional[date] = None,
+        end_date: Optional[date] = None,
+        conn=None
+    ) -> Dict[str, DDSketch]:
+        """Delivery time sketches per dimension key, merged over the Eastern days [start_date, end_date]"""
+        query = """
+            SELECT dimension_key, bucket, SUM(count) AS count
+            FROM delivery_time_buckets
+            WHERE dimension = $1
+            AND ($2::date IS NULL OR stat_date >= $2)
+            AND ($3::date IS NULL OR stat_date <= $3)
+            GROUP BY dimension_key, bucket
+            HAVING SUM(count) > 0
+        """
+        if conn is None:
+            async with self.pool.acquire() as conn:
+                rows = await conn.fetch(query, dimension, start_date, end_date)
+        else:
+            rows = await conn.fetch(query, dimension, start_date, end_date)
+
+        sketches = {}
+        for row in rows:
+            if row['dimension_key'] not in sketches:
+                sketches[row['dimension_key']] = DDSketch(DELIVERY_TIME_ACCURACY)
+            sketches[row['dimension_key']].add_bucket(row['bucket'], row['count'])
+        return sketches
+
+    async def get_delivery_time_reports(
+        self,
+        dimension: str = 'all',
+        start_date: Optional[date] = None,
+        end_date: Optional[date] = None,
+        include_sketch: bool = False
+    ) -> List[DeliveryTimeReport]:
+        """Delivery time percentiles per payment method or item (or overall) for completed orders"""
         try:
-            pipeline = [
-                {
-                    "$group": {
-                        "_id": "$paymentMethod",
-                        "orderCount": {"$sum": 1},
-                        "totalItems": {"$sum": "$totalItems"},
-                        "pendingOrders": {"$sum": {"$cond": [{"$eq": ["$status", "pending"]}, 1, 0]}},
-                        "completedOrders": {"$sum": {"$cond": [{"$eq": ["$status", "completed"]}, 1, 0]}},
-                        "orders": {"$push": "$$ROOT"}
-                    }
-                }
-            ]
-            
-            cursor = self.collection.aggregate(pipeline)
+            sketches = await self.get_delivery_sketches(dimension, start_date, end_date)
             reports = []
-            
-            async for result in cursor:
-                # Calculate average delivery time for this payment method
-                avg_delivery_time = None
-                delivery_times = []
-                
-                for order in result.get('orders', []):
-                    if (order.get('status') == 'completed' and 
-                        order.get('orderTime') and order.get('completedTime')):
-                        order_time = datetime.fromisoformat(order['orderTime'])
-                        completed_time = datetime.fromisoformat(order['completedTime'])
-                        delivery_minutes = (completed_time - order_time).total_seconds() / 60
-                        delivery_times.append(delivery_minutes)
-                
-                if delivery_times:
-                    avg_delivery_time = sum(delivery_times) / len(delivery_times)
-                
-                reports.append(PaymentReport(
-                    paymentMethod=result['_id'] or 'cash',
-                    orderCount=result['orderCount'],
-                    totalItems=result['totalItems'],
-                    pendingOrders=result['pendingOrders'],
-                    completedOrders=result['completedOrders'],
-                    averageDeliveryTime=avg_delivery_time
+            for key, sketch in sorted(sketches.items()):
+                p50, p90, p99 = sketch.quantiles()
+                reports.append(DeliveryTimeReport(
+                    dimension=dimension,
+                    key=key,
+                    completedOrders=sketch.count,
+                    p50DeliveryTime=p50,
+                    p90DeliveryTime=p90,
+                    p99DeliveryTime=p99,
+                    sketch=sketch.to_dict() if include_sketch else None
                 ))
-            
             return reports
+        except Exception as e:
+            logger.error(f"Error getting delivery time reports: {str(e)}")
+            raise e
+
+    async def get_payment_reports(
+        self,
+        start_time: Optional[datetime] = None,
+        end_time: Optional[datetime] = None
+    ) -> List[PaymentReport]:
+        """Generate payment method reports for orders placed in [start_time, end_time)"""
+        try:
+            async with self.pool.acquire() as conn:
+                # Single pass over the (order_time, payment_method) covering index
+                rows = await conn.fetch("""
+                    SELECT
+                        payment_method,
+                        COUNT(*) AS order_count,
+                        COALESCE(SUM(total_items), 0) AS total_items,
+                        COUNT(*) FILTER (WHERE status = 'pending') AS pending_orders,
+                        COUNT(*) FILTER (WHERE status = 'completed') AS completed_orders,
+                        AVG(EXTRACT(EPOCH FROM (completed_time - order_time)) / 60) FILTER (
+                            WHERE status = 'completed' AND completed_time IS NOT NULL
+                        ) AS average_delivery_time
+                    FROM orders
+                    WHERE ($1::timestamptz IS NULL OR order_time >= $1)
+                    AND ($2::timestamptz IS NULL OR order_time < $2)
+                    GROUP BY payment_method
+                    ORDER BY payment_method
+                """, self._localize(start_time), self._localize(end_time))
+
+                # Percentiles stay null for ranges that cut through a day
+                days = self._eastern_dates(start_time, end_time)
+                sketches = await self.get_delivery_sketches('payment_method', *days, conn) if days else {}
+
+                reports = []
+                for row in rows:
+                    p50, p90, p99 = sketches.get(row['payment_method'], DDSketch()).quantiles()
+                    reports.append(PaymentReport(
+                        paymentMethod=row['payment_method'],
+                        orderCount=row['order_count'],
+                        totalItems=row['total_items'],
+                        pendingOrders=row['pending_orders'],
+                        completedOrders=row['completed_orders'],
+                        averageDeliveryTime=float(row['average_delivery_time']) if row['average_delivery_time'] is not None else None,
+                        p50DeliveryTime=p50,
+                        p90DeliveryTime=p90,
+                        p99DeliveryTime=p99
+                    ))
+                return reports
         except Exception as e:
             logger.error(f"Error getting payment reports: {str(e)}")
             raise e
     
-    async def get_item_reports(self) -> List[ItemReport]:
+    async def iter_item_reports(
+        self,
+        start_time: Optional[datetime] = None,
+        end_time: Optional[datetime] = None,
+        recent_limit: int = 5
+    ) -> AsyncIterator[ItemReport]:
+        """Stream item-based reports for orders placed in [start_time, end_time), most ordered first"""
+        async with self.pool.acquire() as conn:
+            async with conn.transaction():
+                cursor = conn.cursor("""
+                    WITH lines AS (
+                        SELECT
+                            o.customer_name,
+                            o.payment_method,
+                            o.order_time,
+                            line->>'name' AS item_name,
+                            (line->>'quantity')::int AS quantity
+                        FROM orders o
+                        CROSS JOIN LATERAL jsonb_array_elements(o.items) AS line
+                        WHERE ($1::timestamptz IS NULL OR o.order_time >= $1)
+                        AND ($2::timestamptz IS NULL OR o.order_time < $2)
+                    ),
+                    totals AS (
+                        SELECT
+                            item_name,
+                            SUM(quantity) AS total_ordered,
+                            COUNT(*) AS order_count,
+                            mode() WITHIN GROUP (ORDER BY payment_method) AS popular_payment_method
+                        FROM lines
+                        GROUP BY item_name
+                    ),
+                    recent AS (
+                        SELECT item_name, array_agg(customer_name ORDER BY last_ordered DESC) AS customers
+                        FROM (
+                            SELECT
+                                item_name,
+                                customer_name,
+                                MAX(order_time) AS last_ordered,
+                                ROW_NUMBER() OVER (PARTITION BY item_name ORDER BY MAX(order_time) DESC) AS position
+                            FROM lines
+                            GROUP BY item_name, customer_name
+                        ) customers
+                        WHERE position <= $3
+                        GROUP BY item_name
+                    )
+                    SELECT t.*, r.customers
+                    FROM totals t
+                    LEFT JOIN recent r USING (item_name)
+                    ORDER BY t.total_ordered DESC, t.item_name
+                """, self._localize(start_time), self._localize(end_time), recent_limit)
+
+                async for row in cursor:
+                    yield ItemReport(
+                        itemName=row['item_name'],
+                        totalOrdered=row['total_ordered'],
+                        orderCount=row['order_count'],
+                        averageQuantityPerOrder=row['total_ordered'] / row['order_count'],
+                        popularPaymentMethod=row['popular_payment_method'] or 'cash',
+                        recentOrders=list(row['customers'] or [])
+                    )
+
+    async def get_item_reports(
+        self,
+        start_time: Optional[datetime] = None,
+        end_time: Optional[datetime] = None,
+        recent_limit: int = 5
+    ) -> List[ItemReport]:
         """Generate item-based reports"""
         try:
-            # Get all orders
-            orders = await self.get_all_orders()
-            
-            # Analyze items
-            item_stats = defaultdict(lambda: {
-                'total_ordered': 0,
-                'order_count': 0,
-                'customers': [],
-                'payment_methods': []
-            })
-            
-            for order in orders:
-                for item in order.items:
-                    item_stats[item.name]['total_ordered'] += item.quantity
-                    item_stats[item.name]['order_count'] += 1
-                    item_stats[item.name]['customers'].append(order.customerName)
-                    item_stats[item.name]['payment_methods'].append(order.paymentMethod)
-            
-            # Generate reports
-            reports = []
-            for item_name, stats in item_stats.items():
-                # Find most popular payment method
-                payment_counter = Counter(stats['payment_methods'])
-                popular_payment = payment_counter.most_common(1)[0][0] if payment_counter else 'cash'
-                
-                # Get recent customers (last 5)
-                recent_customers = list(set(stats['customers'][-5:]))
-                
-                reports.append(ItemReport(
-                    itemName=item_name,
-                    totalOrdered=stats['total_ordered'],
-                    orderCount=stats['order_count'],
-                    averageQuantityPerOrder=stats['total_ordered'] / stats['order_count'],
-                    popularPaymentMethod=popular_payment,
-                    recentOrders=recent_customers
-                ))
-            
-            # Sort by total ordered (descending)
-            reports.sort(key=lambda x: x.totalOrdered, reverse=True)
-            return reports
-            
+            return [report async for report in self.iter_item_reports(start_time, end_time, recent_limit)]
         except Exception as e:
             logger.error(f"Error getting item reports: {str(e)}")
             raise e
+
+    async def count_orders(self, start_time: Optional[datetime] = None, end_time: Optional[datetime] = None) -> int:
+        """Number of orders placed in [start_time, end_time)"""
+        async with self.pool.acquire() as conn:
+            return await conn.fetchval("""
+                SELECT COUNT(*) FROM orders
+                WHERE ($1::timestamptz IS NULL OR order_time >= $1)
+                AND ($2::timestamptz IS NULL OR order_time < $2)
+            """, self._localize(start_time), self._localize(end_time))
+
+    async def iter_order_rows(
+        self,
+        start_time: Optional[datetime] = None,
+        end_time: Optional[datetime] = None,
+        prefetch: int = 2000
+    ) -> AsyncIterator:
+        """Stream orders placed in [start_time, end_time) for export, oldest first.
+
+        Times come back as naive Eastern timestamps to the second and the items as one
+        "2x Dosa, 1x Coffee" string, so rows can be written out as they are.
+        """
+        async with self.pool.acquire() as conn:
+            async with conn.transaction():
+                cursor = conn.cursor("""
+                    SELECT
+                        o.order_number,
+                        date_trunc('second', o.order_time AT TIME ZONE 'US/Eastern') AS order_time,
+                        o.customer_name,
+                        o.payment_method,
+                        o.status,
+                        o.total_items,
+                        o.total_amount,
+                        o.delivery_minutes,
+                        date_trunc('second', o.completed_time AT TIME ZONE 'US/Eastern') AS completed_time,
+                        (
+                            SELECT string_agg(format('%sx %s', line->>'quantity', line->>'name'), ', ')
+                            FROM jsonb_array_elements(o.items) AS line
+                        ) AS items
+                    FROM orders o
+                    WHERE ($1::timestamptz IS NULL OR o.order_time >= $1)
+                    AND ($2::timestamptz IS NULL OR o.order_time < $2)
+                    ORDER BY o.order_time
+                """, self._localize(start_time), self._localize(end_time), prefetch=prefetch)
+
+                async for row in cursor:
+                    yield row
+
+    async def iter_order_line_rows(
+        self,
+        start_time: Optional[datetime] = None,
+        end_time: Optional[datetime] = None,
+        batch_size: int = 2000
+    ) -> AsyncIterator:
+        """Stream one row per item of the orders placed in [start_time, end_time), oldest order first.
+
+        Rows are fetched from a server-side cursor batch_size at a time; times are naive
+        Eastern timestamps to the second.
+        """
+        async with self.pool.acquire() as conn:
+            async with conn.transaction():
+                cursor = await conn.cursor("""
+                    SELECT
+                        o.order_number,
+                        date_trunc('second', o.order_time AT TIME ZONE 'US/Eastern') AS order_time,
+                        o.customer_name,
+                        o.payment_method,
+                        o.status,
+                        line.item->>'name' AS item_name,
+                        (line.item->>'quantity')::int AS quantity,
+                        (line.item->>'price')::numeric(10, 2) AS price,
+                        (line.item->>'subtotal')::numeric(10, 2) AS subtotal,
+                        COALESCE(line.item->>'cooking_status', 'not started') AS cooking_status,
+                        date_trunc('second', o.completed_time AT TIME ZONE 'US/Eastern') AS completed_time
+                    FROM orders o
+                    CROSS JOIN LATERAL jsonb_array_elements(o.items) WITH ORDINALITY AS line(item, position)
+                    WHERE ($1::timestamptz IS NULL OR o.order_time >= $1)
+                    AND ($2::timestamptz IS NULL OR o.order_time < $2)
+                    ORDER BY o.order_time, o.id, line.position
+                """, self._localize(start_time), self._localize(end_time))
+
+                while True:
+                    batch = await cursor.fetch(batch_size)
+                    if not batch:
+                        break
+                    for row in batch:
+                        yield row
+
+    async def get_timeseries(
+        self,
+        start_time: datetime,
+        end_time: datetime,
+        bucket: str = "hour",
+        group_by: Optional[str] = None
+    ) -> TimeSeriesReport:
+        """Orders, items and revenue per hour or Eastern day from the hourly rollups, with empty buckets filled"""
+        try:
+            if bucket not in ("hour", "day"):
+                raise ValueError(f"Unsupported bucket '{bucket}'")
+            if group_by not in TIMESERIES_SOURCES:
+                raise ValueError(f"Unsupported group_by '{group_by}'")
+
+            start_time = self._localize(start_time)
+            end_time = self._localize(end_time)
+            if end_time <= start_time:
+                raise ValueError("end_time must be after start_time")
+
+            bucket_size = timedelta(hours=1) if bucket == "hour" else timedelta(days=1)
+            if (end_time - start_time) / bucket_size > MAX_TIMESERIES_BUCKETS:
+                raise ValueError(f"Time range covers more than {MAX_TIMESERIES_BUCKETS} buckets")
+
+            table, group_expr, orders_expr, items_expr = TIMESERIES_SOURCES[group_by]
+            if bucket == "hour":
+                bucket_expr = "bucket_start"
+                buckets_sql = """
+                    SELECT generate_series(
+                        date_trunc('hour', $1::timestamptz, 'UTC'), $2::timestamptz - interval '1 microsecond', interval '1 hour'
+                    ) AS bucket
+                """
+            else:
+                # Eastern midnights, built from dates so DST days stay aligned
+                bucket_expr = "date_trunc('day', bucket_start, 'US/Eastern')"
+                buckets_sql = """
+                    SELECT day::timestamp AT TIME ZONE 'US/Eastern' AS bucket
+                    FROM generate_series(
+                        ($1::timestamptz AT TIME ZONE 'US/Eastern')::date,
+                        (($2::timestamptz - interval '1 microsecond') AT TIME ZONE 'US/Eastern')::date,
+                        interval '1 day'
+                    ) AS day
+                """
+            groups_sql = "SELECT NULL::text AS grp" if group_by is None else "SELECT DISTINCT grp FROM data"
+
+            async with self.pool.acquire() as conn:
+                rows = await conn.fetch(f"""
+                    WITH buckets AS ({buckets_sql}),
+                    data AS (
+                        SELECT
+                            {bucket_expr} AS bucket,
+                            {group_expr} AS grp,
+                            SUM({orders_expr}) AS orders,
+                            SUM({items_expr}) AS items,
+                            SUM(revenue) AS revenue
+                        FROM {table}
+                        WHERE bucket_start >= date_trunc('hour', $1::timestamptz, 'UTC')
+                        AND bucket_start < $2
+                        GROUP BY 1, 2
+                    ),
+                    groups AS ({groups_sql})
+                    SELECT
+                        b.bucket,
+                        g.grp,
+                        COALESCE(d.orders, 0) AS orders,
+                        COALESCE(d.items, 0) AS items,
+                        COALESCE(d.revenue, 0) AS revenue
+                    FROM buckets b
+                    CROSS JOIN groups g
+                    LEFT JOIN data d ON d.bucket = b.bucket AND d.grp IS NOT DISTINCT FROM g.grp
+                    ORDER BY b.bucket, g.grp
+                """, start_time, end_time)
+
+                return TimeSeriesReport(
+                    bucket=bucket,
+                    groupBy=group_by,
+                    start=start_time,
+                    end=end_time,
+                    points=[
+                        TimeSeriesPoint(
+                            bucket=row['bucket'].astimezone(EASTERN_TZ),
+                            group=row['grp'],
+                            orders=row['orders'],
+                            items=row['items'],
+                            revenue=float(row['revenue'])
+                        )
+                        for row in rows
+                    ]
+                )
+        except Exception as e:
+            logger.error(f"Error getting time series: {str(e)}")
+            raise e
     
     async def delete_order(self, order_id: str) -> bool:
         """Delete order by ID"""
         try:
             async with self.pool.acquire() as conn:
-                result = await conn.execute(
-                    "DELETE FROM orders WHERE id = $1",
-                    order_id
-                )
-                return result == "DELETE 1"
+                async with conn.transaction():
+                    status = await conn.fetchval(
+                        "SELECT status FROM orders WHERE id = $1 FOR UPDATE",
+                        order_id
+                    )
+                    # Take the order back out of the rollups before it disappears
+                    if status is not None:
+                        await self.rollup_service.record_order_placed(conn, order_id, sign=-1)
+                    if status == 'completed':
+                        await self.rollup_service.record_order_completed(conn, order_id, sign=-1)
+                    
+                    result = await conn.execute(
+                        "DELETE FROM orders WHERE id = $1",
+                        order_id
+                    )
+                if status is not None:
+                    await self.rollup_service.bump_data_version(conn)
+            self.kitchen_queue.remove(order_id)
+            return result == "DELETE 1"
         except Exception as e:
             logger.error(f"Error deleting order {order_id}: {str(e)}")
             return False
\ No newline at end of file
@@ -0,0 +1,68 @@
+from typing import Dict, Iterable, List, NamedTuple, Optional
+from bisect import bisect_left, bisect_right
+from datetime import datetime, timezone
+
+# Start of the interval of prices set before history was kept ('-infinity' in the table)
+SINCE_ALWAYS = datetime.min.replace(tzinfo=timezone.utc)
+
+class PriceInterval(NamedTuple):
+    price: float
+    valid_from: datetime
+    valid_to: Optional[datetime]  # None while the price is current
+
+    def as_dict(self) -> dict:
+        return {
+            'price': self.price,
+            'valid_from': None if self.valid_from == SINCE_ALWAYS else self.valid_from.isoformat(),
+            'valid_to': self.valid_to.isoformat() if self.valid_to else None
+        }
+
+def _aware(value: datetime) -> datetime:
+    # asyncpg returns '-infinity' as a naive datetime.min
+    return SINCE_ALWAYS if value.tzinfo is None else value
+
+class PriceHistoryIndex:
+    """Effective-dated list prices per menu item, for as-of lookups by bisection.
+
+    Built from menu_price_history rows ordered by item and valid_from. Each
+    item's intervals are sorted and do not overlap, so the price in effect
+    at a time is found with one bisect over the interval starts.
+    """
+
+    def __init__(self, rows: Iterable):
+        self.intervals: Dict[str, List[PriceInterval]] = {}
+        self.ids_by_name: Dict[str, str] = {}
+        for row in rows:
+            self.intervals.setdefault(row['menu_item_id'], []).append(PriceInterval(
+                float(row['price']),
+                _aware(row['valid_from']),
+                row['valid_to']
+            ))
+            if row['name']:
+                self.ids_by_name[row['name'].lower()] = row['menu_item_id']
+        self._starts = {
+            item_id: [interval.valid_from for interval in intervals]
+            for item_id, intervals in self.intervals.items()
+        }
+
+    def item_id(self, name: str) -> str:
+        """Menu item id for an item name as stored on orders"""
+        return self.ids_by_name.get(name.lower(), name.lower().replace(' ', '_'))
+
+    def price_at(self, item_id: str, at: datetime) -> Optional[float]:
+        """List price in effect at a time, or None if the item had none"""
+        position = bisect_right(self._starts.get(item_id, ()), at) - 1
+        if position < 0:
+            return None
+        interval = self.intervals[item_id][position]
+        return interval.price if interval.valid_to is None or at < interval.valid_to else None
+
+    def between(self, item_id: str, start: Optional[datetime] = None, end: Optional[datetime] = None) -> List[PriceInterval]:
+        """Intervals in effect at any time in [start, end), oldest first"""
+        starts = self._starts.get(item_id, [])
+        first = max(bisect_right(starts, start) - 1, 0) if start is not None else 0
+        last = bisect_left(starts, end) if end is not None else len(starts)
+        return [
+            interval for interval in self.intervals.get(item_id, [])[first:last]
+            if start is None or interval.valid_to is None or interval.valid_to > start
+        ]
@@ -0,0 +1,98 @@
+from typing import Dict, Iterable, Optional, Tuple
+import math
+
+# Relative accuracy of the delivery time sketches: a reported p90 of 30 minutes
+# is within 1% (18 seconds) of the true p90
+DELIVERY_TIME_ACCURACY = 0.01
+
+# Bucket number used for values too small to log-bucket (instant completions)
+ZERO_BUCKET = -(2 ** 31)
+
+class DDSketch:
+    """Mergeable quantile sketch with relative-error guarantees (DDSketch).
+
+    Positive values are counted in logarithmic buckets: bucket k holds values
+    in (gamma^(k-1), gamma^k] with gamma = (1 + a) / (1 - a), so any quantile
+    is returned within relative accuracy a of the true value. Two sketches
+    with the same accuracy merge by adding bucket counts, which is what the
+    delivery_time_buckets table does with SUM across days and workers.
+    """
+
+    def __init__(self, relative_accuracy: float = DELIVERY_TIME_ACCURACY, min_value: float = 1e-3):
+        if not 0 < relative_accuracy < 1:
+            raise ValueError("relative_accuracy must be between 0 and 1")
+        self.relative_accuracy = relative_accuracy
+        self.min_value = min_value
+        self.gamma = (1 + relative_accuracy) / (1 - relative_accuracy)
+        self.log_gamma = math.log(self.gamma)
+        self.bins: Dict[int, int] = {}
+        self.zero_count = 0
+
+    @property
+    def count(self) -> int:
+        return self.zero_count + sum(self.bins.values())
+
+    def key(self, value: float) -> int:
+        """Bucket number for a value"""
+        if value < self.min_value:
+            return ZERO_BUCKET
+        return math.ceil(math.log(value) / self.log_gamma)
+
+    def add(self, value: float, count: int = 1):
+        self.add_bucket(self.key(value), count)
+
+    def add_bucket(self, key: int, count: int):
+        """Add a pre-computed bucket count, e.g. a row from delivery_time_buckets"""
+        if key == ZERO_BUCKET:
+            self.zero_count += count
+            return
+        total = self.bins.get(key, 0) + count
+        if total:
+            self.bins[key] = total
+        else:
+            self.bins.pop(key, None)
+
+    def merge(self, other: "DDSketch"):
+        if other.relative_accuracy != self.relative_accuracy:
+            raise ValueError("Cannot merge sketches with different relative accuracy")
+        self.zero_count += other.zero_count
+        for key, count in other.bins.items():
+            self.add_bucket(key, count)
+
+    def quantile(self, q: float) -> Optional[float]:
+        """Estimated value at quantile q (0-1); None for an empty sketch"""
+        if not 0 <= q <= 1:
+            raise ValueError("q must be between 0 and 1")
+        total = self.count
+        if total <= 0:
+            return None
+
+        rank = q * (total - 1)
+        seen = self.zero_count
+        if rank < seen:
+            return 0.0
+        for key in sorted(self.bins):
+            seen += self.bins[key]
+            if rank < seen:
+                # Midpoint of the bucket in relative terms
+                return 2 * self.gamma ** key / (self.gamma + 1)
+        return 2 * self.gamma ** max(self.bins) / (self.gamma + 1)
+
+    def quantiles(self, qs: Iterable[float] = (0.5, 0.9, 0.99)) -> Tuple[Optional[float], ...]:
+        return tuple(self.quantile(q) for q in qs)
+
+    def to_dict(self) -> dict:
+        return {
+            'relative_accuracy': self.relative_accuracy,
+            'min_value': self.min_value,
+            'zero_count': self.zero_count,
+            'bins': {str(key): count for key, count in sorted(self.bins.items())}
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "DDSketch":
+        sketch = cls(data['relative_accuracy'], data.get('min_value', 1e-3))
+        sketch.zero_count = data.get('zero_count', 0)
+        for key, count in data.get('bins', {}).items():
+            sketch.add_bucket(int(key), count)
+        return sketch
@@ -0,0 +1,154 @@
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+from collections import OrderedDict
+from dataclasses import dataclass
+import asyncio
+import json
+import logging
+import time
+
+logger = logging.getLogger(__name__)
+
+@dataclass
+class CacheEntry:
+    value: Any
+    version: int
+    computed_at: float
+
+@dataclass
+class ReportMetrics:
+    hits: int = 0
+    stale_hits: int = 0
+    misses: int = 0
+    computes: int = 0
+    errors: int = 0
+    compute_seconds_total: float = 0.0
+    compute_seconds_max: float = 0.0
+    last_compute_seconds: Optional[float] = None
+
+    def as_dict(self) -> dict:
+        requests = self.hits + self.stale_hits + self.misses
+        return {
+            'requests': requests,
+            'hits': self.hits,
+            'stale_hits': self.stale_hits,
+            'misses': self.misses,
+            'hit_rate': round((self.hits + self.stale_hits) / requests, 4) if requests else None,
+            'computes': self.computes,
+            'errors': self.errors,
+            'average_compute_ms': round(self.compute_seconds_total / self.computes * 1000, 2) if self.computes else None,
+            'max_compute_ms': round(self.compute_seconds_max * 1000, 2),
+            'last_compute_ms': round(self.last_compute_seconds * 1000, 2) if self.last_compute_seconds is not None else None
+        }
+
+class ReportCache:
+    """Process-wide cache of report results keyed by report type, parameters and data version.
+
+    A result computed for an older data version is still served (stale hit)
+    while a single background task recomputes it, so readers only wait when
+    there is nothing cached for their parameters yet. Concurrent computations
+    of the same key are shared.
+    """
+    _instance = None
+
+    def __new__(cls):
+        if cls._instance is None:
+            cls._instance = super(ReportCache, cls).__new__(cls)
+        return cls._instance
+
+    def __init__(self, max_entries: int = 256):
+        # Initialize only once
+        if not hasattr(self, 'initialized'):
+            self.initialized = True
+            self.max_entries = max_entries
+            self._entries: "OrderedDict[Tuple[str, str], CacheEntry]" = OrderedDict()
+            self._inflight: Dict[Tuple[str, str], asyncio.Task] = {}
+            self._metrics: Dict[str, ReportMetrics] = {}
+
+    def _key(self, report_type: str, params: dict) -> Tuple[str, str]:
+        return report_type, json.dumps(params, sort_keys=True, default=str)
+
+    def _metrics_for(self, report_type: str) -> ReportMetrics:
+        if report_type not in self._metrics:
+            self._metrics[report_type] = ReportMetrics()
+        return self._metrics[report_type]
+
+    async def get_or_compute(
+        self,
+        report_type: str,
+        params: dict,
+        version: int,
+        compute: Callable[[], Awaitable[Any]]
+    ) -> Any:
+        """Return the cached report for these params, computing it at most once per data version"""
+        key = self._key(report_type, params)
+        metrics = self._metrics_for(report_type)
+        entry = self._entries.get(key)
+
+        if entry is not None:
+            self._entries.move_to_end(key)
+            if entry.version >= version:
+                metrics.hits += 1
+                return entry.value
+
+            # Serve the stale result and refresh it in the background
+            metrics.stale_hits += 1
+            self._refresh(key, report_type, version, compute)
+            return entry.value
+
+        metrics.misses += 1
+        return await asyncio.shield(self._refresh(key, report_type, version, compute))
+
+    def _refresh(self, key, report_type: str, version: int, compute) -> asyncio.Task:
+        task = self._inflight.get(key)
+        if task is None:
+            task = asyncio.create_task(self._compute(key, report_type, version, compute))
+            self._inflight[key] = task
+            task.add_done_callback(lambda t: self._on_refreshed(key, t))
+        return task
+
+    def _on_refreshed(self, key, task: asyncio.Task):
+        self._inflight.pop(key, None)
+        # Background refresh failures are logged in _compute; keep asyncio quiet about them
+        if not task.cancelled():
+            task.exception()
+
+    async def _compute(self, key, report_type: str, version: int, compute) -> Any:
+        metrics = self._metrics_for(report_type)
+        started = time.perf_counter()
+        try:
+            value = await compute()
+        except Exception as e:
+            metrics.errors += 1
+            logger.error(f"Error computing {report_type} report: {str(e)}")
+            raise
+        elapsed = time.perf_counter() - started
+
+        metrics.computes += 1
+        metrics.compute_seconds_total += elapsed
+        metrics.compute_seconds_max = max(metrics.compute_seconds_max, elapsed)
+        metrics.last_compute_seconds = elapsed
+
+        current = self._entries.get(key)
+        if current is None or current.version <= version:
+            self._entries[key] = CacheEntry(value=value, version=version, computed_at=time.time())
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return value
+
+    def version_of(self, report_type: str, params: dict) -> Optional[int]:
+        """Data version the cached result for these params was computed for"""
+        entry = self._entries.get(self._key(report_type, params))
+        return entry.version if entry is not None else None
+
+    def metrics(self) -> dict:
+        """Per-report hit/miss counters and compute times"""
+        return {
+            'entries': len(self._entries),
+            'refreshing': len(self._inflight),
+            'reports': {name: m.as_dict() for name, m in sorted(self._metrics.items())}
+        }
+
+    def clear(self):
+        self._entries.clear()
+        self._metrics.clear()
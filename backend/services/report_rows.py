@@ -0,0 +1,87 @@
+from typing import List, Mapping
+from models.order import PaymentReport, ItemReport
+
+# Columns of the order-level export, in order, for every file format
+ORDER_COLUMNS = [
+    'Order Number', 'Order Time', 'Customer Name', 'Payment Method', 'Status', 'Items',
+    'Total Items', 'Total Amount ($)', 'Delivery Minutes', 'Completed Time'
+]
+
+# Columns of the line-item export, one row per item of an order
+LINE_ITEM_COLUMNS = [
+    'Order Number', 'Order Time', 'Customer Name', 'Payment Method', 'Order Status', 'Item Name',
+    'Quantity', 'Unit Price ($)', 'Subtotal ($)', 'Cooking Status', 'Completed Time'
+]
+
+def payment_report_rows(payment_reports: List[PaymentReport]) -> List[dict]:
+    """One row per payment method; missing delivery times are None"""
+    return [
+        {
+            'Payment Method': report.paymentMethod.upper(),
+            'Total Orders': report.orderCount,
+            'Total Items Sold': report.totalItems,
+            'Pending Orders': report.pendingOrders,
+            'Completed Orders': report.completedOrders,
+            'Average Delivery Time (minutes)': round(report.averageDeliveryTime, 2) if report.averageDeliveryTime else None,
+            'Median Delivery Time (minutes)': round(report.p50DeliveryTime, 2) if report.p50DeliveryTime is not None else None,
+            'P90 Delivery Time (minutes)': round(report.p90DeliveryTime, 2) if report.p90DeliveryTime is not None else None,
+            'P99 Delivery Time (minutes)': round(report.p99DeliveryTime, 2) if report.p99DeliveryTime is not None else None,
+            'Completion Rate (%)': round((report.completedOrders / report.orderCount) * 100, 1) if report.orderCount > 0 else 0
+        }
+        for report in payment_reports
+    ]
+
+def item_report_rows(item_reports: List[ItemReport]) -> List[dict]:
+    """One row per menu item"""
+    return [
+        {
+            'Item Name': report.itemName,
+            'Total Quantity Ordered': report.totalOrdered,
+            'Number of Orders': report.orderCount,
+            'Average Quantity per Order': round(report.averageQuantityPerOrder, 2),
+            'Most Popular Payment Method': report.popularPaymentMethod.upper(),
+            'Recent Customers': ', '.join(report.recentOrders[:5]),  # First 5 customers
+            'Total Recent Customers': len(report.recentOrders)
+        }
+        for report in item_reports
+    ]
+
+def price_analysis_rows(price_analysis: dict) -> List[dict]:
+    """One row per item of a price analysis"""
+    total_revenue = price_analysis.get('total_revenue', 0)
+    return [
+        {
+            'Item Name': item.get('item_name', ''),
+            'Category': item.get('category', ''),
+            'Unit Price ($)': round(item.get('unit_price', 0), 2),
+            'Total Quantity Sold': item.get('total_quantity', 0),
+            'Total Revenue ($)': round(item.get('total_revenue', 0), 2),
+            'Number of Orders': item.get('order_count', 0),
+            'Avg Qty per Order': round(item.get('total_quantity', 0) / item.get('order_count', 1), 2) if item.get('order_count', 0) > 0 else 0,
+            'Revenue %': round((item.get('total_revenue', 0) / total_revenue) * 100, 2) if total_revenue > 0 else 0
+        }
+        for item in price_analysis.get('items', [])
+    ]
+
+def order_row(row: Mapping) -> tuple:
+    """Values of an ``OrderService.iter_order_rows`` row in ORDER_COLUMNS order"""
+    return (
+        row['order_number'], row['order_time'], row['customer_name'], row['payment_method'].upper(),
+        row['status'], row['items'], row['total_items'], row['total_amount'], row['delivery_minutes'],
+        row['completed_time']
+    )
+
+def line_item_row(row: Mapping) -> tuple:
+    """Values of an ``OrderService.iter_order_line_rows`` row in LINE_ITEM_COLUMNS order"""
+    return (
+        row['order_number'], row['order_time'], row['customer_name'], row['payment_method'].upper(),
+        row['status'], row['item_name'], row['quantity'], row['price'], row['subtotal'],
+        row['cooking_status'], row['completed_time']
+    )
+
+# Row builder per aggregate report export
+REPORT_ROWS = {
+    'payment': payment_report_rows,
+    'items': item_report_rows,
+    'price_analysis': price_analysis_rows,
+}
@@ -0,0 +1,244 @@
+from asyncpg import Pool, Connection
+from services.quantile_sketch import DDSketch, DELIVERY_TIME_ACCURACY, ZERO_BUCKET
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Sketch dimensions a completed order contributes one delivery time sample to
+DELIVERY_DIMENSIONS = """
+    SELECT 'all', ''
+    UNION ALL
+    SELECT 'payment_method', d.payment_method
+    UNION ALL
+    SELECT DISTINCT 'item', line->>'name' FROM jsonb_array_elements(d.items) AS line
+"""
+
+class RollupService:
+    """Maintains the reporting rollup tables.
+
+    The record_* methods take the caller's connection so the rollup changes
+    commit or roll back together with the order change that triggered them.
+    Once that commits, the caller moves the 'orders' data version that cached
+    reports are keyed on with bump_data_version.
+    """
+
+    def __init__(self, pool: Pool):
+        self.pool = pool
+        # Log-bucket number of d.minutes, matching DDSketch.key()
+        sketch = DDSketch(DELIVERY_TIME_ACCURACY)
+        self.delivery_bucket = (
+            f"CASE WHEN d.minutes >= {sketch.min_value!r} "
+            f"THEN CEIL(LN(d.minutes) / {sketch.log_gamma!r})::int ELSE {ZERO_BUCKET} END"
+        )
+
+    async def record_order_placed(self, conn: Connection, order_id: str, sign: int = 1):
+        """Add a newly placed order to the hourly rollups (sign=-1 removes it again)"""
+        await conn.execute("""
+            WITH placed AS (
+                SELECT
+                    date_trunc('hour', order_time, 'UTC') AS bucket_start,
+                    payment_method,
+                    total_items,
+                    total_amount,
+                    items
+                FROM orders
+                WHERE id = $1
+            ),
+            item_rollup AS (
+                INSERT INTO hourly_item_stats AS s (
+                    bucket_start, item_name, payment_method, category, quantity, revenue, order_count
+                )
+                SELECT
+                    p.bucket_start,
+                    line->>'name',
+                    p.payment_method,
+                    COALESCE((SELECT category FROM menu_items m WHERE m.name = line->>'name' LIMIT 1), 'Other'),
+                    $2 * SUM((line->>'quantity')::int),
+                    $2 * SUM(COALESCE(
+                        (line->>'subtotal')::numeric,
+                        (line->>'price')::numeric * (line->>'quantity')::int
+                    )),
+                    $2 * COUNT(*)
+                FROM placed p
+                CROSS JOIN LATERAL jsonb_array_elements(p.items) AS line
+                GROUP BY 1, 2, 3, 4
+                ON CONFLICT (bucket_start, item_name, payment_method) DO UPDATE SET
+                    category = EXCLUDED.category,
+                    quantity = s.quantity + EXCLUDED.quantity,
+                    revenue = s.revenue + EXCLUDED.revenue,
+                    order_count = s.order_count + EXCLUDED.order_count
+            )
+            INSERT INTO hourly_order_stats AS h (bucket_start, payment_method, order_count, item_count, revenue)
+            SELECT bucket_start, payment_method, $2, $2 * total_items, $2 * total_amount
+            FROM placed
+            ON CONFLICT (bucket_start, payment_method) DO UPDATE SET
+                order_count = h.order_count + EXCLUDED.order_count,
+                item_count = h.item_count + EXCLUDED.item_count,
+                revenue = h.revenue + EXCLUDED.revenue
+        """, order_id, sign)
+
+    async def record_order_completed(self, conn: Connection, order_id: str, sign: int = 1):
+        """Add a completed order to the daily rollups (sign=-1 removes it again)"""
+        await conn.execute(f"""
+            WITH lines AS (
+                SELECT
+                    (o.order_time AT TIME ZONE 'US/Eastern')::date AS stat_date,
+                    line->>'name' AS item_name,
+                    (line->>'quantity')::int AS quantity,
+                    COALESCE(
+                        (line->>'subtotal')::numeric,
+                        (line->>'price')::numeric * (line->>'quantity')::int
+                    ) AS revenue,
+                    (line->>'price')::numeric AS unit_price
+                FROM orders o
+                CROSS JOIN LATERAL jsonb_array_elements(o.items) AS line
+                WHERE o.id = $1
+            ),
+            item_rollup AS (
+                INSERT INTO daily_item_stats AS s (stat_date, item_name, quantity, revenue, order_count, unit_price)
+                SELECT stat_date, item_name, $2 * SUM(quantity), $2 * SUM(revenue), $2 * COUNT(*), MAX(unit_price)
+                FROM lines
+                GROUP BY stat_date, item_name
+                ON CONFLICT (stat_date, item_name) DO UPDATE SET
+                    quantity = s.quantity + EXCLUDED.quantity,
+                    revenue = s.revenue + EXCLUDED.revenue,
+                    order_count = s.order_count + EXCLUDED.order_count,
+                    unit_price = CASE WHEN EXCLUDED.order_count > 0 THEN EXCLUDED.unit_price ELSE s.unit_price END
+            ),
+            delivery AS (
+                SELECT
+                    (order_time AT TIME ZONE 'US/Eastern')::date AS stat_date,
+                    payment_method,
+                    items,
+                    EXTRACT(EPOCH FROM (completed_time - order_time)) / 60 AS minutes
+                FROM orders
+                WHERE id = $1 AND completed_time IS NOT NULL
+            ),
+            delivery_rollup AS (
+                INSERT INTO delivery_time_buckets AS b (stat_date, dimension, dimension_key, bucket, count)
+                SELECT d.stat_date, dim.dimension, dim.dimension_key, {self.delivery_bucket}, $2
+                FROM delivery d
+                CROSS JOIN LATERAL ({DELIVERY_DIMENSIONS}) AS dim(dimension, dimension_key)
+                ON CONFLICT (stat_date, dimension, dimension_key, bucket) DO UPDATE SET
+                    count = b.count + EXCLUDED.count
+            )
+            INSERT INTO daily_order_stats AS d (stat_date, order_count)
+            SELECT (order_time AT TIME ZONE 'US/Eastern')::date, $2
+            FROM orders
+            WHERE id = $1
+            ON CONFLICT (stat_date) DO UPDATE SET
+                order_count = d.order_count + EXCLUDED.order_count
+        """, order_id, sign)
+
+    async def data_version(self, conn: Connection) -> int:
+        """The 'orders' data version"""
+        return await conn.fetchval("SELECT last_value FROM orders_version_seq")
+
+    async def bump_data_version(self, conn: Connection):
+        """Invalidate reports cached against the 'orders' data version.
+
+        Call it after the change commits, outside the transaction: nextval
+        never waits on other writers, and a reader that sees the new version
+        is then sure to see the change too.
+        """
+        await conn.execute("SELECT nextval('orders_version_seq')")
+
+    async def rebuild_daily_stats(self) -> int:
+        """Recompute the daily rollups from all completed orders; returns the number of item rows"""
+        async with self.pool.acquire() as conn:
+            async with conn.transaction():
+                # Wait for in-flight completions and hold off new ones until the rebuild commits
+                await conn.execute("LOCK TABLE daily_item_stats, daily_order_stats, delivery_time_buckets IN EXCLUSIVE MODE")
+                await conn.execute("DELETE FROM daily_item_stats")
+                await conn.execute("DELETE FROM daily_order_stats")
+                await conn.execute("DELETE FROM delivery_time_buckets")
+
+                result = await conn.execute("""
+                    INSERT INTO daily_item_stats (stat_date, item_name, quantity, revenue, order_count, unit_price)
+                    SELECT
+                        (o.order_time AT TIME ZONE 'US/Eastern')::date,
+                        line->>'name',
+                        SUM((line->>'quantity')::int),
+                        SUM(COALESCE(
+                            (line->>'subtotal')::numeric,
+                            (line->>'price')::numeric * (line->>'quantity')::int
+                        )),
+                        COUNT(*),
+                        (array_agg((line->>'price')::numeric ORDER BY o.order_time DESC))[1]
+                    FROM orders o
+                    CROSS JOIN LATERAL jsonb_array_elements(o.items) AS line
+                    WHERE o.status = 'completed'
+                    GROUP BY 1, 2
+                """)
+                await conn.execute("""
+                    INSERT INTO daily_order_stats (stat_date, order_count)
+                    SELECT (order_time AT TIME ZONE 'US/Eastern')::date, COUNT(*)
+                    FROM orders
+                    WHERE status = 'completed'
+                    GROUP BY 1
+                """)
+                await conn.execute(f"""
+                    INSERT INTO delivery_time_buckets (stat_date, dimension, dimension_key, bucket, count)
+                    SELECT d.stat_date, dim.dimension, dim.dimension_key, {self.delivery_bucket}, COUNT(*)
+                    FROM (
+                        SELECT
+                            (order_time AT TIME ZONE 'US/Eastern')::date AS stat_date,
+                            payment_method,
+                            items,
+                            EXTRACT(EPOCH FROM (completed_time - order_time)) / 60 AS minutes
+                        FROM orders
+                        WHERE status = 'completed' AND completed_time IS NOT NULL
+                    ) d
+                    CROSS JOIN LATERAL ({DELIVERY_DIMENSIONS}) AS dim(dimension, dimension_key)
+                    GROUP BY 1, 2, 3, 4
+                """)
+
+            await self.bump_data_version(conn)
+
+            item_rows = int(result.split()[-1])
+            logger.info(f"Rebuilt daily rollups with {item_rows} item rows")
+            return item_rows
+
+    async def rebuild_hourly_stats(self) -> int:
+        """Recompute the hourly rollups from all orders; returns the number of item rows"""
+        async with self.pool.acquire() as conn:
+            async with conn.transaction():
+                # Wait for in-flight orders and hold off new ones until the rebuild commits
+                await conn.execute("LOCK TABLE hourly_item_stats, hourly_order_stats IN EXCLUSIVE MODE")
+                await conn.execute("DELETE FROM hourly_item_stats")
+                await conn.execute("DELETE FROM hourly_order_stats")
+
+                result = await conn.execute("""
+                    INSERT INTO hourly_item_stats (
+                        bucket_start, item_name, payment_method, category, quantity, revenue, order_count
+                    )
+                    SELECT
+                        date_trunc('hour', o.order_time, 'UTC'),
+                        line->>'name',
+                        o.payment_method,
+                        COALESCE(m.category, 'Other'),
+                        SUM((line->>'quantity')::int),
+                        SUM(COALESCE(
+                            (line->>'subtotal')::numeric,
+                            (line->>'price')::numeric * (line->>'quantity')::int
+                        )),
+                        COUNT(*)
+                    FROM orders o
+                    CROSS JOIN LATERAL jsonb_array_elements(o.items) AS line
+                    LEFT JOIN LATERAL (
+                        SELECT category FROM menu_items WHERE name = line->>'name' LIMIT 1
+                    ) m ON true
+                    GROUP BY 1, 2, 3, 4
+                """)
+                await conn.execute("""
+                    INSERT INTO hourly_order_stats (bucket_start, payment_method, order_count, item_count, revenue)
+                    SELECT date_trunc('hour', order_time, 'UTC'), payment_method, COUNT(*), SUM(total_items), SUM(total_amount)
+                    FROM orders
+                    GROUP BY 1, 2
+                """)
+
+            await self.bump_data_version(conn)
+
+            item_rows = int(result.split()[-1])
+            logger.info(f"Rebuilt hourly rollups with {item_rows} item rows")
+            return item_rows
@@ -0,0 +1,201 @@
+from typing import AsyncIterator, Dict, Iterable, List, Optional
+from dataclasses import dataclass, field
+from datetime import datetime
+from models.menu import MenuItem
+from models.order import EASTERN_TZ
+from services.kitchen_queue import KitchenQueue, THROUGHPUT_WINDOW
+from services.batch_scheduler import BatchScheduler
+from services.menu_service import MenuService
+import asyncio
+import json
+import logging
+import re
+
+logger = logging.getLogger(__name__)
+
+# Station for items that are not on the menu or have no chef
+UNASSIGNED_STATION = 'unassigned'
+
+# Seconds between keep-alive comments on an idle station stream
+STREAM_HEARTBEAT_SECONDS = 15
+
+def station_id(chef: Optional[str]) -> str:
+    """URL-safe station id for a chef name, e.g. 'Ravi Mom' -> 'ravi-mom'"""
+    slug = re.sub(r'[^a-z0-9]+', '-', (chef or '').lower()).strip('-')
+    return slug or UNASSIGNED_STATION
+
+@dataclass
+class Station:
+    id: str
+    chef: str
+    sous_chefs: List[str] = field(default_factory=list)
+    items: List[str] = field(default_factory=list)
+
+class StationBoard:
+    """Pending kitchen work per chef station, derived from the kitchen queue.
+
+    Every menu item belongs to the station of its chef; its sous chef is
+    listed as a helper there. The board listens to kitchen queue changes and
+    bumps a version per station, so a station's tablet can stream just its
+    own slice and only receive it again when one of its items changed.
+
+    Like the kitchen queue, the board is per process: a stream only sees
+    changes made through its own worker.
+    """
+    _instance = None
+
+    def __new__(cls):
+        if cls._instance is None:
+            cls._instance = super(StationBoard, cls).__new__(cls)
+        return cls._instance
+
+    def __init__(self):
+        # Initialize only once
+        if not hasattr(self, 'initialized'):
+            self.initialized = True
+            self.kitchen_queue = KitchenQueue()
+            self.batch_scheduler = BatchScheduler()
+            self.stations: Dict[str, Station] = {}
+            self.item_stations: Dict[str, str] = {}
+            self._versions: Dict[str, int] = {}
+            self._changed: Dict[str, asyncio.Event] = {}
+            self.kitchen_queue.listeners.append(self._on_item_changed)
+            # Reassign items whenever a changed menu is loaded
+            MenuService().listeners.append(lambda snapshot: self.load_menu(snapshot.items))
+
+    def load_menu(self, menu_items: Iterable[MenuItem]):
+        """Assign menu items to their chef's station"""
+        stations: Dict[str, Station] = {}
+        item_stations: Dict[str, str] = {}
+        for item in menu_items:
+            sid = station_id(item.chef)
+            station = stations.get(sid)
+            if station is None:
+                station = stations[sid] = Station(id=sid, chef=item.chef or 'Unassigned')
+            if item.sousChef and item.sousChef not in station.sous_chefs:
+                station.sous_chefs.append(item.sousChef)
+            station.items.append(item.name)
+            item_stations[item.name] = sid
+        self.stations = stations
+        self.item_stations = item_stations
+        for sid in stations:
+            self._bump(sid)
+
+    def station_for(self, item_name: str) -> str:
+        sid = self.item_stations.get(item_name)
+        if sid is None:
+            # Off-menu item: park it on the unassigned station
+            sid = self.item_stations[item_name] = UNASSIGNED_STATION
+            station = self.stations.get(sid)
+            if station is None:
+                station = self.stations[sid] = Station(id=sid, chef='Unassigned')
+            station.items.append(item_name)
+        return sid
+
+    def _bump(self, sid: str):
+        self._versions[sid] = self._versions.get(sid, 0) + 1
+        event = self._changed.pop(sid, None)
+        if event is not None:
+            event.set()
+
+    def _on_item_changed(self, item_name: str):
+        self._bump(self.station_for(item_name))
+
+    def version(self, sid: str) -> int:
+        return self._versions.get(sid, 0)
+
+    async def wait_for_change(self, sid: str, version: int, timeout: float) -> bool:
+        """Wait until the station's version moves past ``version``; False on timeout"""
+        if self.version(sid) != version:
+            return True
+        event = self._changed.get(sid)
+        if event is None:
+            event = self._changed[sid] = asyncio.Event()
+        try:
+            await asyncio.wait_for(event.wait(), timeout)
+            return True
+        except asyncio.TimeoutError:
+            return False
+
+    def _oldest_line(self, item_names: Iterable[str]) -> Optional[dict]:
+        """Oldest unfinished line across items (the heads of their cooking and waiting queues)"""
+        oldest = None
+        for item_name in item_names:
+            queue = self.kitchen_queue.items.get(item_name)
+            if queue is None:
+                continue
+            for lines in (queue.cooking, queue.waiting):
+                line = next(iter(lines.values()), None)
+                if line is None:
+                    continue
+                order = self.kitchen_queue.orders[line.order_id]
+                if oldest is None or order.enqueued_at < oldest['order_time']:
+                    oldest = {
+                        'order_id': line.order_id,
+                        'order_number': order.order_number,
+                        'item_name': item_name,
+                        'order_time': order.enqueued_at
+                    }
+        return oldest
+
+    def summary(self, sid: str, now: Optional[datetime] = None) -> dict:
+        """Pending units, oldest waiting order and last-hour throughput of one station"""
+        now = now or datetime.now(EASTERN_TZ)
+        station = self.stations[sid]
+        queues = [self.kitchen_queue.items[name] for name in station.items if name in self.kitchen_queue.items]
+        oldest = self._oldest_line(station.items)
+        if oldest is not None:
+            oldest['wait_minutes'] = round((now - oldest['order_time']).total_seconds() / 60, 1)
+        return {
+            'station': station.id,
+            'chef': station.chef,
+            'sous_chefs': station.sous_chefs,
+            'items': station.items,
+            'pending_units': sum(queue.pending for queue in queues),
+            'waiting_units': sum(line.quantity for queue in queues for line in queue.waiting.values()),
+            'cooking_units': sum(line.quantity for queue in queues for line in queue.cooking.values()),
+            'oldest_waiting': oldest,
+            'finished_last_hour': sum(queue.finished_since(now - THROUGHPUT_WINDOW) for queue in queues),
+            'version': self.version(sid)
+        }
+
+    def summaries(self, now: Optional[datetime] = None) -> List[dict]:
+        return [self.summary(sid, now) for sid in sorted(self.stations)]
+
+    def station_view(self, sid: str, now: Optional[datetime] = None) -> dict:
+        """A station's summary plus its open order lines and next batch per item"""
+        view = self.summary(sid, now)
+        items = []
+        for item_name in self.stations[sid].items:
+            queue = self.kitchen_queue.items.get(item_name)
+            if queue is None or queue.pending == 0:
+                continue
+            orders = []
+            for line in list(queue.cooking.values()) + list(queue.waiting.values()):
+                order = self.kitchen_queue.orders[line.order_id]
+                orders.append({
+                    'order_id': line.order_id,
+                    'order_number': order.order_number,
+                    'quantity': line.quantity,
+                    'cooking_status': line.status,
+                    'order_time': order.enqueued_at
+                })
+            items.append({
+                'item_name': item_name,
+                'pending_units': queue.pending,
+                'next_batch': self.batch_scheduler.next_batch(item_name),
+                'orders': orders
+            })
+        view['lines'] = items
+        return view
+
+    async def stream(self, sid: str, heartbeat: float = STREAM_HEARTBEAT_SECONDS) -> AsyncIterator[str]:
+        """Server-sent events with the station's view, sent again after every change"""
+        version = None
+        while True:
+            current = self.version(sid)
+            if current != version:
+                version = current
+                yield f"event: station\ndata: {json.dumps(self.station_view(sid), default=str)}\n\n"
+            if not await self.wait_for_change(sid, version, heartbeat):
+                yield ": keep-alive\n\n"
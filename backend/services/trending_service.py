@@ -0,0 +1,156 @@
+from typing import Dict, Iterable, Optional, Tuple
+import heapq
+import logging
+import time
+
+logger = logging.getLogger(__name__)
+
+# Window sizes (minutes) the trending endpoint serves
+TRENDING_WINDOWS = (15, 60)
+
+class SpaceSaving:
+    """Space-Saving heavy-hitters summary with a fixed number of counters.
+
+    Once all counters are taken, a new item replaces the smallest counter and
+    inherits its count, so an estimate never undercounts a tracked item and
+    overcounts it by at most total / capacity.
+    """
+
+    def __init__(self, capacity: int):
+        self.capacity = capacity
+        self.counts: Dict[str, int] = {}
+        self.total = 0
+
+    @property
+    def full(self) -> bool:
+        return len(self.counts) >= self.capacity
+
+    def add(self, item: str, count: int = 1) -> Optional[Tuple[str, int]]:
+        """Count an item; returns the (item, count) evicted to make room, if any"""
+        self.total += count
+        if item in self.counts or not self.full:
+            self.counts[item] = self.counts.get(item, 0) + count
+            return None
+
+        victim = min(self.counts, key=self.counts.get)
+        floor = self.counts.pop(victim)
+        self.counts[item] = floor + count
+        return victim, floor
+
+class TrendingService:
+    """Top-K items ordered in the last 15 or 60 minutes.
+
+    Orders are counted (by quantity) into one Space-Saving summary per minute,
+    kept in a ring covering the largest window. Each window keeps a running
+    total per item: minutes entering it are added and minutes leaving it are
+    subtracted, so a top-K query only scans that window's totals. Their size
+    is bounded by window * capacity and does not depend on order volume.
+
+    Error bounds: while no minute has more distinct items than ``capacity``,
+    the counts are exact. Otherwise every count is within
+    ``window quantity / capacity`` of the true quantity. The window starts on
+    a minute boundary, so "last 15 minutes" covers the current partial minute
+    plus the 14 before it.
+
+    Counts are per process and only include orders placed through it, plus
+    whatever OrderService.warm_trending() loaded at startup.
+    """
+    _instance = None
+
+    def __new__(cls):
+        if cls._instance is None:
+            cls._instance = super(TrendingService, cls).__new__(cls)
+        return cls._instance
+
+    def __init__(self, capacity: int = 64, clock=time.time):
+        # Initialize only once
+        if not hasattr(self, 'initialized'):
+            self.initialized = True
+            self.capacity = capacity
+            self.clock = clock
+            self._buckets: Dict[int, SpaceSaving] = {}
+            self._totals: Dict[int, Dict[str, int]] = {window: {} for window in TRENDING_WINDOWS}
+            self._quantity: Dict[int, int] = {window: 0 for window in TRENDING_WINDOWS}
+            self._window_start: Dict[int, Optional[int]] = {window: None for window in TRENDING_WINDOWS}
+
+    def _apply(self, window: int, item: str, count: int):
+        totals = self._totals[window]
+        value = totals.get(item, 0) + count
+        if value > 0:
+            totals[item] = value
+        else:
+            totals.pop(item, None)
+
+    def _advance(self, minute: int):
+        """Slide every window so it ends at ``minute``"""
+        for window in TRENDING_WINDOWS:
+            start = minute - window + 1
+            previous = self._window_start[window]
+            if previous is not None and previous < start:
+                # Subtract the minutes that fell out of this window
+                for expired in range(previous, min(start, previous + max(TRENDING_WINDOWS) + 1)):
+                    bucket = self._buckets.get(expired)
+                    if bucket is None:
+                        continue
+                    for item, count in bucket.counts.items():
+                        self._apply(window, item, -count)
+                    self._quantity[window] -= bucket.total
+            if previous is None or previous < start:
+                self._window_start[window] = start
+
+        oldest = minute - max(TRENDING_WINDOWS) + 1
+        for expired in [m for m in self._buckets if m < oldest]:
+            del self._buckets[expired]
+
+    def record(self, items: Iterable[Tuple[str, int]], at: Optional[float] = None):
+        """Count the (item name, quantity) lines of an order placed at ``at`` (epoch seconds, default now)"""
+        now_minute = int(self.clock() // 60)
+        minute = int((at if at is not None else self.clock()) // 60)
+        self._advance(now_minute)
+        if minute > now_minute or minute < now_minute - max(TRENDING_WINDOWS) + 1:
+            return
+
+        bucket = self._buckets.get(minute)
+        if bucket is None:
+            bucket = self._buckets[minute] = SpaceSaving(self.capacity)
+
+        windows = [window for window in TRENDING_WINDOWS if minute >= self._window_start[window]]
+        for item, quantity in items:
+            evicted = bucket.add(item, quantity)
+            for window in windows:
+                if evicted is not None:
+                    # The new item took over the evicted counter's count
+                    self._apply(window, evicted[0], -evicted[1])
+                    self._apply(window, item, evicted[1])
+                self._apply(window, item, quantity)
+                self._quantity[window] += quantity
+
+    def top(self, window: int, k: int = 5) -> dict:
+        """Top ``k`` items by quantity in the last ``window`` minutes"""
+        if window not in TRENDING_WINDOWS:
+            raise ValueError(f"window must be one of {', '.join(str(w) for w in TRENDING_WINDOWS)}")
+        if k < 1:
+            raise ValueError("k must be at least 1")
+
+        now_minute = int(self.clock() // 60)
+        self._advance(now_minute)
+        start = self._window_start[window]
+        quantity = self._quantity[window]
+        exact = not any(
+            bucket.full for minute, bucket in self._buckets.items() if minute >= start
+        )
+
+        top_items = heapq.nlargest(k, self._totals[window].items(), key=lambda entry: entry[1])
+        return {
+            'window_minutes': window,
+            'total_quantity': quantity,
+            'error_bound': 0.0 if exact else quantity / self.capacity,
+            'items': [{'item_name': item, 'quantity': count} for item, count in top_items]
+        }
+
+    def clear(self):
+        self._buckets.clear()
+        for window in TRENDING_WINDOWS:
+            self._totals[window] = {}
+            self._quantity[window] = 0
+            self._window_start[window] = None
@@ -1,7 +1,14 @@
 import pytest
+import pytest_asyncio
 import asyncpg
 import os
 from dotenv import load_dotenv
+from benchmarks.synthetic import bench_pool, reset_schema
+from services.kitchen_queue import KitchenQueue
+from services.menu_service import MenuService
+from services.order_service import OrderService
+from services.station_board import StationBoard
+from services.trending_service import TrendingService
 
 load_dotenv()
 
@@ -19,3 +26,27 @@ async def pool():
     
     # Close the pool after tests
     await pool.close()
+
+@pytest_asyncio.fixture
+async def schema_pool(request):
+    """Pool over a throwaway schema with the migrated tables and the benchmark menu.
+
+    The schema is named after the test module unless a name is passed with
+    indirect parametrization; it is dropped after the test.
+    """
+    schema = getattr(request, 'param', None) or request.module.__name__.rsplit('.', 1)[-1]
+    async with bench_pool(schema, max_size=25) as pool:
+        await reset_schema(pool, schema)
+        yield pool
+        async with pool.acquire() as conn:
+            await conn.execute(f"DROP SCHEMA {schema} CASCADE")
+
+@pytest_asyncio.fixture
+async def order_service(schema_pool, monkeypatch):
+    """Order service with fresh in-memory state over the benchmark menu in a throwaway schema"""
+    for service in (MenuService, KitchenQueue, StationBoard, TrendingService):
+        monkeypatch.setattr(service, '_instance', None)
+    monkeypatch.setattr(MenuService, '_pool', schema_pool)
+    service = OrderService(schema_pool)
+    yield service
+    await service.menu_service.stop_listener()
@@ -0,0 +1,137 @@
+import asyncio
+import httpx
+import pytest
+import server
+from decimal import Decimal
+from models.menu import MenuItemUpsert
+from models.order import OrderCreate, PaymentReport
+from routers import auth, reports
+from services import artifact_cache
+from services.artifact_cache import ArtifactCache
+from services.export_executor import ExportExecutor
+
+@pytest.fixture
+def cache(monkeypatch, tmp_path, request):
+    """Fresh artifact cache holding at most 100 bytes, in memory or in a temporary directory"""
+    monkeypatch.setattr(ArtifactCache, '_instance', None)
+    monkeypatch.setattr(artifact_cache, 'EXPORT_CACHE_DIR', str(tmp_path) if getattr(request, 'param', None) == 'disk' else '')
+    monkeypatch.setattr(artifact_cache, 'EXPORT_CACHE_MAX_BYTES', 100)
+    return ArtifactCache()
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize('cache', ['memory', 'disk'], indirect=True)
+async def test_renders_once_and_evicts_least_recently_used(cache):
+    renders = []
+
+    async def render(content: bytes):
+        renders.append(content)
+        await asyncio.sleep(0)
+        return content
+
+    first = cache.key('payment', {'start_time': None}, 'csv', 1)
+    a, b = await asyncio.gather(
+        cache.get_or_render(first, lambda: render(b'a' * 40)),
+        cache.get_or_render(first, lambda: render(b'a' * 40))
+    )
+    assert a.etag == b.etag and len(renders) == 1
+    assert (await cache.get_or_render(first, lambda: render(b'x'))).content == b'a' * 40
+
+    # Same content under another key is stored once
+    await cache.get_or_render(cache.key('payment', {'start_time': None}, 'csv', 2), lambda: render(b'a' * 40))
+    assert cache.metrics()['bytes'] == 40
+
+    await cache.get_or_render(cache.key('items', {}, 'csv', 1), lambda: render(b'b' * 40))
+    await cache.get(first)
+    await cache.get_or_render(cache.key('price_analysis', {}, 'csv', 1), lambda: render(b'c' * 40))
+    assert await cache.get(cache.key('items', {}, 'csv', 1)) is None
+    assert (await cache.get(first)).content == b'a' * 40
+    assert cache.metrics()['evictions'] == 1
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize('cache', ['disk'], indirect=True)
+async def test_eviction_removes_key_pointers_of_every_worker(cache, monkeypatch, tmp_path):
+    async def render(content: bytes):
+        return content
+
+    await cache.get_or_render(cache.key('items', {}, 'csv', 1), lambda: render(b'b' * 40))
+    # Another worker sharing the directory stores the same file under its own key
+    monkeypatch.setattr(ArtifactCache, '_instance', None)
+    other = ArtifactCache()
+    await other.get_or_render(other.key('items', {}, 'csv', 2), lambda: render(b'b' * 40))
+    assert len(list((tmp_path / 'keys').iterdir())) == 2
+
+    await cache.get_or_render(cache.key('payment', {}, 'csv', 1), lambda: render(b'a' * 70))
+    assert [path.name for path in (tmp_path / 'keys').iterdir()] == [cache.key('payment', {}, 'csv', 1)]
+    assert await other.get(other.key('items', {}, 'csv', 2)) is None
+
+class StubOrderService:
+    """Payment reports at a data version the test can bump"""
+
+    def __init__(self):
+        self.version = 1
+        self.computed = 0
+
+    async def get_report_version(self, report_type: str) -> int:
+        return self.version
+
+    async def get_cached_report_with_version(self, report_type: str, **params):
+        self.computed += 1
+        return [PaymentReport(paymentMethod="cash", orderCount=self.version, totalItems=2, pendingOrders=0, completedOrders=1)], self.version
+
+@pytest.mark.asyncio
+async def test_export_served_from_cache_with_etag(cache):
+    stub = StubOrderService()
+    server.app.dependency_overrides[reports.get_order_service] = lambda: stub
+    server.app.dependency_overrides[auth.get_current_user] = lambda: "admin"
+    try:
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=server.app), base_url="http://test") as client:
+            first = await client.get("/reports/payment/export?format=csv")
+            second = await client.get("/reports/payment/export?format=csv")
+            assert first.content == second.content and stub.computed == 1
+            assert second.headers['content-length'] == str(len(second.content))
+
+            etag = second.headers['etag']
+            unchanged = await client.get("/reports/payment/export?format=csv", headers={"If-None-Match": etag})
+            assert unchanged.status_code == 304
+
+            stub.version = 2
+            changed = await client.get("/reports/payment/export?format=csv", headers={"If-None-Match": etag})
+            assert changed.status_code == 200 and changed.headers['etag'] != etag
+    finally:
+        server.app.dependency_overrides.clear()
+        ExportExecutor().shutdown()
+
+@pytest.mark.asyncio
+async def test_price_change_produces_new_price_exports(cache, order_service):
+    """Price analysis and full exports are stored per orders and menu version"""
+    # Room for every file, so only a version change can produce a new one
+    cache.max_bytes = 1024 * 1024
+    order_service.report_cache.clear()
+    await order_service.menu_service.start_listener()
+    order = await order_service.create_order(OrderCreate(
+        customerName="Asha", items=[{"name": "Dosa", "quantity": 2}], paymentMethod="cash"
+    ))
+    await order_service.complete_order(order.id)
+    server.app.dependency_overrides[reports.get_order_service] = lambda: order_service
+    server.app.dependency_overrides[auth.get_current_user] = lambda: "admin"
+    try:
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=server.app), base_url="http://test") as client:
+            paths = ["/reports/price-analysis/export?format=csv", "/reports/full/export"]
+            before = {path: (await client.get(path)).headers['etag'] for path in paths}
+            assert '10.99' in (await client.get(paths[0])).text
+
+            await order_service.menu_service.upsert_menu_items([MenuItemUpsert(id="dosa", price=Decimal("12.49"))])
+            # The first request may still get the old report while it is recomputed in the background
+            for path in paths:
+                for _ in range(50):
+                    response = await client.get(path)
+                    if response.headers['etag'] != before[path]:
+                        break
+                    await asyncio.sleep(0.02)
+                else:
+                    raise AssertionError(f"{path} kept serving the old prices")
+            assert '12.49' in (await client.get(paths[0])).text
+    finally:
+        server.app.dependency_overrides.clear()
+        order_service.report_cache.clear()
+        ExportExecutor().shutdown()
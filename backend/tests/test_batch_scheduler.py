@@ -0,0 +1,43 @@
+import pytest
+from datetime import datetime, timedelta
+from models.order import EASTERN_TZ
+from services.batch_scheduler import BatchScheduler, parse_batch_capacity
+from services.kitchen_queue import KitchenQueue
+
+START = EASTERN_TZ.localize(datetime(2026, 6, 1, 12, 0))
+
+@pytest.fixture
+def scheduler():
+    """Batch scheduler and kitchen queue (process-wide singletons) with Dosa batches of 5"""
+    queue = KitchenQueue()
+    scheduler = BatchScheduler()
+    original = scheduler.capacities
+    queue.clear()
+    scheduler.clear()
+    scheduler.capacities = {'dosa': 5}
+    yield scheduler
+    scheduler.capacities = original
+    queue.clear()
+    scheduler.clear()
+
+def test_parse_batch_capacity():
+    assert parse_batch_capacity("Dosa=8, Chicken 65=10,bad") == {'dosa': 8, 'chicken 65': 10}
+
+def test_batches_are_fifo_within_capacity(scheduler):
+    """Batches take the oldest lines up to capacity and follow the queue as it changes"""
+    queue = scheduler.kitchen_queue
+    for number, quantity in enumerate((2, 2, 3, 1), start=1012):
+        queue.enqueue(str(number), [("Dosa", quantity)], START + timedelta(minutes=number - 1012), order_number=str(number))
+
+    batch = scheduler.next_batch("Dosa")
+    assert batch['order_numbers'] == ['1012', '1013']
+    assert batch['quantity'] == 4
+    assert batch['label'] == "Make 4 Dosa now covering orders #1012-#1013"
+
+    for order_id in batch['order_ids']:
+        queue.update_item_status(order_id, "Dosa", "cooking", START)
+    assert scheduler.next_batch("Dosa")['order_numbers'] == ['1014', '1015']
+
+    proposals = scheduler.propose(START + timedelta(minutes=10))
+    assert [p['item_name'] for p in proposals] == ["Dosa"]
+    assert proposals[0]['oldest_wait_minutes'] == 8.0
@@ -0,0 +1,141 @@
+import asyncio
+import json
+import pytest
+import pytest_asyncio
+import db
+import server
+from benchmarks.synthetic import bench_pool
+from models.order import OrderCreate
+from services.event_hub import EventHub, HubFull
+from services.export_jobs import ExportJobManager
+from services.menu_service import MenuService
+
+@pytest.fixture
+def hub(monkeypatch):
+    monkeypatch.setattr(EventHub, '_instance', None)
+    return EventHub()
+
+def data_of(frame: str):
+    return json.loads(frame.split('data: ', 1)[1])
+
+@pytest.mark.asyncio
+async def test_fan_out_coalesces_per_subscriber(hub):
+    loads = []
+
+    async def load_order(key):
+        loads.append(key)
+        return json.dumps({'orderNumber': key, 'status': 'pending'}) if key != '404' else None
+
+    hub.loaders['order'] = load_order
+    first = await hub.subscribe('order:7')
+    second = await hub.subscribe('order:7')
+    other = await hub.subscribe('order:8')
+    # The second subscriber starts from the state loaded for the first
+    assert loads == ['7', '8'] and hub.subscribers == 3
+    assert await hub.subscribe('order:404') is None and hub.subscribers == 3
+    assert data_of(await first.next(1)) == {'orderNumber': '7', 'status': 'pending'}
+
+    # A client that does not keep up only gets the latest state
+    for status in ('cooking', 'ready', 'completed'):
+        hub.publish('order:7', json.dumps({'orderNumber': '7', 'status': status}))
+    frame = await first.next(1)
+    assert frame.startswith('event: order\n') and data_of(frame)['status'] == 'completed'
+    assert await first.next(0.01) is None
+    # The second subscriber had not read the initial state either
+    assert data_of(await second.next(1))['status'] == 'completed'
+    assert data_of(await other.next(1))['orderNumber'] == '8' and await other.next(0.01) is None
+
+    hub.max_subscribers = 3
+    with pytest.raises(HubFull):
+        await hub.subscribe('order:9')
+    for subscription in (first, second, other):
+        subscription.close()
+    assert hub.subscribers == 0 and hub.topics == {} and hub._latest == {}
+
+@pytest.mark.asyncio
+async def test_changes_are_reloaded_once_while_a_reload_runs(hub):
+    loads = []
+
+    async def load_board(key):
+        loads.append(key)
+        await asyncio.sleep(0.05)
+        return json.dumps(len(loads))
+
+    hub.loaders['notifications'] = load_board
+    subscription = await hub.subscribe('notifications')
+    for _ in range(10):
+        hub.changed('notifications')
+    await asyncio.sleep(0.01)
+    for _ in range(10):
+        hub.changed('notifications')
+    hub.changed('notifications:unwatched')
+    await asyncio.sleep(0.2)
+    # One reload for the changes before it started, one more for all those that arrived during it
+    assert len(loads) == 3
+    assert data_of(await subscription.next(1)) == 3
+    subscription.close()
+
+@pytest_asyncio.fixture
+async def listening_hub(hub, order_service):
+    """The hub serving orders and listening for changes from any connection"""
+    hub.loaders['order'] = order_service.get_order_event
+    hub.loaders['notifications'] = order_service.notification_service.get_active_notifications_json
+    await hub.start_listener(order_service.pool)
+    yield hub
+    await hub.stop_listener()
+
+@pytest.mark.asyncio
+async def test_order_changes_on_any_connection_reach_subscribers(listening_hub, order_service):
+    hub = listening_hub
+    order = await order_service.create_order(OrderCreate(
+        customerName="Asha", items=[{"name": "Dosa", "quantity": 2}], paymentMethod="cash"
+    ))
+    subscription = await hub.subscribe(f"order:{order.orderNumber}")
+    events = subscription.events(heartbeat=0.05)
+    assert data_of(await events.__anext__())['status'] == 'pending'
+    assert await events.__anext__() == ": keep-alive\n\n"
+
+    # Another worker completes the order
+    async with order_service.pool.acquire() as conn:
+        await conn.execute("UPDATE orders SET status = 'completed' WHERE id = $1", order.id)
+    frame = await events.__anext__()
+    while not frame.startswith('event: order'):
+        frame = await events.__anext__()
+    assert data_of(frame)['status'] == 'completed'
+
+    await events.aclose()
+    assert hub.subscribers == 0
+
+@pytest.mark.asyncio
+async def test_completed_orders_reach_the_pickup_display(listening_hub, order_service):
+    hub = listening_hub
+    order = await order_service.create_order(OrderCreate(
+        customerName="Asha", items=[{"name": "Dosa", "quantity": 2}], paymentMethod="cash"
+    ))
+    subscription = await hub.subscribe('notifications')
+    assert data_of(await subscription.next(1)) == []
+
+    await order_service.complete_order(order.id)
+    frame = await subscription.next(1)
+    assert frame.startswith('event: notifications\n')
+    [notification] = data_of(frame)
+    assert notification['customerName'] == "Asha" and notification['orderId'] == order.id
+
+    # Completing it again does not notify the customer twice
+    await order_service.complete_order(order.id)
+    assert len(await order_service.notification_service.get_active_notifications()) == 1
+    subscription.close()
+
+@pytest.mark.asyncio
+async def test_shutdown_releases_listeners_before_closing_the_pool(hub, monkeypatch):
+    async with bench_pool("public", max_size=2) as pool:
+        monkeypatch.setattr(db, '_pool', pool)
+        for service in (MenuService, ExportJobManager):
+            monkeypatch.setattr(service, '_instance', None)
+            monkeypatch.setattr(service, '_pool', pool)
+        await MenuService().start_listener()
+        await hub.start_listener(pool)
+
+        # Closing the pool waits for every connection, so a listener still holding one hangs shutdown
+        await asyncio.wait_for(server.shutdown(), 5)
+        assert pool._closed
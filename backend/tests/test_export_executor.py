@@ -0,0 +1,85 @@
+import asyncio
+import math
+import time
+import httpx
+import pytest
+import pytest_asyncio
+import server
+from models.order import ItemReport
+from routers import auth, reports
+from services.artifact_cache import ArtifactCache
+from services.export_executor import ExportExecutor
+
+class StubOrderService:
+    """Serves an empty order list and a large item report without a database"""
+
+    def __init__(self, item_count: int = 4000):
+        self.reports = [
+            ItemReport(
+                itemName=f"Item {i}", totalOrdered=i * 3, orderCount=i, averageQuantityPerOrder=3.0,
+                popularPaymentMethod="cash", recentOrders=[f"Customer {j}" for j in range(5)]
+            )
+            for i in range(item_count)
+        ]
+
+    async def get_all_orders(self):
+        return []
+
+    async def get_report_version(self, report_type: str) -> int:
+        return 1
+
+    async def get_cached_report_with_version(self, report_type: str, **params):
+        return self.reports, 1
+
+def p99(samples):
+    """Nearest-rank 99th percentile"""
+    samples = sorted(samples)
+    return samples[math.ceil(0.99 * len(samples)) - 1]
+
+@pytest_asyncio.fixture
+async def client():
+    stub = StubOrderService()
+    server.app.dependency_overrides[server.get_order_service] = lambda: stub
+    server.app.dependency_overrides[reports.get_order_service] = lambda: stub
+    server.app.dependency_overrides[auth.get_current_user] = lambda: "admin"
+    transport = httpx.ASGITransport(app=server.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        yield client
+    server.app.dependency_overrides.clear()
+    ExportExecutor().shutdown()
+    ArtifactCache().clear()
+
+async def order_latencies(client, until=None, count=50):
+    """Time GET /orders/ every 5ms, until ``until`` is done if given.
+
+    The pause before each request counts towards its latency beyond 5ms, so
+    time the event loop spends blocked elsewhere shows up in the samples.
+    """
+    samples = []
+    while (until is None and len(samples) < count) or (until is not None and not until.done()):
+        started = time.perf_counter()
+        await asyncio.sleep(0.005)
+        response = await client.get("/orders/")
+        samples.append(time.perf_counter() - started - 0.005)
+        assert response.status_code == 200
+    return samples
+
+@pytest.mark.asyncio
+async def test_order_latency_stays_flat_during_exports(client):
+    """Exports render in the worker pool, so /orders/ p99 barely moves while they run"""
+    baseline = p99(await order_latencies(client))
+
+    # Distinct parameters, so every export renders instead of sharing one stored file
+    exports = asyncio.gather(*(client.get(f"/reports/items/export?recent_customers={n}") for n in range(1, 5)))
+    during = await order_latencies(client, until=exports)
+    responses = await exports
+
+    assert all(response.status_code == 200 for response in responses)
+    assert responses[0].content[:2] == b"PK"
+    assert len(during) >= 5
+    assert p99(during) < max(5 * baseline, 0.1)
+
+    metrics = ExportExecutor().metrics()
+    assert metrics['completed'] >= 4
+    assert metrics['max_queued'] >= 4 - metrics['workers']
+    assert metrics['queued'] == 0 and metrics['running'] == 0
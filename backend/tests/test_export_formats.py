@@ -0,0 +1,127 @@
+import csv
+import io
+import openpyxl
+import pytest
+import threading
+from datetime import datetime
+from decimal import Decimal
+from models.order import PaymentReport
+from services import excel_service, export_formats
+from services.excel_service import ExcelService
+from services.export_formats import render_report, stream_line_item_rows, stream_order_rows
+from services.report_rows import LINE_ITEM_COLUMNS, ORDER_COLUMNS
+from services.xlsx_stream import XlsxStreamWriter
+
+REPORTS = [
+    PaymentReport(paymentMethod="cash", orderCount=4, totalItems=9, pendingOrders=1, completedOrders=3, averageDeliveryTime=21.456),
+    PaymentReport(paymentMethod="zelle", orderCount=2, totalItems=3, pendingOrders=2, completedOrders=0),
+]
+
+async def order_rows():
+    for number in range(1012, 1015):
+        yield {
+            'order_number': str(number), 'order_time': datetime(2026, 6, 1, 12, number - 1012), 'customer_name': 'Asha',
+            'payment_method': 'cash', 'status': 'pending', 'items': '2x Dosa', 'total_items': 2,
+            'total_amount': Decimal('21.98'), 'delivery_minutes': 30, 'completed_time': None
+        }
+
+def test_report_csv_uses_excel_columns():
+    rows = list(csv.DictReader(io.StringIO(render_report("payment", REPORTS, "csv").decode())))
+    assert rows[0]['Payment Method'] == 'CASH'
+    assert rows[0]['Average Delivery Time (minutes)'] == '21.46'
+    assert rows[1]['Average Delivery Time (minutes)'] == ''
+    assert rows[1]['Completion Rate (%)'] == '0.0'
+
+def test_report_columnar_formats():
+    pa = pytest.importorskip("pyarrow")
+    import pyarrow.parquet as pq
+    table = pq.read_table(io.BytesIO(render_report("payment", REPORTS, "parquet")))
+    assert table.column('Total Orders').to_pylist() == [4, 2]
+    table = pa.ipc.open_stream(render_report("payment", REPORTS, "arrow")).read_all()
+    assert table.column('Average Delivery Time (minutes)').to_pylist() == [21.46, None]
+
+async def line_item_rows():
+    for number, item, quantity, status in (('1012', 'Dosa', 2, 'finished'), ('1012', 'Coffee', 1, 'cooking'), ('1013', 'Dosa', 1, 'not started')):
+        yield {
+            'order_number': number, 'order_time': datetime(2026, 6, 1, 12), 'customer_name': 'Asha',
+            'payment_method': 'cash', 'status': 'pending', 'item_name': item, 'quantity': quantity,
+            'price': Decimal('10.99'), 'subtotal': Decimal('10.99') * quantity, 'cooking_status': status,
+            'completed_time': None
+        }
+
+@pytest.mark.asyncio
+async def test_stream_orders_csv():
+    output = b''.join([chunk async for chunk in stream_order_rows(order_rows(), "csv")])
+    rows = list(csv.reader(io.StringIO(output.decode())))
+    assert rows[0] == ORDER_COLUMNS
+    assert rows[1][:3] == ['1012', '2026-06-01 12:00:00', 'Asha']
+    assert len(rows) == 4
+
+@pytest.mark.asyncio
+async def test_stream_orders_columnar():
+    pa = pytest.importorskip("pyarrow")
+    import pyarrow.parquet as pq
+    output = b''.join([chunk async for chunk in stream_order_rows(order_rows(), "parquet")])
+    table = pq.read_table(io.BytesIO(output))
+    assert table.column_names == ORDER_COLUMNS
+    assert table.column('Total Amount ($)').to_pylist() == [Decimal('21.98')] * 3
+    output = b''.join([chunk async for chunk in stream_order_rows(order_rows(), "arrow")])
+    table = pa.ipc.open_stream(output).read_all()
+    assert table.column('Order Time').to_pylist()[2] == datetime(2026, 6, 1, 12, 2)
+
+@pytest.mark.asyncio
+async def test_stream_line_items():
+    output = b''.join([chunk async for chunk in stream_line_item_rows(line_item_rows(), "csv")])
+    rows = list(csv.reader(io.StringIO(output.decode())))
+    assert rows[0] == LINE_ITEM_COLUMNS
+    assert rows[2][5:10] == ['Coffee', '1', '10.99', '10.99', 'cooking']
+
+    output = io.BytesIO(b''.join([chunk async for chunk in ExcelService().stream_line_item_excel(line_item_rows())]))
+    summary = dict(openpyxl.load_workbook(output)['Summary'].values)
+    assert summary['Total Orders'] == 2 and summary['Total Quantity'] == 4
+    assert summary['Total Revenue ($)'] == 43.96 and summary['Items Cooking'] == 1
+
+@pytest.mark.asyncio
+async def test_stream_excel_encodes_rows_off_the_event_loop(monkeypatch):
+    threads = set()
+    write_row = XlsxStreamWriter.write_row
+
+    def recording_write_row(writer, values):
+        threads.add(threading.current_thread())
+        return write_row(writer, values)
+
+    monkeypatch.setattr(XlsxStreamWriter, 'write_row', recording_write_row)
+    monkeypatch.setattr(excel_service, 'XLSX_STREAM_BATCH_ROWS', 2)
+    output = io.BytesIO(b''.join([chunk async for chunk in ExcelService().stream_order_excel(order_rows())]))
+    assert threads and threading.current_thread() not in threads
+
+    workbook = openpyxl.load_workbook(output)
+    assert [row[0] for row in workbook['Orders'].iter_rows(min_row=2, values_only=True)] == ['1012', '1013', '1014']
+    assert dict(workbook['Summary'].values)['Total Orders'] == 3
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("export_format", ["csv", "parquet", "arrow"])
+async def test_stream_rows_encodes_batches_off_the_event_loop(monkeypatch, export_format):
+    if export_format != "csv":
+        pytest.importorskip("pyarrow")
+    threads = set()
+    to_row = export_formats.order_row
+
+    def recording_order_row(row):
+        threads.add(threading.current_thread())
+        return to_row(row)
+
+    monkeypatch.setattr(export_formats, 'order_row', recording_order_row)
+    monkeypatch.setattr(export_formats, 'CSV_BATCH_ROWS', 2)
+    monkeypatch.setattr(export_formats, 'EXPORT_BATCH_ROWS', 2)
+    output = b''.join([chunk async for chunk in stream_order_rows(order_rows(), export_format)])
+    assert threads and threading.current_thread() not in threads
+
+    if export_format == "csv":
+        rows = list(csv.reader(io.StringIO(output.decode())))
+        assert rows[0] == ORDER_COLUMNS and [row[0] for row in rows[1:]] == ['1012', '1013', '1014']
+    else:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+        table = pq.read_table(io.BytesIO(output)) if export_format == "parquet" else pa.ipc.open_stream(output).read_all()
+        assert table.column('Order Number').to_pylist() == ['1012', '1013', '1014']
@@ -0,0 +1,166 @@
+import asyncio
+import csv
+import io
+import os
+import httpx
+import openpyxl
+import pytest
+import pytest_asyncio
+import server
+from datetime import datetime, timedelta
+from decimal import Decimal
+from models.order import ItemReport, EASTERN_TZ
+from routers import auth, reports
+from services import export_jobs
+from services.export_executor import ExportExecutor
+from services.export_jobs import ExportJobManager
+
+class StubOrderService:
+    """Serves a few orders, slowly if asked, and an item report without a database"""
+
+    def __init__(self, orders: int = 3, delay: float = 0):
+        self.orders = orders
+        self.delay = delay
+
+    async def count_orders(self, start_time=None, end_time=None) -> int:
+        return self.orders
+
+    async def iter_order_rows(self, start_time=None, end_time=None):
+        for number in range(self.orders):
+            await asyncio.sleep(self.delay)
+            yield {
+                'order_number': str(1000 + number), 'order_time': datetime(2026, 6, 1, 12), 'customer_name': 'Asha',
+                'payment_method': 'cash', 'status': 'completed', 'items': '2x Dosa', 'total_items': 2,
+                'total_amount': Decimal('21.98'), 'delivery_minutes': 30, 'completed_time': None
+            }
+
+    async def get_cached_report(self, report_type: str, **params):
+        return [ItemReport(
+            itemName="Dosa", totalOrdered=6, orderCount=3, averageQuantityPerOrder=2.0,
+            popularPaymentMethod="cash", recentOrders=["Asha"]
+        )]
+
+@pytest_asyncio.fixture
+async def client(schema_pool, monkeypatch, tmp_path):
+    """Client against a fresh job manager with one worker and room for one waiting job"""
+    monkeypatch.setattr(ExportJobManager, '_instance', None)
+    monkeypatch.setattr(ExportJobManager, '_pool', schema_pool)
+    monkeypatch.setattr(export_jobs, 'EXPORT_JOB_DIR', str(tmp_path))
+    monkeypatch.setattr(export_jobs, 'EXPORT_JOB_WORKERS', 1)
+    monkeypatch.setattr(export_jobs, 'EXPORT_JOB_MAX_QUEUE', 1)
+    monkeypatch.setattr(export_jobs, 'EXPORT_JOB_SAVE_SECONDS', 0.01)
+    stub = StubOrderService()
+    server.app.dependency_overrides[reports.get_order_service] = lambda: stub
+    server.app.dependency_overrides[auth.get_current_user] = lambda: "admin"
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=server.app), base_url="http://test") as client:
+        client.stub = stub
+        client.managers = [ExportJobManager()]
+        yield client
+    for manager in client.managers:
+        await manager.stop()
+    ExportExecutor().shutdown()
+    server.app.dependency_overrides.clear()
+
+def switch_worker(client, monkeypatch):
+    """Serve the next requests from a job manager that has none of the earlier jobs in memory"""
+    monkeypatch.setattr(ExportJobManager, '_instance', None)
+    client.managers.append(ExportJobManager())
+
+async def wait_for(client, job_id: str, status: str) -> dict:
+    for _ in range(200):
+        job = (await client.get(f"/reports/jobs/{job_id}")).json()
+        if job['status'] == status:
+            return job
+        await asyncio.sleep(0.01)
+    raise AssertionError(f"job stayed {job['status']}")
+
+@pytest.mark.asyncio
+async def test_jobs_run_in_background_and_download(client):
+    response = await client.post("/reports/jobs", json={"report": "orders", "format": "csv"})
+    assert response.status_code == 202
+    job = await wait_for(client, response.json()['id'], "completed")
+    assert job['progress'] == 1.0 and job['rowsWritten'] == 3 and job['totalRows'] == 3
+
+    download = await client.get(f"/reports/jobs/{job['id']}/download")
+    assert download.headers['content-length'] == str(job['sizeBytes'])
+    rows = list(csv.reader(io.StringIO(download.text)))
+    assert rows[1][0] == '1000' and len(rows) == 4
+
+    job = (await client.post("/reports/jobs", json={"report": "items"})).json()
+    await wait_for(client, job['id'], "completed")
+    workbook = openpyxl.load_workbook(io.BytesIO((await client.get(f"/reports/jobs/{job['id']}/download")).content))
+    assert 'Menu Items Report' in workbook.sheetnames
+
+@pytest.mark.asyncio
+async def test_cancel_bounded_queue_and_expiry(client):
+    client.stub.orders, client.stub.delay = 1000, 0.01
+    running = (await client.post("/reports/jobs", json={"report": "orders", "format": "csv"})).json()
+    await wait_for(client, running['id'], "running")
+    queued = (await client.post("/reports/jobs", json={"report": "orders"})).json()
+    assert (await client.post("/reports/jobs", json={"report": "orders"})).status_code == 503
+
+    assert (await client.get(f"/reports/jobs/{running['id']}/download")).status_code == 409
+    cancelled = (await client.delete(f"/reports/jobs/{running['id']}")).json()
+    assert cancelled['status'] == "cancelled"
+    assert os.listdir(export_jobs.EXPORT_JOB_DIR) == []
+    # The worker may pick the queued job up meanwhile; it then stops at its first progress save
+    assert (await client.delete(f"/reports/jobs/{queued['id']}")).status_code == 200
+    await wait_for(client, queued['id'], "cancelled")
+
+    manager = ExportJobManager()
+    await manager.sweep(datetime.now(EASTERN_TZ) + timedelta(minutes=export_jobs.EXPORT_JOB_TTL_MINUTES + 1))
+    assert (await client.get(f"/reports/jobs/{running['id']}")).status_code == 404
+
+@pytest.mark.asyncio
+async def test_jobs_are_served_and_cancelled_from_another_worker(client, monkeypatch):
+    done = (await client.post("/reports/jobs", json={"report": "orders", "format": "csv"})).json()
+    await wait_for(client, done['id'], "completed")
+    client.stub.orders, client.stub.delay = 1000, 0.01
+    running = (await client.post("/reports/jobs", json={"report": "orders", "format": "csv"})).json()
+    await wait_for(client, running['id'], "running")
+
+    switch_worker(client, monkeypatch)
+    job = await wait_for(client, done['id'], "completed")
+    download = await client.get(f"/reports/jobs/{done['id']}/download")
+    assert download.headers['content-length'] == str(job['sizeBytes'])
+    # Progress saved by the worker running the job
+    for _ in range(100):
+        if (await client.get(f"/reports/jobs/{running['id']}")).json()['rowsWritten'] > 0:
+            break
+        await asyncio.sleep(0.01)
+    else:
+        raise AssertionError("progress was not saved")
+
+    # The running worker notices the cancel at its next progress save and removes the file
+    assert (await client.delete(f"/reports/jobs/{running['id']}")).json()['status'] == "running"
+    await wait_for(client, running['id'], "cancelled")
+    assert os.listdir(export_jobs.EXPORT_JOB_DIR) == [f"{done['id']}.csv"]
+
+@pytest.mark.asyncio
+async def test_sweep_fails_jobs_left_by_a_dead_worker(client):
+    client.stub.orders, client.stub.delay = 1000, 0.01
+    running = (await client.post("/reports/jobs", json={"report": "orders", "format": "csv"})).json()
+    await wait_for(client, running['id'], "running")
+
+    # Jobs a worker accepted before it died, one of them with part of its file written
+    stale = datetime.now(EASTERN_TZ) - timedelta(minutes=export_jobs.EXPORT_JOB_STALE_MINUTES + 1)
+    async with ExportJobManager().pool.acquire() as conn:
+        await conn.executemany("""
+            INSERT INTO export_jobs (id, owner, report, format, status, created_at, heartbeat_at)
+            VALUES ($1, 'admin', 'orders', 'csv', $2, $3, $3)
+        """, [('dead-running', 'running', stale), ('dead-queued', 'queued', stale)])
+    partial = os.path.join(export_jobs.EXPORT_JOB_DIR, "dead-running.csv")
+    with open(partial, 'w') as f:
+        f.write("Order Number\n")
+
+    manager = ExportJobManager()
+    await manager.sweep()
+    for job_id in ('dead-running', 'dead-queued'):
+        job = (await client.get(f"/reports/jobs/{job_id}")).json()
+        assert job['status'] == "failed" and job['expiresAt'] is not None
+    assert not os.path.exists(partial)
+    # The live job's heartbeat is refreshed by its own worker's sweep
+    assert (await client.get(f"/reports/jobs/{running['id']}")).json()['status'] == "running"
+
+    await manager.sweep(datetime.now(EASTERN_TZ) + timedelta(minutes=export_jobs.EXPORT_JOB_TTL_MINUTES + 1))
+    assert (await client.get("/reports/jobs/dead-queued")).status_code == 404
@@ -0,0 +1,53 @@
+import asyncio
+import io
+import time
+import openpyxl
+import pytest
+from models.order import PaymentReport, ItemReport
+from services.excel_service import ExcelService
+from services.order_service import OrderService
+
+REPORTS = {
+    'payment': [PaymentReport(paymentMethod="cash", orderCount=3, totalItems=6, pendingOrders=1, completedOrders=2)],
+    'items': [ItemReport(
+        itemName="Dosa", totalOrdered=6, orderCount=3, averageQuantityPerOrder=2.0,
+        popularPaymentMethod="cash", recentOrders=["Asha"]
+    )],
+    'price_analysis': {
+        'items': [{'item_name': 'Dosa', 'category': 'Mains', 'unit_price': 10.99, 'total_quantity': 6, 'total_revenue': 65.94, 'order_count': 3}],
+        'total_revenue': 65.94, 'total_items_sold': 6, 'total_orders': 3, 'average_order_value': 21.98,
+        'start_date': None, 'end_date': None
+    }
+}
+
+@pytest.mark.asyncio
+async def test_full_report_queries_run_concurrently(monkeypatch):
+    order_service = OrderService(None)
+
+    async def slow_report(report_type: str, **params):
+        await asyncio.sleep(0.2)
+        return REPORTS[report_type]
+
+    async def report_version(report_type: str) -> int:
+        return 3
+
+    monkeypatch.setattr(order_service, 'get_cached_report', slow_report)
+    monkeypatch.setattr(order_service, 'get_report_version', report_version)
+    started = time.perf_counter()
+    full_report, version = await order_service.get_cached_report_with_version('full', recent_limit=5)
+    # About as long as the slowest report, not the sum of all three
+    assert time.perf_counter() - started < 0.4
+    # None of the parts is cached, so the report is as old as can be
+    assert version == 0 and full_report['items'][0].itemName == "Dosa"
+
+    workbook = openpyxl.load_workbook(ExcelService().create_full_report_excel(full_report))
+    assert workbook.sheetnames == [
+        'Payment Methods Report', 'Menu Items Report', 'Price Analysis Report', 'Summary', 'Report Info'
+    ]
+    assert next(workbook['Payment Methods Report'].iter_rows(min_row=2, values_only=True))[:3] == ('CASH', 3, 6)
+    summary = dict(workbook['Summary'].values)
+    assert summary['Total Orders'] == 3 and summary['Total Revenue ($)'] == 65.94
+
+    empty = {**full_report, 'payment': [], 'items': []}
+    workbook = openpyxl.load_workbook(io.BytesIO(ExcelService().create_full_report_excel(empty).getvalue()))
+    assert dict(workbook['Summary'].values)['Most Popular Item'] == 'N/A'
@@ -0,0 +1,48 @@
+import pytest
+from datetime import datetime, timedelta
+from models.order import EASTERN_TZ
+from services.kitchen_queue import KitchenQueue, DEFAULT_PREP_MINUTES
+
+START = EASTERN_TZ.localize(datetime(2026, 6, 1, 12, 0))
+
+@pytest.fixture
+def queue(monkeypatch):
+    """Kitchen queue (process-wide singleton) frozen at START"""
+    queue = KitchenQueue()
+    queue.clear()
+    monkeypatch.setattr(queue, '_now', lambda: START)
+    yield queue
+    queue.clear()
+
+def test_eta_counts_units_ahead(queue):
+    """Orders queue behind pending units of the same item; the slowest item sets the ETA"""
+    first = queue.enqueue("a", [("Dosa", 2)], START)
+    second = queue.enqueue("b", [("Dosa", 1), ("Tea", 1)], START)
+
+    assert first == START + timedelta(minutes=2 * DEFAULT_PREP_MINUTES)
+    assert second == START + timedelta(minutes=3 * DEFAULT_PREP_MINUTES)
+
+def test_eta_follows_queue_and_prep_rate(queue):
+    """Finishing a line drains the queue and teaches the item's prep time"""
+    queue.enqueue("a", [("Dosa", 2)], START)
+    queue.enqueue("b", [("Dosa", 2)], START)
+
+    queue.update_item_status("a", "Dosa", "cooking", START)
+    queue.update_item_status("a", "Dosa", "finished", START + timedelta(minutes=4))
+
+    # 2 units in 4 minutes -> 2 minutes per unit, starting from the last drain
+    assert queue.items["Dosa"].prep_minutes == pytest.approx(2)
+    assert queue.eta("b") == START + timedelta(minutes=8)
+    assert queue.items["Dosa"].pending == 2
+
+    queue.remove("b")
+    assert queue.items["Dosa"].pending == 0
+    assert queue.eta("b") is None
+
+def test_repeated_item_lines_are_queued_together(queue):
+    """An order listing an item twice queues the sum of both quantities"""
+    queue.enqueue("a", [("Dosa", 2), ("Tea", 1), ("Dosa", 1)], START)
+
+    assert queue.items["Dosa"].pending == 3
+    assert queue.orders["a"].lines["Dosa"].quantity == 3
+    assert queue.eta("a") == START + timedelta(minutes=3 * DEFAULT_PREP_MINUTES)
@@ -0,0 +1,35 @@
+from models.menu import MenuItem
+from services.menu_search import MenuSearchIndex, prefix_distance
+
+ITEMS = [
+    MenuItem(id="chicken_biryani", name="Chicken Biryani", chef="Nachu", sousChef="Sreedhar", category="Biryani", price=12.99),
+    MenuItem(id="goat_biryani", name="Goat Biryani", chef="Mario", sousChef="Rakesh", category="Biryani", price=12.99),
+    MenuItem(id="goat_curry", name="Goat Curry", chef="Mario", category="Curry", price=14.99),
+    MenuItem(id="chicken_65", name="Chicken 65", chef="Sunoj", sousChef="Jnet", category="Starters", price=9.99),
+    MenuItem(id="dosa", name="Dosa", chef="Sunoj", sousChef="Rakesh", category="South Indian", price=10.99),
+    MenuItem(id="coffee", name="Coffee", chef="Ravi Mom", category="Beverages", price=3.00),
+]
+
+def ids(items):
+    return [item.id for item in items]
+
+def test_prefix_distance():
+    assert prefix_distance("biriyani", "biryani", 2) == (1, True)
+    assert prefix_distance("bir", "biryani", 1) == (0, False)
+    assert prefix_distance("xyz", "biryani", 1) is None
+
+def test_search_ranks_prefixes_typos_and_fields():
+    index = MenuSearchIndex(ITEMS)
+    # Typo, and the name match ranks above the category-only ones
+    assert ids(index.search("biriyani")) == ["goat_biryani", "chicken_biryani"]
+    # Search as you type
+    assert ids(index.search("ch")) == ["chicken_65", "chicken_biryani"]
+    assert ids(index.search("chiken bir")) == ["chicken_biryani"]
+    # Category and chef names
+    assert ids(index.search("beverages")) == ["coffee"]
+    assert ids(index.search("mario")) == ["goat_curry", "goat_biryani"]
+    assert ids(index.search("goat", limit=1)) == ["goat_curry"]
+    assert index.search("pizza") == [] and index.search("  ") == []
+    # Repeated queries come from the cache and cannot be changed by callers
+    index.search("goat").clear()
+    assert len(index.search("goat")) == 2
@@ -0,0 +1,157 @@
+import asyncio
+import gzip
+import json
+import httpx
+import pytest
+import pytest_asyncio
+import server
+from routers import auth
+from routers.menu import choose_coding
+from services.menu_service import MenuService
+
+@pytest_asyncio.fixture
+async def menu_service(schema_pool, monkeypatch):
+    """Fresh menu service over the benchmark menu in a throwaway schema"""
+    monkeypatch.setattr(MenuService, '_instance', None)
+    monkeypatch.setattr(MenuService, '_pool', schema_pool)
+    service = MenuService()
+    yield service
+    await service.stop_listener()
+
+async def wait_for_version(service: MenuService, version: int):
+    for _ in range(200):
+        snapshot = await service.get_snapshot()
+        if snapshot.version >= version:
+            return snapshot
+        await asyncio.sleep(0.01)
+    raise AssertionError(f"menu stayed at version {snapshot.version}")
+
+@pytest.mark.asyncio
+async def test_snapshot_is_cached_and_indexed(menu_service):
+    snapshot = await menu_service.get_snapshot()
+    assert await menu_service.get_snapshot() is snapshot
+
+    menu = await menu_service.get_menu()
+    assert menu.categories == ['Bench'] and len(menu.items) == 17
+    assert (await menu_service.get_menu_item('goat_curry')).price == 14.99
+    assert (await menu_service.get_menu_item_by_name('GOAT CURRY')).id == 'goat_curry'
+    assert len(await menu_service.get_items_by_category('Bench')) == 17
+    assert await menu_service.get_menu_item('missing') is None
+
+    # An expired snapshot is reloaded even without a change
+    menu_service.ttl = 0
+    assert await menu_service.get_snapshot() is not snapshot
+
+@pytest.mark.asyncio
+async def test_change_notification_reloads_menu(menu_service):
+    loaded = []
+    menu_service.listeners.append(loaded.append)
+    await menu_service.start_listener()
+    version = (await menu_service.get_snapshot()).version
+
+    # Another worker changes the menu on its own connection
+    async with menu_service.pool.acquire() as conn:
+        await conn.execute("UPDATE menu_items SET price = 15.49 WHERE id = 'goat_curry'")
+        await conn.execute("UPDATE menu_items SET available = false WHERE id = 'tea'")
+
+    snapshot = await wait_for_version(menu_service, version + 2)
+    assert snapshot.by_id['goat_curry'].price == 15.49
+    assert 'tea' not in snapshot.by_id
+    assert loaded[-1] is snapshot
+
+def test_choose_coding():
+    assert choose_coding(None, ('identity', 'gzip', 'br')) == 'identity'
+    assert choose_coding('gzip, deflate, br', ('identity', 'gzip', 'br')) == 'br'
+    assert choose_coding('gzip, deflate, br', ('identity', 'gzip')) == 'gzip'
+    assert choose_coding('br;q=0.5, gzip', ('identity', 'gzip', 'br')) == 'gzip'
+    assert choose_coding('*;q=0, identity;q=0.1', ('identity', 'gzip')) == 'identity'
+    assert choose_coding('deflate', ('identity', 'gzip')) == 'identity'
+
+@pytest.mark.asyncio
+async def test_menu_served_precompressed_with_etag(menu_service):
+    expected = json.loads((await menu_service.get_menu()).model_dump_json())
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=server.app), base_url="http://test") as client:
+        response = await client.get("/menu/", headers={"Accept-Encoding": "gzip"})
+        assert response.headers['content-encoding'] == 'gzip'
+        assert response.headers['vary'] == 'Accept-Encoding'
+        assert response.json() == expected
+        snapshot = await menu_service.get_snapshot()
+        assert gzip.decompress(snapshot.bodies['gzip']) == snapshot.bodies['identity']
+
+        plain = await client.get("/menu/", headers={"Accept-Encoding": "identity"})
+        assert 'content-encoding' not in plain.headers and plain.json() == expected
+        assert plain.headers['etag'] != response.headers['etag']
+
+        etag = response.headers['etag']
+        unchanged = await client.get("/menu/", headers={"Accept-Encoding": "gzip", "If-None-Match": etag})
+        assert unchanged.status_code == 304 and unchanged.content == b''
+
+        async with menu_service.pool.acquire() as conn:
+            await conn.execute("UPDATE menu_items SET price = 3.25 WHERE id = 'coffee'")
+        menu_service.invalidate()
+        changed = await client.get("/menu/", headers={"Accept-Encoding": "gzip", "If-None-Match": etag})
+        assert changed.status_code == 200 and changed.headers['etag'] != etag
+
+@pytest.mark.asyncio
+async def test_bulk_upsert_reports_diff_and_bumps_version_once(menu_service):
+    version = (await menu_service.get_snapshot()).version
+    server.app.dependency_overrides[auth.get_current_user] = lambda: "admin"
+    try:
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=server.app), base_url="http://test") as client:
+            response = await client.put("/menu/items", json={"items": [
+                {"id": "goat_curry", "price": "15.49"},
+                {"id": "tea", "available": False, "sousChef": "Ravi Mom"},
+                {"id": "coffee", "price": 3.00},
+                {"id": "masala_chai", "name": "Masala Chai", "chef": "Dera", "category": "Beverages", "price": 2.50}
+            ]})
+            assert response.status_code == 200
+            result = response.json()
+            assert result['version'] == version + 1
+            assert [item['id'] for item in result['created']] == ["masala_chai"]
+            assert {change['id']: change['before'] for change in result['updated']} == {
+                "goat_curry": {"price": 14.99},
+                "tea": {"sousChef": None, "available": True}
+            }
+            assert {change['id']: change['after'] for change in result['updated']} == {
+                "goat_curry": {"price": 15.49},
+                "tea": {"sousChef": "Ravi Mom", "available": False}
+            }
+            assert result['unchanged'] == ["coffee"]
+
+            # The next read already sees the batch
+            snapshot = await menu_service.get_snapshot()
+            assert snapshot.version == version + 1 and 'tea' not in snapshot.by_id
+            assert snapshot.by_id['masala_chai'].price == 2.5
+
+            incomplete = await client.put("/menu/items", json={"items": [{"id": "new_item", "price": 1}]})
+            assert incomplete.status_code == 400
+            duplicate = await client.put("/menu/items", json={"items": [{"id": "tea"}, {"id": "tea"}]})
+            assert duplicate.status_code == 422
+
+            # A batch that changes nothing leaves the version alone
+            unchanged = await client.put("/menu/items", json={"items": [{"id": "coffee", "price": 3.00}]})
+            assert unchanged.json()['version'] == version + 1 and unchanged.json()['unchanged'] == ["coffee"]
+    finally:
+        server.app.dependency_overrides.clear()
+
+@pytest.mark.asyncio
+async def test_price_changes_are_recorded_with_effective_intervals(menu_service):
+    async with menu_service.pool.acquire() as conn:
+        await conn.execute("UPDATE menu_items SET price = 15.49 WHERE id = 'goat_curry'")
+        # Not a price change
+        await conn.execute("UPDATE menu_items SET chef = 'Mario' WHERE id = 'goat_curry'")
+        async with conn.transaction():
+            await conn.execute("UPDATE menu_items SET price = 15.99 WHERE id = 'goat_curry'")
+            await conn.execute("UPDATE menu_items SET price = 16.49 WHERE id = 'goat_curry'")
+    menu_service.invalidate()
+
+    history = await menu_service.get_price_history('goat_curry')
+    assert [interval.price for interval in history] == [14.99, 15.49, 16.49]
+    assert all(earlier.valid_to == later.valid_from for earlier, later in zip(history, history[1:]))
+    assert history[-1].valid_to is None
+    # As-of lookups through the API
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=server.app), base_url="http://test") as client:
+        at = history[1].valid_from.isoformat()
+        response = await client.get("/menu/item/goat_curry/prices", params={"at": at})
+        assert [price['price'] for price in response.json()] == [15.49]
+        assert (await client.get("/menu/item/missing/prices")).status_code == 404
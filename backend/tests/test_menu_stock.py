@@ -0,0 +1,54 @@
+import asyncio
+import pytest
+from models.menu import MenuItemUpsert
+from models.order import OrderCreate
+from services.order_service import SoldOutError
+
+def order_for(quantity: int) -> OrderCreate:
+    return OrderCreate(
+        customerName="Asha",
+        items=[{"name": "Goat Curry", "quantity": quantity}, {"name": "Coffee", "quantity": 1}],
+        paymentMethod="cash"
+    )
+
+@pytest.mark.asyncio
+async def test_concurrent_orders_never_oversell(order_service):
+    async with order_service.pool.acquire() as conn:
+        await conn.execute("UPDATE menu_items SET stock_quantity = 5 WHERE id = 'goat_curry'")
+
+    results = await asyncio.gather(*(order_service.create_order(order_for(1)) for _ in range(20)), return_exceptions=True)
+    placed = [result for result in results if not isinstance(result, Exception)]
+    rejected = [result for result in results if isinstance(result, Exception)]
+    assert len(placed) == 5
+    assert all(isinstance(error, SoldOutError) for error in rejected)
+    assert "'Goat Curry' is sold out" in {str(error) for error in rejected}
+    # Rejected orders leave nothing behind in the kitchen
+    assert len(order_service.kitchen_queue.orders) == 5
+
+    async with order_service.pool.acquire() as conn:
+        row = await conn.fetchrow("SELECT stock_quantity, available FROM menu_items WHERE id = 'goat_curry'")
+        assert (row['stock_quantity'], row['available']) == (0, False)
+        # Untracked items are not touched
+        assert await conn.fetchval("SELECT stock_quantity FROM menu_items WHERE id = 'coffee'") is None
+        assert await conn.fetchval("SELECT COUNT(*) FROM orders") == 5
+
+@pytest.mark.asyncio
+async def test_order_over_remaining_stock_is_rejected_and_restock_makes_available(order_service):
+    menu = order_service.menu_service
+    await menu.start_listener()
+    version = (await menu.upsert_menu_items([MenuItemUpsert(id="goat_curry", stockQuantity=2)])).version
+    with pytest.raises(SoldOutError, match="Only 2 'Goat Curry' left"):
+        await order_service.create_order(order_for(3))
+    await order_service.create_order(order_for(2))
+
+    # Selling the last one announces a new menu without the item
+    for _ in range(200):
+        snapshot = await menu.get_snapshot()
+        if snapshot.version > version:
+            break
+        await asyncio.sleep(0.01)
+    assert snapshot.version == version + 1 and 'goat_curry' not in snapshot.by_id
+
+    result = await menu.upsert_menu_items([MenuItemUpsert(id="goat_curry", stockQuantity=10)])
+    assert result.updated[0].after == {"available": True, "stockQuantity": 10}
+    assert 'goat_curry' in (await menu.get_snapshot()).by_id
@@ -0,0 +1,34 @@
+from datetime import datetime, timedelta, timezone
+from services.price_history import PriceHistoryIndex, SINCE_ALWAYS
+
+T0 = datetime(2026, 3, 1, 12, tzinfo=timezone.utc)
+T1 = T0 + timedelta(days=10)
+
+ROWS = [
+    {'menu_item_id': 'dosa', 'name': 'Dosa', 'price': 9.99, 'valid_from': datetime.min, 'valid_to': T0},
+    {'menu_item_id': 'dosa', 'name': 'Dosa', 'price': 10.99, 'valid_from': T0, 'valid_to': T1},
+    {'menu_item_id': 'dosa', 'name': 'Dosa', 'price': 11.49, 'valid_from': T1, 'valid_to': None},
+    # Taken off the menu and back later
+    {'menu_item_id': 'tea', 'name': 'Masala Tea', 'price': 2.00, 'valid_from': T0, 'valid_to': T0 + timedelta(days=1)},
+    {'menu_item_id': 'tea', 'name': 'Masala Tea', 'price': 2.50, 'valid_from': T1, 'valid_to': None},
+]
+
+def test_price_at_bisects_effective_intervals():
+    index = PriceHistoryIndex(ROWS)
+    assert index.price_at('dosa', T0 - timedelta(days=365)) == 9.99
+    assert index.price_at('dosa', T0) == 10.99
+    assert index.price_at('dosa', T1 - timedelta(microseconds=1)) == 10.99
+    assert index.price_at('dosa', T1 + timedelta(days=100)) == 11.49
+    assert index.price_at('tea', T0 + timedelta(days=2)) is None
+    assert index.price_at('tea', T0 - timedelta(days=1)) is None
+    assert index.price_at('coffee', T0) is None
+
+def test_between_and_names():
+    index = PriceHistoryIndex(ROWS)
+    assert [i.price for i in index.between('dosa')] == [9.99, 10.99, 11.49]
+    assert [i.price for i in index.between('dosa', T0, T1)] == [10.99]
+    assert [i.price for i in index.between('dosa', T0 - timedelta(days=1), T0 + timedelta(days=1))] == [9.99, 10.99]
+    assert [i.price for i in index.between('tea', T0 + timedelta(days=2), T1)] == []
+    assert index.between('dosa')[0].valid_from == SINCE_ALWAYS
+    assert index.between('dosa')[0].as_dict()['valid_from'] is None
+    assert index.item_id('MASALA TEA') == 'tea' and index.item_id('Goat Curry') == 'goat_curry'
@@ -0,0 +1,41 @@
+import random
+import pytest
+from datetime import date, datetime, timezone
+from services.order_service import OrderService
+from services.quantile_sketch import DDSketch
+
+def test_sketch_quantiles_within_relative_accuracy():
+    """Quantiles stay within the configured relative error of the exact values"""
+    rng = random.Random(7)
+    values = [rng.lognormvariate(3, 0.6) for _ in range(20000)]
+    sketch = DDSketch(0.01)
+    for value in values:
+        sketch.add(value)
+
+    ordered = sorted(values)
+    for q in (0.5, 0.9, 0.99):
+        exact = ordered[int(q * (len(ordered) - 1))]
+        assert sketch.quantile(q) == pytest.approx(exact, rel=0.01)
+
+def test_sketch_merge_and_round_trip():
+    """Merged sketches equal one sketch of all values and survive serialization"""
+    first, second, combined = DDSketch(), DDSketch(), DDSketch()
+    for minutes in (0, 4, 12, 18, 25):
+        first.add(minutes)
+        combined.add(minutes)
+    for minutes in (30, 45, 240):
+        second.add(minutes)
+        combined.add(minutes)
+
+    first.merge(DDSketch.from_dict(second.to_dict()))
+    assert first.count == combined.count == 8
+    assert first.quantiles() == combined.quantiles()
+    assert first.quantile(0) == 0.0
+
+def test_percentiles_only_for_whole_eastern_days():
+    service = OrderService(None)
+    assert service._eastern_dates(None, None) == (None, None)
+    assert service._eastern_dates(datetime(2026, 3, 1), datetime(2026, 3, 3)) == (date(2026, 3, 1), date(2026, 3, 2))
+    # Midnight in New York given in UTC
+    assert service._eastern_dates(datetime(2026, 3, 1, 5, tzinfo=timezone.utc), None) == (date(2026, 3, 1), None)
+    assert service._eastern_dates(datetime(2026, 3, 1, 18), datetime(2026, 3, 1, 20)) is None
@@ -0,0 +1,78 @@
+import asyncio
+import pytest
+from services.report_cache import ReportCache
+
+@pytest.fixture
+def cache():
+    """Fresh report cache (the class is a process-wide singleton)"""
+    cache = ReportCache()
+    cache.clear()
+    yield cache
+    cache.clear()
+
+@pytest.mark.asyncio
+async def test_report_cache_hits_until_version_changes(cache):
+    """Results are reused until the data version moves"""
+    calls = []
+
+    async def compute():
+        calls.append(1)
+        return len(calls)
+
+    assert await cache.get_or_compute("payment", {"start_time": None}, 1, compute) == 1
+    assert await cache.get_or_compute("payment", {"start_time": None}, 1, compute) == 1
+    assert len(calls) == 1
+
+    # Different parameters are cached separately
+    assert await cache.get_or_compute("payment", {"start_time": "2025-01-01"}, 1, compute) == 2
+
+    metrics = cache.metrics()['reports']['payment']
+    assert metrics['hits'] == 1
+    assert metrics['misses'] == 2
+    assert metrics['computes'] == 2
+
+@pytest.mark.asyncio
+async def test_report_cache_serves_stale_while_revalidating(cache):
+    """A newer version returns the stale value at once and recomputes once in the background"""
+    release = asyncio.Event()
+    calls = []
+
+    async def compute():
+        calls.append(1)
+        if len(calls) > 1:
+            await release.wait()
+        return f"v{len(calls)}"
+
+    assert await cache.get_or_compute("items", {}, 1, compute) == "v1"
+
+    # Several readers after a data change all get the stale result without waiting
+    results = [await cache.get_or_compute("items", {}, 2, compute) for _ in range(3)]
+    assert results == ["v1", "v1", "v1"]
+    await asyncio.sleep(0)
+    assert len(calls) == 2
+
+    release.set()
+    await asyncio.sleep(0)
+    await asyncio.sleep(0)
+    assert await cache.get_or_compute("items", {}, 2, compute) == "v2"
+    assert len(calls) == 2
+
+    metrics = cache.metrics()['reports']['items']
+    assert metrics['stale_hits'] == 3
+    assert metrics['hits'] == 1
+
+@pytest.mark.asyncio
+async def test_report_cache_shares_concurrent_misses(cache):
+    """Concurrent readers of an uncached report share one computation"""
+    calls = []
+
+    async def compute():
+        calls.append(1)
+        await asyncio.sleep(0.01)
+        return "report"
+
+    results = await asyncio.gather(*[
+        cache.get_or_compute("price_analysis", {}, 1, compute) for _ in range(5)
+    ])
+    assert results == ["report"] * 5
+    assert len(calls) == 1
@@ -0,0 +1,42 @@
+import asyncio
+import pytest
+from models.order import OrderCreate
+
+@pytest.mark.asyncio
+async def test_completing_twice_keeps_rollups_consistent(order_service):
+    order = await order_service.create_order(OrderCreate(
+        customerName="Asha", items=[{"name": "Dosa", "quantity": 2}], paymentMethod="cash"
+    ))
+    first = await order_service.complete_order(order.id)
+    again = await order_service.complete_order(order.id)
+    assert again.completedTime == first.completedTime
+
+    assert await order_service.delete_order(order.id)
+    async with order_service.pool.acquire() as conn:
+        # Deleting takes the order out of the day and bucket it was counted in
+        assert await conn.fetchval("SELECT COALESCE(SUM(quantity), 0) FROM daily_item_stats") == 0
+        assert await conn.fetchval("SELECT COALESCE(SUM(order_count), 0) FROM daily_order_stats") == 0
+        assert await conn.fetchval("SELECT COUNT(*) FROM delivery_time_buckets WHERE count <> 0") == 0
+
+@pytest.mark.asyncio
+async def test_orders_version_moves_after_each_committed_write(order_service):
+    version = await order_service.get_data_version()
+    order = await order_service.create_order(OrderCreate(
+        customerName="Asha", items=[{"name": "Dosa", "quantity": 1}], paymentMethod="cash"
+    ))
+    placed = await order_service.get_data_version()
+    assert placed > version
+    await order_service.complete_order(order.id)
+    assert await order_service.get_data_version() > placed
+
+    # An order write still open does not hold up another one
+    async with order_service.pool.acquire() as conn:
+        transaction = conn.transaction()
+        await transaction.start()
+        try:
+            await order_service.rollup_service.record_order_placed(conn, order.id)
+            await asyncio.wait_for(order_service.create_order(OrderCreate(
+                customerName="Ravi", items=[{"name": "Tea", "quantity": 1}], paymentMethod="zelle"
+            )), 2)
+        finally:
+            await transaction.rollback()
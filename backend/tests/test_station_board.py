@@ -0,0 +1,51 @@
+import asyncio
+import pytest
+from datetime import datetime, timedelta
+from models.menu import MenuItem
+from models.order import EASTERN_TZ
+from services.kitchen_queue import KitchenQueue
+from services.station_board import StationBoard, station_id
+
+START = EASTERN_TZ.localize(datetime(2026, 6, 1, 12, 0))
+
+@pytest.fixture
+def board():
+    """Station board (process-wide singleton) over a two-station menu"""
+    KitchenQueue().clear()
+    board = StationBoard()
+    board.load_menu([
+        MenuItem(id="dosa", name="Dosa", chef="Sunoj", sousChef="Rakesh", category="South Indian", price=10.99),
+        MenuItem(id="chicken_65", name="Chicken 65", chef="Sunoj", category="Starters", price=9.99),
+        MenuItem(id="coffee", name="Coffee", chef="Ravi Mom", category="Beverages", price=3.00),
+    ])
+    yield board
+    KitchenQueue().clear()
+
+def test_station_id():
+    assert station_id("Ravi Mom") == "ravi-mom"
+    assert station_id(None) == "unassigned"
+
+@pytest.mark.asyncio
+async def test_station_summary_tracks_queue(board):
+    """Each station only sees its own items and is woken by their changes"""
+    queue = board.kitchen_queue
+    version = board.version("ravi-mom")
+    queue.enqueue("a", [("Dosa", 2), ("Coffee", 1)], START, order_number="1012")
+    queue.enqueue("b", [("Chicken 65", 3)], START + timedelta(minutes=5), order_number="1013")
+    queue.update_item_status("a", "Dosa", "finished", START + timedelta(minutes=10))
+
+    summary = board.summary("sunoj", START + timedelta(minutes=20))
+    assert summary['sous_chefs'] == ["Rakesh"]
+    assert summary['pending_units'] == 3
+    assert summary['finished_last_hour'] == 2
+    assert summary['oldest_waiting']['order_number'] == "1013"
+    assert summary['oldest_waiting']['wait_minutes'] == 15.0
+
+    assert board.station_view("ravi-mom")['lines'][0]['orders'][0]['order_number'] == "1012"
+    assert await board.wait_for_change("ravi-mom", version, timeout=0.01)
+
+    version = board.version("ravi-mom")
+    waiter = asyncio.ensure_future(board.wait_for_change("ravi-mom", version, timeout=1))
+    await asyncio.sleep(0)
+    queue.update_item_status("a", "Coffee", "cooking", START)
+    assert await waiter
@@ -0,0 +1,60 @@
+import pytest
+from services.trending_service import TrendingService
+
+class FakeClock:
+    def __init__(self, now: float):
+        self.now = now
+
+    def __call__(self) -> float:
+        return self.now
+
+@pytest.fixture
+def trending():
+    """Trending service (process-wide singleton) on a controllable clock"""
+    service = TrendingService()
+    clock = FakeClock(1_000_000 * 60)
+    original_clock, original_capacity = service.clock, service.capacity
+    service.clock = clock
+    service.clear()
+    yield service, clock
+    service.clock, service.capacity = original_clock, original_capacity
+    service.clear()
+
+def test_trending_windows_slide(trending):
+    """Items drop out of the 15 minute window before the 60 minute one"""
+    service, clock = trending
+    service.record([("Dosa", 3), ("Tea", 1)])
+    clock.now += 10 * 60
+    service.record([("Tea", 4)])
+
+    assert service.top(15)['items'] == [
+        {'item_name': 'Tea', 'quantity': 5},
+        {'item_name': 'Dosa', 'quantity': 3}
+    ]
+
+    clock.now += 10 * 60
+    assert service.top(15)['items'] == [{'item_name': 'Tea', 'quantity': 4}]
+    assert service.top(60)['total_quantity'] == 8
+
+    clock.now += 60 * 60
+    assert service.top(60) == {'window_minutes': 60, 'total_quantity': 0, 'error_bound': 0.0, 'items': []}
+
+def test_trending_counts_within_error_bound(trending):
+    """With more distinct items than counters, counts stay within the reported bound"""
+    service, clock = trending
+    service.capacity = 4
+    truth = {}
+    for i in range(200):
+        name = "Dosa" if i % 3 == 0 else f"Item {i % 11}"
+        truth[name] = truth.get(name, 0) + 1
+        service.record([(name, 1)])
+        if i % 50 == 49:
+            clock.now += 60
+
+    report = service.top(15, k=1)
+    assert report['items'][0]['item_name'] == "Dosa"
+    assert report['error_bound'] == pytest.approx(200 / 4)
+    assert abs(report['items'][0]['quantity'] - truth["Dosa"]) <= report['error_bound']
+
+    with pytest.raises(ValueError):
+        service.top(30)
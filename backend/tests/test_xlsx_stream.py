@@ -0,0 +1,51 @@
+import io
+import pytest
+import openpyxl
+from datetime import datetime
+from decimal import Decimal
+from services.excel_service import ExcelService
+from services.xlsx_stream import XlsxStreamWriter, XLSX_CHUNK_SIZE
+
+def test_writer_emits_chunks_while_writing():
+    """Rows are handed over as they are written and the file opens as a normal workbook"""
+    writer = XlsxStreamWriter()
+    output = io.BytesIO()
+    writer.add_sheet('Orders', ['Number', 'Customer', 'Amount', 'Time', 'Note'])
+    chunks = 0
+    for i in range(50000):
+        writer.write_row([i, f'Customer <{i}>', Decimal('12.50'), datetime(2026, 6, 1, 12, 30), None])
+        assert writer.buffered < 4 * XLSX_CHUNK_SIZE
+        if writer.buffered >= XLSX_CHUNK_SIZE:
+            output.write(writer.take())
+            chunks += 1
+    writer.write_sheet('Summary', ['Metric', 'Value'], [['Total Orders', 50000]])
+    output.write(writer.close())
+
+    assert chunks > 1
+    workbook = openpyxl.load_workbook(output, read_only=True)
+    assert workbook.sheetnames == ['Orders', 'Summary']
+    rows = workbook['Orders'].iter_rows(min_row=2, max_row=2, values_only=True)
+    assert next(rows)[:4] == (0, 'Customer <0>', 12.5, datetime(2026, 6, 1, 12, 30))
+    assert list(workbook['Summary'].values) == [('Metric', 'Value'), ('Total Orders', 50000)]
+
+@pytest.mark.asyncio
+async def test_stream_order_excel_keeps_summary_sheets():
+    async def rows():
+        for number, status in (('1012', 'completed'), ('1013', 'pending')):
+            yield {
+                'order_number': number, 'order_time': datetime(2026, 6, 1, 12), 'customer_name': 'Asha',
+                'payment_method': 'cash', 'status': status, 'items': '2x Dosa', 'total_items': 2,
+                'total_amount': Decimal('21.98'), 'delivery_minutes': 30, 'completed_time': None
+            }
+
+    output = io.BytesIO()
+    async for chunk in ExcelService().stream_order_excel(rows()):
+        output.write(chunk)
+
+    workbook = openpyxl.load_workbook(output)
+    assert workbook.sheetnames == ['Orders', 'Summary', 'Report Info']
+    summary = dict(workbook['Summary'].values)
+    assert summary['Total Orders'] == 2
+    assert summary['Completed Orders'] == 1
+    assert summary['Total Revenue ($)'] == 43.96
+    assert dict(workbook['Report Info'].values)['Period'] == 'All orders'